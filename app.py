@@ -8,7 +8,7 @@
 3. 公共辅助函数提取
 4. 统一 API 响应格式
 """
-from flask import Flask, render_template
+from flask import Flask, render_template, url_for
 from config import Config
 from models import db
 from routes import register_blueprints
@@ -35,20 +35,45 @@ def create_app(config_class=Config):
   # 初始化数据库
   db.init_app(app)
 
+  # 注册汇总表增量维护、行版本、自动完成索引、编号占用位图和数据版本事件
+  from utils.collection_summary import register_summary_events
+  from utils.row_versions import register_row_version_events
+  from utils.autocomplete import register_autocomplete_events, reset_indexes
+  from utils.decoder_numbers import register_decoder_number_events, reset_decoder_numbers
+  from utils.cache import register_generation_events, bump_generation
+  register_summary_events()
+  register_row_version_events()
+  register_autocomplete_events()
+  register_decoder_number_events()
+  register_generation_events()
+  # 新的应用实例可能连接到不同的数据库，旧缓存一律作废
+  bump_generation()
+  reset_indexes()
+  reset_decoder_numbers()
+
   # 注册所有 Blueprint
   register_blueprints(app)
 
   # 注册错误处理器
   register_error_handlers(app)
 
+  # 注册模板过滤器和全局函数
+  register_template_helpers(app)
+
+  # 注册命令行命令
+  register_commands(app)
+
   # 创建数据目录（如果不存在）
   data_dir = app.config.get('DATA_DIR', 'data')
   if not os.path.exists(data_dir):
     os.makedirs(data_dir, exist_ok=True)
     logger.info(f"Created data directory: {data_dir}")
 
-  # 启动时同步文件
+  # 启动时升级数据库结构并同步文件
   with app.app_context():
+    from utils.schema import upgrade_schema
+    upgrade_schema()
+
     from utils.file_sync import sync_data_directory
     sync_data_directory()
 
@@ -78,6 +103,44 @@ def register_error_handlers(app):
     return f"服务器错误: {str(error)}<script>setTimeout(()=>location.href='/', 3000);</script>", 500
 
 
+def register_template_helpers(app):
+  """注册模板过滤器和全局函数"""
+  from utils.listing import build_row_payload
+  from utils.fragment_cache import render_row
+  from utils.option_cache import option_bundle, OPTION_MODELS
+
+  @app.template_filter('row_payload')
+  def row_payload(rows, model_type):
+    """将列表行转换为紧凑行数据：{{ rows | row_payload('locomotive') | tojson }}"""
+    return build_row_payload(model_type, rows)
+
+  @app.template_global('cached_row')
+  def cached_row(model_type, obj, macro):
+    """渲染列表行并按行指纹缓存：{{ cached_row('locomotive', locomotive, locomotive_row) }}"""
+    return render_row(model_type, obj, macro)
+
+  @app.template_global('option_table')
+  def option_table(option_key):
+    """选项键对应的系统信息表名（自动完成接口使用）：{{ option_table('brands') }}"""
+    return OPTION_MODELS[option_key].__tablename__
+
+  @app.template_global('option_bundle_url')
+  def option_bundle_url():
+    """带版本号的下拉选项包地址：{{ option_bundle_url() }}"""
+    return url_for('options.options_bundle', v=option_bundle()[0])
+
+
+def register_commands(app):
+  """注册命令行命令"""
+
+  @app.cli.command('rebuild-summary')
+  def rebuild_summary_command():
+    """从核心表全量重建 collection_summary 汇总表"""
+    from utils.collection_summary import rebuild_collection_summary
+    groups = rebuild_collection_summary()
+    print(f"汇总表已重建，共 {groups} 个分组")
+
+
 # 创建应用实例
 app = create_app()
 
@@ -0,0 +1,111 @@
+"""
+统计 API 基准测试
+对比旧的 ORM 全量加载 + Python 循环统计与数据库端分组聚合
+
+用法: python benchmarks/bench_statistics.py [行数]
+默认生成 50000 行（四种类型平均分配），使用临时 SQLite 文件数据库
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TestConfig
+from models import db, Brand, Merchant, Locomotive, CarriageSet, Trainset, LocomotiveHead
+from utils.aggregation import compute_statistics
+
+
+def legacy_statistics():
+  """旧实现：加载全部 ORM 对象，在 Python 中逐行分组累加"""
+  result = {'scale_stats': {}, 'brand_stats': {}, 'merchant_stats': {}, 'type_stats': {}}
+  for model_type, model_class in [('locomotive', Locomotive), ('carriage', CarriageSet),
+                                  ('trainset', Trainset), ('locomotive_head', LocomotiveHead)]:
+    items = model_class.query.all()
+    result['type_stats'][model_type] = {'count': len(items), 'total': sum(i.total_price or 0 for i in items)}
+    for item in items:
+      for stats, key in [
+        (result['scale_stats'], item.scale),
+        (result['brand_stats'], item.brand.name if item.brand else '未知'),
+        (result['merchant_stats'], item.merchant.name if item.merchant else '未知')
+      ]:
+        entry = stats.setdefault(key, {'count': 0, 'total': 0})
+        entry['count'] += 1
+        entry['total'] += item.total_price or 0
+  return result
+
+
+def seed(rows):
+  """生成测试数据"""
+  rng = random.Random(42)
+  brands = [Brand(name=f'品牌{i}', abbreviation=f'B{i}') for i in range(40)]
+  merchants = [Merchant(name=f'商家{i}') for i in range(80)]
+  db.session.add_all(brands + merchants)
+  db.session.flush()
+
+  model_classes = [Locomotive, CarriageSet, Trainset, LocomotiveHead]
+  mappings = {model_class: [] for model_class in model_classes}
+  for i in range(rows):
+    model_class = model_classes[i % len(model_classes)]
+    mappings[model_class].append({
+      'scale': rng.choice(['HO', 'N']),
+      'brand_id': rng.choice(brands).id,
+      'merchant_id': rng.choice(merchants).id if rng.random() > 0.1 else None,
+      'total_price': round(rng.uniform(50, 3000), 2),
+      'purchase_date': date(2015 + rng.randint(0, 10), rng.randint(1, 12), rng.randint(1, 28))
+    })
+  for model_class, rows_data in mappings.items():
+    db.session.bulk_insert_mappings(model_class, rows_data)
+  db.session.commit()
+
+
+def timed(func, repeat=3):
+  """返回多次执行的最短耗时（秒）"""
+  best = None
+  for _ in range(repeat):
+    db.session.expunge_all()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def main():
+  rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+  fd, db_path = tempfile.mkstemp(suffix='.db')
+  os.close(fd)
+
+  class BenchConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+
+  from app import create_app
+  app = create_app(BenchConfig)
+  try:
+    with app.app_context():
+      db.create_all()
+      seed(rows)
+
+      legacy = timed(legacy_statistics)
+      aggregated = timed(compute_statistics)
+
+      expected = legacy_statistics()
+      actual = compute_statistics()
+      for key in ('scale_stats', 'brand_stats', 'merchant_stats'):
+        assert {k: v['count'] for k, v in expected[key].items()} == \
+          {k: v['count'] for k, v in actual[key].items()}, f'{key} 结果不一致'
+
+      print(f'行数: {rows}')
+      print(f'ORM 全量加载: {legacy * 1000:.1f} ms')
+      print(f'SQL 分组聚合: {aggregated * 1000:.1f} ms')
+      print(f'加速比: {legacy / aggregated:.1f}x')
+      db.session.remove()
+  finally:
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+  main()
@@ -1,27 +1,40 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Integer, Float, Boolean, Date, ForeignKey, JSON, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import String, Integer, BigInteger, Float, Boolean, Date, ForeignKey, JSON, DateTime
+from sqlalchemy.orm import relationship, validates
 from datetime import date, datetime, timezone
+from utils.helpers import normalize_name
 
 db = SQLAlchemy()
 
+
+class NameKeyMixin:
+  """系统信息表的名称查找键：name 赋值时同步写入规范化的 name_key（见 normalize_name）"""
+
+  @validates('name')
+  def _sync_name_key(self, key, value):
+    self.name_key = normalize_name(value)
+    return value
+
+
 # 参考数据表 - 跨模型共享
-class PowerType(db.Model):
+class PowerType(NameKeyMixin, db.Model):
   """动力类型（机车和动车组共享）"""
   __tablename__ = 'power_type'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='动力类型名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<PowerType {self.id}: {self.name}>'
 
-class Brand(db.Model):
+class Brand(NameKeyMixin, db.Model):
   """品牌（所有模型共享）"""
   __tablename__ = 'brand'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(100), nullable=False, unique=True, comment='品牌名称')
+  name_key = db.Column(String(100), unique=True, index=True, comment='名称查找键（规范化名称）')
   abbreviation = db.Column(String(10), nullable=False, unique=True, comment='品牌缩写')
   website = db.Column(String(255), comment='官方网站')
   search_url = db.Column(String(255), comment='搜索URL模板，{query}为搜索词占位符')
@@ -29,64 +42,70 @@ class Brand(db.Model):
   def __repr__(self):
     return f'<Brand {self.id}: {self.name}>'
 
-class ChipInterface(db.Model):
+class ChipInterface(NameKeyMixin, db.Model):
   """芯片接口（机车和动车组共享）"""
   __tablename__ = 'chip_interface'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='芯片接口名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<ChipInterface {self.id}: {self.name}>'
 
-class ChipModel(db.Model):
+class ChipModel(NameKeyMixin, db.Model):
   """芯片型号（机车和动车组共享）"""
   __tablename__ = 'chip_model'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(100), nullable=False, unique=True, comment='芯片型号名称')
+  name_key = db.Column(String(100), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<ChipModel {self.id}: {self.name}>'
 
-class Merchant(db.Model):
+class Merchant(NameKeyMixin, db.Model):
   """购买商家（所有模型共享）"""
   __tablename__ = 'merchant'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(100), nullable=False, unique=True, comment='商家名称')
+  name_key = db.Column(String(100), unique=True, index=True, comment='名称查找键（规范化名称）')
   website = db.Column(String(255), comment='网店地址')
 
   def __repr__(self):
     return f'<Merchant {self.id}: {self.name}>'
 
-class Depot(db.Model):
+class Depot(NameKeyMixin, db.Model):
   """车辆段/机务段（机车、车厢、动车组共享）"""
   __tablename__ = 'depot'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='车辆段/机务段名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<Depot {self.id}: {self.name}>'
 
 # 机车专用表
-class LocomotiveSeries(db.Model):
+class LocomotiveSeries(NameKeyMixin, db.Model):
   """机车系列"""
   __tablename__ = 'locomotive_series'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='机车系列名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<LocomotiveSeries {self.id}: {self.name}>'
 
-class LocomotiveModel(db.Model):
+class LocomotiveModel(NameKeyMixin, db.Model):
   """机车型号（关联系列和类型）"""
   __tablename__ = 'locomotive_model'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, comment='机车型号名称')
+  name_key = db.Column(String(50), index=True, comment='名称查找键（规范化名称，同名车型可属于不同系列）')
   series_id = db.Column(Integer, ForeignKey('locomotive_series.id'), nullable=False, comment='关联系列ID')
   power_type_id = db.Column(Integer, ForeignKey('power_type.id'), nullable=False, comment='关联动力类型ID')
 
@@ -97,22 +116,24 @@ class LocomotiveModel(db.Model):
     return f'<LocomotiveModel {self.id}: {self.name}>'
 
 # 车厢专用表
-class CarriageSeries(db.Model):
+class CarriageSeries(NameKeyMixin, db.Model):
   """车厢系列"""
   __tablename__ = 'carriage_series'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='车厢系列名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<CarriageSeries {self.id}: {self.name}>'
 
-class CarriageModel(db.Model):
+class CarriageModel(NameKeyMixin, db.Model):
   """车厢型号（关联系列和类型）"""
   __tablename__ = 'carriage_model'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, comment='车厢型号名称')
+  name_key = db.Column(String(50), index=True, comment='名称查找键（规范化名称，同名车型可属于不同系列）')
   series_id = db.Column(Integer, ForeignKey('carriage_series.id'), nullable=False, comment='关联系列ID')
   type = db.Column(String(20), nullable=False, comment='类型：客车/货车/工程车')
 
@@ -122,22 +143,24 @@ class CarriageModel(db.Model):
     return f'<CarriageModel {self.id}: {self.name}>'
 
 # 动车组专用表（与先头车共享）
-class TrainsetSeries(db.Model):
+class TrainsetSeries(NameKeyMixin, db.Model):
   """动车组系列"""
   __tablename__ = 'trainset_series'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, unique=True, comment='动车组系列名称')
+  name_key = db.Column(String(50), unique=True, index=True, comment='名称查找键（规范化名称）')
 
   def __repr__(self):
     return f'<TrainsetSeries {self.id}: {self.name}>'
 
-class TrainsetModel(db.Model):
+class TrainsetModel(NameKeyMixin, db.Model):
   """动车组车型（关联系列和类型）"""
   __tablename__ = 'trainset_model'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   name = db.Column(String(50), nullable=False, comment='动车组车型名称')
+  name_key = db.Column(String(50), index=True, comment='名称查找键（规范化名称，同名车型可属于不同系列）')
   series_id = db.Column(Integer, ForeignKey('trainset_series.id'), nullable=False, comment='关联系列ID')
   power_type_id = db.Column(Integer, ForeignKey('power_type.id'), nullable=False, comment='关联动力类型ID')
 
@@ -151,12 +174,17 @@ class TrainsetModel(db.Model):
 class Locomotive(db.Model):
   """机车模型"""
   __tablename__ = 'locomotive'
+  # 比例内唯一校验（SYSTEM_TABLES 中的 unique_in_scale 字段）使用的索引
+  __table_args__ = (
+    db.Index('ix_locomotive_scale_locomotive_number', 'scale', 'locomotive_number'),
+    db.Index('ix_locomotive_scale_decoder_number', 'scale', 'decoder_number'),
+  )
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   series_id = db.Column(Integer, ForeignKey('locomotive_series.id'), comment='关联机车系列ID')
   power_type_id = db.Column(Integer, ForeignKey('power_type.id'), comment='关联动力类型ID')
   model_id = db.Column(Integer, ForeignKey('locomotive_model.id'), comment='关联机车型号ID')
-  brand_id = db.Column(Integer, ForeignKey('brand.id'), comment='关联品牌ID')
+  brand_id = db.Column(Integer, ForeignKey('brand.id'), index=True, comment='关联品牌ID')
   depot_id = db.Column(Integer, ForeignKey('depot.id'), comment='关联机务段ID')
   plaque = db.Column(String(50), comment='挂牌')
   color = db.Column(String(50), comment='颜色')
@@ -166,11 +194,12 @@ class Locomotive(db.Model):
   chip_interface_id = db.Column(Integer, ForeignKey('chip_interface.id'), comment='关联芯片接口ID')
   chip_model_id = db.Column(Integer, ForeignKey('chip_model.id'), comment='关联芯片型号ID')
   price = db.Column(String(50), comment='价格表达式（如288+538）')
-  total_price = db.Column(Float, comment='总价（自动计算）')
-  item_number = db.Column(String(50), comment='货号')
+  total_price = db.Column(Float, index=True, comment='总价（自动计算）')
+  item_number = db.Column(String(50), index=True, comment='货号')
   product_url = db.Column(String(1024), comment='产品地址')
-  purchase_date = db.Column(Date, default=date.today, comment='购买日期')
-  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), comment='关联商家ID')
+  purchase_date = db.Column(Date, default=date.today, index=True, comment='购买日期')
+  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), index=True, comment='关联商家ID')
+  row_version = db.Column(BigInteger, index=True, comment='行版本（每次增删改递增，用于增量同步）')
 
   # 关系
   series = relationship('LocomotiveSeries', backref='locomotives')
@@ -190,17 +219,18 @@ class CarriageSet(db.Model):
   __tablename__ = 'carriage_set'
 
   id = db.Column(Integer, primary_key=True, comment='主键')
-  brand_id = db.Column(Integer, ForeignKey('brand.id'), comment='关联品牌ID')
+  brand_id = db.Column(Integer, ForeignKey('brand.id'), index=True, comment='关联品牌ID')
   series_id = db.Column(Integer, ForeignKey('carriage_series.id'), comment='关联车厢系列ID')
   depot_id = db.Column(Integer, ForeignKey('depot.id'), comment='关联车辆段ID')
   train_number = db.Column(String(20), comment='车次')
   plaque = db.Column(String(50), comment='挂牌')
-  item_number = db.Column(String(50), comment='货号')
+  item_number = db.Column(String(50), index=True, comment='货号')
   scale = db.Column(String(2), nullable=False, comment='比例：HO/N')
-  total_price = db.Column(Float, comment='总价')
+  total_price = db.Column(Float, index=True, comment='总价')
   product_url = db.Column(String(1024), comment='产品地址')
-  purchase_date = db.Column(Date, default=date.today, comment='购买日期')
-  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), comment='关联商家ID')
+  purchase_date = db.Column(Date, default=date.today, index=True, comment='购买日期')
+  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), index=True, comment='关联商家ID')
+  row_version = db.Column(BigInteger, index=True, comment='行版本（每次增删改递增，用于增量同步）')
 
   # 关系
   brand = relationship('Brand', backref='carriage_sets')
@@ -222,6 +252,7 @@ class CarriageItem(db.Model):
   car_number = db.Column(String(20), comment='车辆号（1-20位字母、数字或连字符）')
   color = db.Column(String(50), comment='颜色')
   lighting = db.Column(String(50), comment='灯光')
+  row_version = db.Column(BigInteger, index=True, comment='行版本（每次增删改递增，用于增量同步）')
 
   # 关系
   model = relationship('CarriageModel', backref='items')
@@ -232,12 +263,17 @@ class CarriageItem(db.Model):
 class Trainset(db.Model):
   """动车组模型"""
   __tablename__ = 'trainset'
+  # 比例内唯一校验（SYSTEM_TABLES 中的 unique_in_scale 字段）使用的索引
+  __table_args__ = (
+    db.Index('ix_trainset_scale_trainset_number', 'scale', 'trainset_number'),
+    db.Index('ix_trainset_scale_decoder_number', 'scale', 'decoder_number'),
+  )
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   series_id = db.Column(Integer, ForeignKey('trainset_series.id'), comment='关联动车组系列ID')
   power_type_id = db.Column(Integer, ForeignKey('power_type.id'), comment='关联动力类型ID')
   model_id = db.Column(Integer, ForeignKey('trainset_model.id'), comment='关联动车组车型ID')
-  brand_id = db.Column(Integer, ForeignKey('brand.id'), comment='关联品牌ID')
+  brand_id = db.Column(Integer, ForeignKey('brand.id'), index=True, comment='关联品牌ID')
   depot_id = db.Column(Integer, ForeignKey('depot.id'), comment='关联动车段ID')
   plaque = db.Column(String(50), comment='挂牌')
   color = db.Column(String(50), comment='颜色')
@@ -250,11 +286,12 @@ class Trainset(db.Model):
   chip_interface_id = db.Column(Integer, ForeignKey('chip_interface.id'), comment='关联芯片接口ID')
   chip_model_id = db.Column(Integer, ForeignKey('chip_model.id'), comment='关联芯片型号ID')
   price = db.Column(String(50), comment='价格表达式（如288+538）')
-  total_price = db.Column(Float, comment='总价（自动计算）')
-  item_number = db.Column(String(50), comment='货号')
+  total_price = db.Column(Float, index=True, comment='总价（自动计算）')
+  item_number = db.Column(String(50), index=True, comment='货号')
   product_url = db.Column(String(1024), comment='产品地址')
-  purchase_date = db.Column(Date, default=date.today, comment='购买日期')
-  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), comment='关联商家ID')
+  purchase_date = db.Column(Date, default=date.today, index=True, comment='购买日期')
+  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), index=True, comment='关联商家ID')
+  row_version = db.Column(BigInteger, index=True, comment='行版本（每次增删改递增，用于增量同步）')
 
   # 关系
   series = relationship('TrainsetSeries', backref='trainsets')
@@ -275,17 +312,18 @@ class LocomotiveHead(db.Model):
 
   id = db.Column(Integer, primary_key=True, comment='主键')
   model_id = db.Column(Integer, ForeignKey('trainset_model.id'), comment='关联动车组车型ID')
-  brand_id = db.Column(Integer, ForeignKey('brand.id'), comment='关联品牌ID')
+  brand_id = db.Column(Integer, ForeignKey('brand.id'), index=True, comment='关联品牌ID')
   special_color = db.Column(String(32), comment='特涂')
   scale = db.Column(String(2), nullable=False, comment='比例：HO/N')
   head_light = db.Column(Boolean, comment='头车灯（有/无）')
   interior_light = db.Column(String(50), comment='室内灯')
   price = db.Column(String(50), comment='价格表达式（如288+538）')
-  total_price = db.Column(Float, comment='总价（自动计算）')
-  item_number = db.Column(String(50), comment='货号')
+  total_price = db.Column(Float, index=True, comment='总价（自动计算）')
+  item_number = db.Column(String(50), index=True, comment='货号')
   product_url = db.Column(String(1024), comment='产品地址')
-  purchase_date = db.Column(Date, default=date.today, comment='购买日期')
-  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), comment='关联商家ID')
+  purchase_date = db.Column(Date, default=date.today, index=True, comment='购买日期')
+  merchant_id = db.Column(Integer, ForeignKey('merchant.id'), index=True, comment='关联商家ID')
+  row_version = db.Column(BigInteger, index=True, comment='行版本（每次增删改递增，用于增量同步）')
 
   # 关系
   model = relationship('TrainsetModel', backref='locomotive_heads')
@@ -295,6 +333,51 @@ class LocomotiveHead(db.Model):
   def __repr__(self):
     return f'<LocomotiveHead {self.id}: {self.model.name} {self.scale}>'
 
+class CollectionSummary(db.Model):
+  """藏品汇总读模型（按类型、比例、品牌、商家增量维护数量和总价）"""
+  __tablename__ = 'collection_summary'
+  __table_args__ = (
+    db.UniqueConstraint('model_type', 'scale', 'brand_id', 'merchant_id', name='uq_collection_summary_key'),
+  )
+
+  id = db.Column(Integer, primary_key=True, comment='主键')
+  model_type = db.Column(String(20), nullable=False, comment='模型类型：locomotive/carriage/trainset/locomotive_head')
+  scale = db.Column(String(2), nullable=False, comment='比例：HO/N')
+  brand_id = db.Column(Integer, nullable=False, default=0, comment='品牌ID（0 表示未知，唯一约束不约束空值）')
+  merchant_id = db.Column(Integer, nullable=False, default=0, comment='商家ID（0 表示未知）')
+  count = db.Column(Integer, nullable=False, default=0, comment='数量')
+  total_price = db.Column(Float, nullable=False, default=0, comment='总价合计')
+
+  def __repr__(self):
+    return f'<CollectionSummary {self.model_type} {self.scale} brand={self.brand_id} merchant={self.merchant_id}: {self.count}>'
+
+class RowVersionCounter(db.Model):
+  """行版本计数器（单行，记录已分配的最大行版本）"""
+  __tablename__ = 'row_version_counter'
+
+  id = db.Column(Integer, primary_key=True, comment='主键（固定为 1）')
+  value = db.Column(BigInteger, nullable=False, default=0, comment='已分配的最大行版本')
+  epoch = db.Column(String(32), nullable=False, comment='计数器纪元（数据库重建后变化，客户端需全量重新同步）')
+
+  def __repr__(self):
+    return f'<RowVersionCounter {self.epoch}: {self.value}>'
+
+class RowTombstone(db.Model):
+  """核心表删除记录（供增量同步返回已删除的行）"""
+  __tablename__ = 'row_tombstone'
+  __table_args__ = (
+    db.Index('ix_row_tombstone_type_version', 'model_type', 'row_version'),
+  )
+
+  id = db.Column(Integer, primary_key=True, comment='主键')
+  model_type = db.Column(String(20), nullable=False, comment='模型类型：locomotive/carriage/trainset/locomotive_head')
+  row_id = db.Column(Integer, nullable=False, comment='被删除行的ID')
+  row_version = db.Column(BigInteger, nullable=False, comment='删除时分配的行版本')
+  deleted_at = db.Column(DateTime, default=lambda: datetime.now(timezone.utc), comment='删除时间')
+
+  def __repr__(self):
+    return f'<RowTombstone {self.model_type}/{self.row_id} v{self.row_version}>'
+
 class ImportTemplate(db.Model):
   """自定义导入模板"""
   __tablename__ = 'import_template'
@@ -8,6 +8,7 @@ from .options import options_bp
 from .api import api_bp
 from .system import system_bp
 from .files import files_bp
+from .collection import collection_bp
 
 __all__ = [
   'main_bp',
@@ -18,7 +19,8 @@ __all__ = [
   'options_bp',
   'api_bp',
   'system_bp',
-  'files_bp'
+  'files_bp',
+  'collection_bp'
 ]
 
 
@@ -33,3 +35,4 @@ def register_blueprints(app):
   app.register_blueprint(api_bp)
   app.register_blueprint(system_bp)
   app.register_blueprint(files_bp)
+  app.register_blueprint(collection_bp)
@@ -8,9 +8,11 @@ from models import Locomotive, CarriageSet, Trainset, LocomotiveHead
 from models import Brand, Depot, Merchant, ChipInterface, ChipModel
 from models import LocomotiveSeries, CarriageSeries, TrainsetSeries, PowerType
 from models import CarriageItem, ImportTemplate
-from utils.helpers import parse_purchase_date, safe_int, safe_float, parse_boolean
+from utils.helpers import parse_purchase_date, safe_int, safe_float, parse_boolean, normalize_name, find_by_name
 from utils.price_calculator import calculate_price
 from utils.system_tables import get_table_display_info, SYSTEM_TABLES
+from utils.option_cache import invalidate_options
+from utils.validation import MODEL_CLASS_MAP, find_conflicts, find_existing
 from io import BytesIO
 from datetime import datetime
 import openpyxl
@@ -55,7 +57,7 @@ def auto_fill_trainset(model_id):
 
 # Excel 导入导出
 def find_id_by_name(model, name, custom_query=None):
-  """根据名称查找模型的ID（大小写不敏感）"""
+  """根据名称查找模型的ID（按规范化的 name_key 匹配，大小写和全半角不敏感）"""
   if not name:
     return None
 
@@ -63,8 +65,7 @@ def find_id_by_name(model, name, custom_query=None):
     result = custom_query(model.query)
     return result.id if result else None
 
-  # 大小写不敏感匹配
-  obj = model.query.filter(db.func.lower(model.name) == db.func.lower(name)).first()
+  obj = find_by_name(model, name)
   return obj.id if obj else None
 
 
@@ -173,6 +174,9 @@ def import_from_excel():
         errors.append(f"{sheet_name}: {str(e)}")
         logger.error(f"Error importing sheet {sheet_name}: {str(e)}", exc_info=True)
 
+    # 系统信息表可能被导入或在导入模型时自动创建，下拉选项需重新读取
+    invalidate_options()
+
     if errors:
       return jsonify({'success': False, 'error': '部分导入失败: ' + '; '.join(errors)}), 400
 
@@ -208,7 +212,7 @@ def check_import_conflicts(all_data):
       for row in all_data[sheet_name]:
         name = row.get('名称') or row.get(field) or row.get(display_name)
         if name:
-          existing = model.query.filter_by(name=name).first()
+          existing = find_by_name(model, name)
           if existing:
             conflicts.append({
               'type': display_name,
@@ -217,48 +221,23 @@ def check_import_conflicts(all_data):
               'message': f"{display_name} '{name}' 已存在"
             })
 
-  # 检查机车冲突：同一比例内机车号或编号唯一
-  if '机车' in all_data:
-    for row in all_data['机车']:
-      scale = row.get('比例')
-      locomotive_number = row.get('机车号')
-      decoder_number = row.get('编号')
-
-      if scale and locomotive_number:
-        existing = Locomotive.query.filter_by(scale=scale, locomotive_number=locomotive_number).first()
-        if existing:
-          conflicts.append({
-            'type': '机车模型',
-            'field': '机车号',
-            'value': f'{scale} 比例 - {locomotive_number}',
-            'message': f"机车号 '{locomotive_number}' 在比例 '{scale}' 中已存在"
-          })
-
-      if scale and decoder_number:
-        existing = Locomotive.query.filter_by(scale=scale, decoder_number=decoder_number).first()
-        if existing:
-          conflicts.append({
-            'type': '机车模型',
-            'field': '编号',
-            'value': f'{scale} 比例 - {decoder_number}',
-            'message': f"编号 '{decoder_number}' 在比例 '{scale}' 中已存在"
-          })
-
-  # 检查动车组冲突：同一比例内动车号唯一
-  if '动车组' in all_data:
-    for row in all_data['动车组']:
+  # 检查机车、动车组冲突：同一比例内机车号/动车号和编号唯一（每行一条查询）
+  model_sheets = [
+    ('机车', '机车模型', 'locomotive', {'locomotive_number': '机车号', 'decoder_number': '编号'}),
+    ('动车组', '动车组模型', 'trainset', {'trainset_number': '动车号', 'decoder_number': '编号'}),
+  ]
+  for sheet_name, display_name, table_name, columns in model_sheets:
+    for row in all_data.get(sheet_name, []):
       scale = row.get('比例')
-      trainset_number = row.get('动车号')
-
-      if scale and trainset_number:
-        existing = Trainset.query.filter_by(scale=scale, trainset_number=trainset_number).first()
-        if existing:
-          conflicts.append({
-            'type': '动车组模型',
-            'field': '动车号',
-            'value': f'{scale} 比例 - {trainset_number}',
-            'message': f"动车号 '{trainset_number}' 在比例 '{scale}' 中已存在"
-          })
+      data = {field: row.get(column) for field, column in columns.items()}
+      data['scale'] = scale
+      for _, display, _, value, _ in find_conflicts(table_name, data):
+        conflicts.append({
+          'type': display_name,
+          'field': display,
+          'value': f'{scale} 比例 - {value}',
+          'message': f"{display} '{value}' 在比例 '{scale}' 中已存在"
+        })
 
   return conflicts
 
@@ -281,17 +260,15 @@ def import_locomotive_data_with_mode(data, mode='skip'):
     series_id = find_id_by_name(LocomotiveSeries, row.get('系列'))
     power_type_id = find_id_by_name(PowerType, row.get('动力'))
     model_id = find_id_by_name(LocomotiveModel, row.get('车型'),
-      lambda q: q.filter_by(name=row.get('车型'), series_id=series_id, power_type_id=power_type_id).first())
+      lambda q: q.filter_by(name_key=normalize_name(row.get('车型')), series_id=series_id, power_type_id=power_type_id).first())
 
     locomotive_number = row.get('机车号') or None
     decoder_number = row.get('编号') or None
 
     # 检查冲突
-    existing = None
-    if scale and locomotive_number:
-      existing = Locomotive.query.filter_by(scale=scale, locomotive_number=locomotive_number).first()
-    if not existing and scale and decoder_number:
-      existing = Locomotive.query.filter_by(scale=scale, decoder_number=decoder_number).first()
+    existing = find_existing('locomotive', {
+      'scale': scale, 'locomotive_number': locomotive_number, 'decoder_number': decoder_number
+    })
 
     if existing:
       if mode == 'skip':
@@ -444,14 +421,14 @@ def import_trainset_data_with_mode(data, mode='skip'):
     series_id = find_id_by_name(TrainsetSeries, row.get('系列'))
     power_type_id = find_id_by_name(PowerType, row.get('动力'))
     model_id = find_id_by_name(TrainsetModel, row.get('车型'),
-      lambda q: q.filter_by(name=row.get('车型'), series_id=series_id, power_type_id=power_type_id).first())
+      lambda q: q.filter_by(name_key=normalize_name(row.get('车型')), series_id=series_id, power_type_id=power_type_id).first())
 
     trainset_number = row.get('动车号') or None
 
     # 检查冲突
-    existing = None
-    if scale and trainset_number:
-      existing = Trainset.query.filter_by(scale=scale, trainset_number=trainset_number).first()
+    existing = find_existing('trainset', {
+      'scale': scale, 'trainset_number': trainset_number, 'decoder_number': row.get('编号')
+    })
 
     if existing:
       if mode == 'skip':
@@ -553,7 +530,7 @@ def import_brand_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('品牌')
     if not name:
       continue
-    existing = Brand.query.filter_by(name=name).first()
+    existing = find_by_name(Brand, name)
     if existing:
       if mode == 'skip':
         continue
@@ -578,7 +555,7 @@ def import_depot_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('机务段') or row.get('车辆段')
     if not name:
       continue
-    if Depot.query.filter_by(name=name).first():
+    if find_by_name(Depot, name):
       if mode == 'skip':
         continue
       # overwrite 模式下无需更新，因为只有 name 字段
@@ -597,7 +574,7 @@ def import_merchant_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('商家')
     if not name:
       continue
-    if Merchant.query.filter_by(name=name).first():
+    if find_by_name(Merchant, name):
       if mode == 'skip':
         continue
       continue
@@ -615,7 +592,7 @@ def import_power_type_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('动力类型')
     if not name:
       continue
-    if PowerType.query.filter_by(name=name).first():
+    if find_by_name(PowerType, name):
       if mode == 'skip':
         continue
       continue
@@ -633,7 +610,7 @@ def import_chip_interface_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('芯片接口')
     if not name:
       continue
-    if ChipInterface.query.filter_by(name=name).first():
+    if find_by_name(ChipInterface, name):
       if mode == 'skip':
         continue
       continue
@@ -651,7 +628,7 @@ def import_chip_model_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('芯片型号')
     if not name:
       continue
-    if ChipModel.query.filter_by(name=name).first():
+    if find_by_name(ChipModel, name):
       if mode == 'skip':
         continue
       continue
@@ -669,7 +646,7 @@ def import_locomotive_series_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('系列')
     if not name:
       continue
-    if LocomotiveSeries.query.filter_by(name=name).first():
+    if find_by_name(LocomotiveSeries, name):
       if mode == 'skip':
         continue
       continue
@@ -687,7 +664,7 @@ def import_carriage_series_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('系列')
     if not name:
       continue
-    if CarriageSeries.query.filter_by(name=name).first():
+    if find_by_name(CarriageSeries, name):
       if mode == 'skip':
         continue
       continue
@@ -705,7 +682,7 @@ def import_trainset_series_data_with_mode(data, mode='skip'):
     name = row.get('名称') or row.get('系列')
     if not name:
       continue
-    if TrainsetSeries.query.filter_by(name=name).first():
+    if find_by_name(TrainsetSeries, name):
       if mode == 'skip':
         continue
       continue
@@ -1439,27 +1416,6 @@ def parse_custom_import_file():
     return jsonify({'success': False, 'error': '服务器内部错误'}), 500
 
 
-# 模型类映射
-MODEL_CLASS_MAP = {
-  'brand': Brand,
-  'depot': Depot,
-  'merchant': Merchant,
-  'power_type': PowerType,
-  'chip_interface': ChipInterface,
-  'chip_model': ChipModel,
-  'locomotive_series': LocomotiveSeries,
-  'carriage_series': CarriageSeries,
-  'trainset_series': TrainsetSeries,
-  'locomotive': Locomotive,
-  'carriage': CarriageSet,
-  'trainset': Trainset,
-  'locomotive_head': LocomotiveHead,
-  'carriage_model': CarriageModel,
-  'locomotive_model': LocomotiveModel,
-  'trainset_model': TrainsetModel
-}
-
-
 @api_bp.route('/api/custom-import/preview', methods=['POST'])
 def preview_custom_import():
   """
@@ -1619,41 +1575,24 @@ def preview_custom_import():
             value = row.get(source_col)
             mapped_row[target_field] = value
 
-          # 检查唯一约束
-          for field in table_config.get('fields', []):
-            field_name = field.get('name')
-
-            # 检查 unique 约束
-            if field.get('unique'):
-              value = mapped_row.get(field_name)
-              if value:
-                existing = model_class.query.filter_by(**{field_name: value}).first()
-                if existing:
-                  conflicts.append({
-                    'type': '唯一名称冲突',
-                    'field': field_name,
-                    'value': str(value),
-                    'message': f"{table_config.get('display_name')} '{value}' 已存在"
-                  })
-                  has_conflicts = True
-
-            # 检查 unique_in_scale 约束
-            if field.get('unique_in_scale'):
-              value = mapped_row.get(field_name)
+          # 检查唯一约束（一行的全部规则合并为一条查询）
+          for field_name, display, in_scale, value, _ in find_conflicts(table_name, mapped_row):
+            if in_scale:
               scale = mapped_row.get('scale')
-              if value and scale:
-                existing = model_class.query.filter_by(
-                  scale=scale,
-                  **{field_name: value}
-                ).first()
-                if existing:
-                  conflicts.append({
-                    'type': '比例内唯一冲突',
-                    'field': field_name,
-                    'value': f"{scale} 比例 - {value}",
-                    'message': f"{field.get('display', field_name)} '{value}' 在比例 '{scale}' 中已存在"
-                  })
-                  has_conflicts = True
+              conflicts.append({
+                'type': '比例内唯一冲突',
+                'field': field_name,
+                'value': f"{scale} 比例 - {value}",
+                'message': f"{display} '{value}' 在比例 '{scale}' 中已存在"
+              })
+            else:
+              conflicts.append({
+                'type': '唯一名称冲突',
+                'field': field_name,
+                'value': value,
+                'message': f"{table_config.get('display_name')} '{value}' 已存在"
+              })
+            has_conflicts = True
 
       previews.append({
         'table_name': table_name,
@@ -1697,7 +1636,7 @@ FK_REFERENCE_MAP = {
 
 def resolve_foreign_key(ref_table, value):
   """
-  解析外键引用，将名称转换为 ID（大小写不敏感）
+  解析外键引用，将名称转换为 ID（按 name_key 匹配，大小写和全半角不敏感）
 
   Args:
     ref_table: 参考表名
@@ -1713,16 +1652,13 @@ def resolve_foreign_key(ref_table, value):
   if not model_class:
     return None
 
-  # 大小写不敏感匹配
-  obj = model_class.query.filter(
-    db.func.lower(model_class.name) == db.func.lower(value)
-  ).first()
+  obj = find_by_name(model_class, value)
   return obj.id if obj else None
 
 
 def check_unique_conflict(model_class, field_name, value, scale=None):
   """
-  检查唯一约束冲突（大小写不敏感）
+  检查唯一约束冲突（大小写不敏感，系统信息表名称按 name_key 匹配）
 
   Args:
     model_class: 模型类
@@ -1736,18 +1672,15 @@ def check_unique_conflict(model_class, field_name, value, scale=None):
   if not value:
     return None
 
-  # 获取字段属性
-  field_attr = getattr(model_class, field_name)
+  if field_name == 'name' and hasattr(model_class, 'name_key'):
+    condition = model_class.name_key == normalize_name(value)
+  else:
+    field_attr = getattr(model_class, field_name)
+    condition = db.func.lower(field_attr) == db.func.lower(value)
 
   if scale:
-    return model_class.query.filter(
-      model_class.scale == scale,
-      db.func.lower(field_attr) == db.func.lower(value)
-    ).first()
-  else:
-    return model_class.query.filter(
-      db.func.lower(field_attr) == db.func.lower(value)
-    ).first()
+    return model_class.query.filter(model_class.scale == scale, condition).first()
+  return model_class.query.filter(condition).first()
 
 
 def execute_system_table_import(table_name, table_config, rows, source_to_target, conflict_mode):
@@ -1788,7 +1721,7 @@ def execute_system_table_import(table_name, table_config, rows, source_to_target
       mapped_row['abbreviation'] = generate_brand_abbreviation(name)
 
     # 检查是否存在
-    existing = model_class.query.filter_by(name=name).first()
+    existing = find_by_name(model_class, name)
 
     if existing:
       if conflict_mode == 'skip':
@@ -1854,14 +1787,9 @@ def execute_locomotive_import(rows, source_to_target, field_configs, conflict_mo
       continue
 
     # 检查冲突（locomotive_number 或 decoder_number 在比例内唯一）
-    existing = None
     locomotive_number = mapped_data.get('locomotive_number')
     decoder_number = mapped_data.get('decoder_number')
-
-    if scale and locomotive_number:
-      existing = Locomotive.query.filter_by(scale=scale, locomotive_number=locomotive_number).first()
-    if not existing and scale and decoder_number:
-      existing = Locomotive.query.filter_by(scale=scale, decoder_number=decoder_number).first()
+    existing = find_existing('locomotive', mapped_data)
 
     if existing:
       if conflict_mode == 'skip':
@@ -1951,12 +1879,9 @@ def execute_trainset_import(rows, source_to_target, field_configs, conflict_mode
       logger.warning(f"跳过动车组行：缺少必填字段 brand_id={brand_id}, scale={scale}")
       continue
 
-    # 检查冲突（trainset_number 在比例内唯一）
-    existing = None
+    # 检查冲突（trainset_number 或 decoder_number 在比例内唯一）
     trainset_number = mapped_data.get('trainset_number')
-
-    if scale and trainset_number:
-      existing = Trainset.query.filter_by(scale=scale, trainset_number=trainset_number).first()
+    existing = find_existing('trainset', mapped_data)
 
     if existing:
       if conflict_mode == 'skip':
@@ -2519,7 +2444,7 @@ def execute_model_series_import(table_name, rows, source_to_target, conflict_mod
     if not name:
       continue
 
-    existing = model_class.query.filter_by(name=name).first()
+    existing = find_by_name(model_class, name)
     if existing:
       if conflict_mode == 'skip':
         continue
@@ -2746,6 +2671,9 @@ def execute_custom_import():
         errors.append(f"{table_config.get('display_name', table_name)}: {str(e)}")
         logger.error(f"Error importing table {table_name}: {str(e)}", exc_info=True)
 
+    # 系统信息表可能被导入或在导入模型时自动创建，下拉选项需重新读取
+    invalidate_options()
+
     if errors:
       return jsonify({
         'success': False,
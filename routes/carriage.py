@@ -1,32 +1,18 @@
 """
 车厢模型路由 Blueprint
 """
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from models import db, CarriageSet, CarriageItem, CarriageModel, CarriageSeries, Brand, Depot, Merchant
+from flask import Blueprint, stream_template, request, redirect, url_for, jsonify
+from models import db, CarriageSet, CarriageItem, Brand
 from utils.helpers import parse_purchase_date, safe_int, safe_float, api_success, api_error
 from utils.validators import validate_car_number
 from utils.file_sync import rename_model_folder, update_file_records_in_db
+from utils.query_options import iter_list_batches
 import logging
 
 logger = logging.getLogger(__name__)
 carriage_bp = Blueprint('carriage', __name__, url_prefix='')
 
 
-def get_carriage_form_data():
-  """
-  获取车厢表单所需的下拉框数据
-
-  @returns dict: 包含所有下拉选项的字典
-  """
-  return {
-    'carriage_models': CarriageModel.query.all(),
-    'carriage_series': CarriageSeries.query.all(),
-    'brands': Brand.query.all(),
-    'depots': Depot.query.all(),
-    'merchants': Merchant.query.all()
-  }
-
-
 def validate_carriage_items(form_data, is_json=False):
   """
   验证车厢项数据
@@ -144,8 +130,8 @@ def api_edit_carriage(id):
       update_file_records_in_db('carriage', id, old_brand_name, old_item_number,
                                 new_brand_name, new_item_number)
 
-    # 删除旧的车厢项并添加新的
-    CarriageItem.query.filter_by(set_id=id).delete()
+    # 删除旧的车厢项并添加新的（逐行删除，以便维护套装的行版本）
+    carriage_set.items.clear()
     items = create_carriage_items(carriage_set.id, data, is_json=True)
     for item in items:
       db.session.add(item)
@@ -195,10 +181,7 @@ def carriage():
   if request.method == 'POST':
     errors = validate_carriage_items(request.form)
     if errors:
-      form_data = get_carriage_form_data()
-      form_data['carriage_sets'] = CarriageSet.query.all()
-      form_data['errors'] = [e['message'] for e in errors]
-      return render_template('carriage.html', **form_data)
+      return stream_template('carriage.html', carriage_set_batches=iter_list_batches(CarriageSet), errors=[e['message'] for e in errors])
 
     try:
       carriage_set = create_carriage_set_from_form(request.form)
@@ -215,15 +198,9 @@ def carriage():
     except Exception as e:
       db.session.rollback()
       logger.error(f"Error adding carriage: {e}")
-      form_data = get_carriage_form_data()
-      form_data['carriage_sets'] = CarriageSet.query.all()
-      form_data['errors'] = [str(e)]
-      return render_template('carriage.html', **form_data)
-
-  form_data = get_carriage_form_data()
-  form_data['carriage_sets'] = CarriageSet.query.all()
-  form_data['errors'] = []
-  return render_template('carriage.html', **form_data)
+      return stream_template('carriage.html', carriage_set_batches=iter_list_batches(CarriageSet), errors=[str(e)])
+
+  return stream_template('carriage.html', carriage_set_batches=iter_list_batches(CarriageSet), errors=[])
 
 
 @carriage_bp.route('/carriage/delete/<int:id>', methods=['POST'])
@@ -0,0 +1,176 @@
+"""
+藏品数据 API Blueprint
+提供四类核心模型的通用数据接口（分页列表、合并流水、增量同步、批量校验、机车编号分配等）
+"""
+from flask import Blueprint, request, jsonify
+from utils.aggregation import CORE_MODELS
+from utils.listing import fetch_list_page, parse_filters, parse_limit
+from utils.listing import fetch_collection_feed, parse_feed_filters, parse_feed_types
+from utils.row_versions import current_version, fetch_changes, parse_since
+from utils.validation import validate_batch, MAX_BATCH_SIZE
+from utils.decoder_numbers import occupancy, free_numbers, DEFAULT_FREE_COUNT, MAX_FREE_COUNT, MAX_DECODER_NUMBER
+from utils.helpers import safe_int, api_success, api_error
+import base64
+
+collection_bp = Blueprint('collection', __name__)
+
+
+@collection_bp.route('/api/<model_type>/list')
+def list_models(model_type):
+  """
+  分页列表（数据库端排序、筛选和游标分页）
+
+  @param model_type: locomotive/carriage/trainset/locomotive_head
+  @param sort: 查询参数，排序列，'-' 前缀表示降序
+  @param filter[字段]: 按品牌、商家、比例等筛选，多个值用逗号分隔
+  @param after: 上一页返回的 next_cursor
+  @param limit: 每页行数
+  @returns JSON: {items, next_cursor, has_more}
+  """
+  if model_type not in CORE_MODELS:
+    return jsonify(api_error('未知模型类型')), 404
+
+  try:
+    model_class = CORE_MODELS[model_type][0]
+    page = fetch_list_page(
+      model_type,
+      sort=request.args.get('sort'),
+      filters=parse_filters(model_class, request.args),
+      after=request.args.get('after'),
+      limit=parse_limit(request.args.get('limit'))
+    )
+  except ValueError as e:
+    return jsonify(api_error(str(e))), 400
+
+  return jsonify(page)
+
+
+@collection_bp.route('/api/collection')
+def collection_feed():
+  """
+  四类模型合并的藏品流水（单条 UNION ALL 查询，游标分页）
+
+  @param sort: 查询参数，purchase_date 或 total_price，'-' 前缀表示降序，默认 -purchase_date
+  @param type: 查询参数，包含的模型类型，多个用逗号分隔，默认全部
+  @param filter[字段]: 按品牌、商家、比例等筛选，字段需对所有包含的类型适用
+  @param after: 上一页返回的 next_cursor
+  @param limit: 每页行数
+  @returns JSON: {items, next_cursor, has_more}
+  """
+  try:
+    model_types = parse_feed_types(request.args.get('type'))
+    page = fetch_collection_feed(
+      sort=request.args.get('sort'),
+      model_types=model_types,
+      filters=parse_feed_filters(model_types, request.args),
+      after=request.args.get('after'),
+      limit=parse_limit(request.args.get('limit'))
+    )
+  except ValueError as e:
+    return jsonify(api_error(str(e))), 400
+
+  return jsonify(page)
+
+
+@collection_bp.route('/api/<model_type>/changes')
+def list_changes(model_type):
+  """
+  增量同步：返回指定版本之后新增、修改和删除的行
+
+  @param model_type: locomotive/carriage/trainset/locomotive_head
+  @param since: 查询参数，上次同步返回的 version，为空或 0 表示全量
+  @param epoch: 查询参数，上次同步返回的 epoch；与当前不一致时需全量重新同步
+  @param limit: 每次最多返回的变更条数
+  @returns JSON: {epoch, version, changed, deleted, has_more, reset}
+  """
+  if model_type not in CORE_MODELS:
+    return jsonify(api_error('未知模型类型')), 404
+
+  try:
+    since = parse_since(request.args.get('since'))
+    limit = parse_limit(request.args.get('limit'))
+  except ValueError as e:
+    return jsonify(api_error(str(e))), 400
+
+  version, epoch = current_version()
+  client_epoch = request.args.get('epoch')
+  # 数据库重建后计数器重新开始，客户端的同步位置失效
+  if (since and client_epoch != epoch) or since > version:
+    return jsonify({
+      'epoch': epoch, 'version': 0, 'changed': [], 'deleted': [],
+      'has_more': True, 'reset': True
+    })
+
+  changes = fetch_changes(model_type, since, limit)
+  changes.update(epoch=epoch, reset=False)
+  return jsonify(changes)
+
+
+@collection_bp.route('/api/<model_type>/validate-batch', methods=['POST'])
+def validate_models_batch(model_type):
+  """
+  批量校验候选记录（格式、批内重复、与已有数据冲突），不写入数据库
+
+  @param model_type: locomotive/carriage/trainset/locomotive_head
+  @param body: JSON 数组，每个元素为字段字典（如 scale、locomotive_number、decoder_number），
+               带 id 的元素视为编辑已有记录
+  @returns JSON: {success, valid, errors: [{index, field, message}]}，index 为元素在数组中的序号
+  """
+  if model_type not in CORE_MODELS:
+    return jsonify(api_error('未知模型类型')), 404
+
+  records = request.get_json(silent=True)
+  if not isinstance(records, list):
+    return jsonify(api_error('请求体必须是 JSON 数组')), 400
+  if len(records) > MAX_BATCH_SIZE:
+    return jsonify(api_error(f'单次最多校验 {MAX_BATCH_SIZE} 条')), 400
+
+  errors = [
+    {'index': index, 'field': None, 'message': '元素必须是对象'}
+    for index, record in enumerate(records) if not isinstance(record, dict)
+  ]
+  if errors:
+    return jsonify(api_error('验证失败', errors=errors)), 400
+
+  errors = validate_batch(model_type, records)
+  return jsonify(api_success('校验完成', {'valid': not errors, 'errors': errors}))
+
+
+@collection_bp.route('/api/decoder-numbers/free')
+def free_decoder_numbers():
+  """
+  查找比例内未被占用的机车编号（内存占用位图）
+
+  @param scale: 查询参数，比例（HO/N），必填
+  @param count: 查询参数，返回个数
+  @param start: 查询参数，起始编号（包含），默认 1
+  @returns JSON: {scale, numbers}，numbers 为升序的空闲编号
+  """
+  scale = request.args.get('scale')
+  if not scale:
+    return jsonify(api_error('缺少比例参数', field='scale')), 400
+
+  count = safe_int(request.args.get('count'), DEFAULT_FREE_COUNT)
+  if not 1 <= count <= MAX_FREE_COUNT:
+    return jsonify(api_error(f'count 必须是 1-{MAX_FREE_COUNT} 之间的整数', field='count')), 400
+  start = safe_int(request.args.get('start'), 1)
+  if not 1 <= start <= MAX_DECODER_NUMBER:
+    return jsonify(api_error(f'start 必须是 1-{MAX_DECODER_NUMBER} 之间的整数', field='start')), 400
+
+  return jsonify({'scale': scale, 'numbers': free_numbers(scale, count, start)})
+
+
+@collection_bp.route('/api/decoder-numbers/occupancy')
+def decoder_number_occupancy():
+  """
+  机车编号占用图
+
+  @param scale: 查询参数，比例；为空时返回所有已有编号的比例
+  @returns JSON: {max, scales: {比例: {used, bitmap}}}；bitmap 为 base64 编码的位图，
+           第 n 个字节的第 k 位（低位起）表示编号 8n+k 已被占用
+  """
+  scales = {
+    scale: {'used': used, 'bitmap': base64.b64encode(bitmap).decode('ascii')}
+    for scale, (bitmap, used) in occupancy(request.args.get('scale')).items()
+  }
+  return jsonify({'max': MAX_DECODER_NUMBER, 'scales': scales})
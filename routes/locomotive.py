@@ -1,36 +1,19 @@
 """
 机车模型路由 Blueprint
 """
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from models import db, Locomotive, LocomotiveModel, LocomotiveSeries, PowerType, Brand, Depot, ChipInterface, ChipModel, Merchant
-from utils.helpers import parse_purchase_date, safe_int, validate_unique, api_success, api_error
-from utils.validators import validate_locomotive_number, validate_decoder_number
+from flask import Blueprint, stream_template, request, redirect, url_for, jsonify
+from models import db, Locomotive, Brand
+from utils.helpers import parse_purchase_date, safe_int, api_success, api_error
+from utils.validation import validate_record
 from utils.price_calculator import calculate_price
 from utils.file_sync import rename_model_folder, update_file_records_in_db
+from utils.query_options import iter_list_batches
 import logging
 
 logger = logging.getLogger(__name__)
 locomotive_bp = Blueprint('locomotive', __name__, url_prefix='')
 
 
-def get_locomotive_form_data():
-  """
-  获取机车表单所需的下拉框数据
-
-  @returns dict: 包含所有下拉选项的字典，键为模板变量名，值为查询结果列表
-  """
-  return {
-    'locomotive_models': LocomotiveModel.query.all(),
-    'locomotive_series': LocomotiveSeries.query.all(),
-    'power_types': PowerType.query.all(),
-    'brands': Brand.query.all(),
-    'depots': Depot.query.all(),
-    'chip_interfaces': ChipInterface.query.all(),
-    'chip_models': ChipModel.query.all(),
-    'merchants': Merchant.query.all()
-  }
-
-
 def validate_locomotive_data(locomotive_number, decoder_number, scale, exclude_id=None):
   """
   验证机车数据
@@ -41,21 +24,11 @@ def validate_locomotive_data(locomotive_number, decoder_number, scale, exclude_i
   @param exclude_id: 排除的机车ID（用于编辑时排除自身）
   @returns list: 错误信息列表，每个元素包含 field 和 message
   """
-  errors = []
-
-  # 格式验证
-  if locomotive_number and not validate_locomotive_number(locomotive_number):
-    errors.append({'field': 'locomotive_number', 'message': '机车号格式错误：应为4-12位数字，允许前导0'})
-  if decoder_number and not validate_decoder_number(decoder_number):
-    errors.append({'field': 'decoder_number', 'message': '编号格式错误：应为1-4位数字，无前导0'})
-
-  # 唯一性验证
-  if locomotive_number and not validate_unique(Locomotive, 'locomotive_number', locomotive_number, scale, exclude_id):
-    errors.append({'field': 'locomotive_number', 'message': f'机车号 {locomotive_number} 在 {scale} 比例下已存在'})
-  if decoder_number and not validate_unique(Locomotive, 'decoder_number', decoder_number, scale, exclude_id):
-    errors.append({'field': 'decoder_number', 'message': f'编号 {decoder_number} 在 {scale} 比例下已存在'})
-
-  return errors
+  return validate_record('locomotive', {
+    'locomotive_number': locomotive_number,
+    'decoder_number': decoder_number,
+    'scale': scale
+  }, exclude_id)
 
 
 def create_locomotive_from_form(form_data, is_json=False):
@@ -199,10 +172,7 @@ def locomotive():
 
     errors = validate_locomotive_data(locomotive_number, decoder_number, scale)
     if errors:
-      form_data = get_locomotive_form_data()
-      form_data['locomotives'] = Locomotive.query.all()
-      form_data['errors'] = [e['message'] for e in errors]
-      return render_template('locomotive.html', **form_data)
+      return stream_template('locomotive.html', locomotive_batches=iter_list_batches(Locomotive), errors=[e['message'] for e in errors])
 
     try:
       locomotive = create_locomotive_from_form(request.form)
@@ -213,15 +183,9 @@ def locomotive():
     except Exception as e:
       db.session.rollback()
       logger.error(f"Error adding locomotive: {e}")
-      form_data = get_locomotive_form_data()
-      form_data['locomotives'] = Locomotive.query.all()
-      form_data['errors'] = [str(e)]
-      return render_template('locomotive.html', **form_data)
-
-  form_data = get_locomotive_form_data()
-  form_data['locomotives'] = Locomotive.query.all()
-  form_data['errors'] = []
-  return render_template('locomotive.html', **form_data)
+      return stream_template('locomotive.html', locomotive_batches=iter_list_batches(Locomotive), errors=[str(e)])
+
+  return stream_template('locomotive.html', locomotive_batches=iter_list_batches(Locomotive), errors=[])
 
 
 @locomotive_bp.route('/locomotive/delete/<int:id>', methods=['POST'])
@@ -1,30 +1,18 @@
 """
 先头车模型路由 Blueprint
 """
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from models import db, LocomotiveHead, TrainsetModel, Brand, Merchant
+from flask import Blueprint, stream_template, request, redirect, url_for, jsonify
+from models import db, LocomotiveHead, Brand
 from utils.helpers import parse_purchase_date, safe_int, parse_boolean, api_success, api_error
 from utils.price_calculator import calculate_price
 from utils.file_sync import rename_model_folder, update_file_records_in_db
+from utils.query_options import iter_list_batches
 import logging
 
 logger = logging.getLogger(__name__)
 locomotive_head_bp = Blueprint('locomotive_head', __name__, url_prefix='')
 
 
-def get_locomotive_head_form_data():
-  """
-  获取先头车表单所需的下拉框数据
-
-  @returns dict: 包含所有下拉选项的字典
-  """
-  return {
-    'trainset_models': TrainsetModel.query.all(),
-    'brands': Brand.query.all(),
-    'merchants': Merchant.query.all()
-  }
-
-
 def create_locomotive_head_from_form(form_data, is_json=False):
   """
   从表单数据创建先头车对象
@@ -141,13 +129,9 @@ def locomotive_head():
     except Exception as e:
       db.session.rollback()
       logger.error(f"Error adding locomotive head: {e}")
-      form_data = get_locomotive_head_form_data()
-      form_data['locomotive_heads'] = LocomotiveHead.query.all()
-      return render_template('locomotive_head.html', **form_data)
+      return stream_template('locomotive_head.html', locomotive_head_batches=iter_list_batches(LocomotiveHead))
 
-  form_data = get_locomotive_head_form_data()
-  form_data['locomotive_heads'] = LocomotiveHead.query.all()
-  return render_template('locomotive_head.html', **form_data)
+  return stream_template('locomotive_head.html', locomotive_head_batches=iter_list_batches(LocomotiveHead))
 
 
 @locomotive_head_bp.route('/locomotive-head/delete/<int:id>', methods=['POST'])
@@ -2,32 +2,45 @@
 主路由 Blueprint
 包含首页和统计 API
 """
-from flask import Blueprint, render_template, jsonify
-from models import Locomotive, CarriageSet, Trainset, LocomotiveHead
+from flask import Blueprint, render_template, request, jsonify
+from datetime import datetime
+from utils.collection_summary import summary_statistics
+from utils.aggregation import CORE_MODELS, TIMESERIES_GRANULARITIES, PIVOT_DIMENSIONS
+from utils.aggregation import DEFAULT_HISTOGRAM_BINS, MAX_HISTOGRAM_BINS
+from utils.aggregation import compute_timeseries, compute_pivot, compute_carriage_item_statistics
+from utils.aggregation import compute_price_distribution
+from utils.cache import cached_json_response
+from utils.helpers import api_error, safe_int
 
 main_bp = Blueprint('main', __name__)
 
 
-def aggregate_stats(items, get_key_func, get_price_func):
+def parse_model_types(value):
   """
-  聚合统计函数
+  解析逗号分隔的模型类型参数
 
-  Args:
-    items: 对象列表
-    get_key_func: 获取分组键的函数
-    get_price_func: 获取价格的函数
+  @param value: 如 'locomotive,trainset'，为空表示全部
+  @returns list or None: 模型类型列表；包含未知类型时返回 None
+  """
+  if not value:
+    return list(CORE_MODELS)
+  model_types = [t.strip() for t in value.split(',') if t.strip()]
+  if not model_types or any(t not in CORE_MODELS for t in model_types):
+    return None
+  return model_types
+
+
+def parse_date_arg(value):
+  """
+  解析 YYYY-MM-DD 格式的日期参数
 
-  Returns:
-    dict: {key: {count: int, total: float}}
+  @param value: 日期字符串，为空返回 None
+  @returns date or None
+  @raises ValueError: 格式错误
   """
-  result = {}
-  for item in items:
-    key = get_key_func(item)
-    if key not in result:
-      result[key] = {'count': 0, 'total': 0}
-    result[key]['count'] += 1
-    result[key]['total'] += get_price_func(item) or 0
-  return result
+  if not value:
+    return None
+  return datetime.strptime(value, '%Y-%m-%d').date()
 
 
 @main_bp.route('/')
@@ -38,84 +51,91 @@ def index():
 
 @main_bp.route('/api/statistics')
 def statistics():
-  """获取汇总统计数据"""
-  locomotives = Locomotive.query.all()
-  carriage_sets = CarriageSet.query.all()
-  trainsets = Trainset.query.all()
-  locomotive_heads = LocomotiveHead.query.all()
-
-  # 各类型基础统计
-  type_stats = {
-    'locomotive': {
-      'name': '机车模型',
-      'count': len(locomotives),
-      'total': sum(l.total_price or 0 for l in locomotives)
-    },
-    'carriage': {
-      'name': '车厢模型',
-      'count': len(carriage_sets),
-      'total': sum(c.total_price or 0 for c in carriage_sets)
-    },
-    'trainset': {
-      'name': '动车组模型',
-      'count': len(trainsets),
-      'total': sum(t.total_price or 0 for t in trainsets)
-    },
-    'locomotive_head': {
-      'name': '先头车模型',
-      'count': len(locomotive_heads),
-      'total': sum(l.total_price or 0 for l in locomotive_heads)
+  """获取汇总统计数据（读取汇总表，按数据版本缓存并支持 ETag 条件请求）"""
+  return cached_json_response(('statistics',), summary_statistics)
+
+
+@main_bp.route('/api/statistics/timeseries')
+def statistics_timeseries():
+  """按购买日期分期统计数量和花费（month/quarter/year）"""
+  granularity = request.args.get('granularity', 'month')
+  if granularity not in TIMESERIES_GRANULARITIES:
+    return jsonify(api_error('granularity 必须是 month、quarter 或 year')), 400
+
+  model_types = parse_model_types(request.args.get('type'))
+  if model_types is None:
+    return jsonify(api_error('未知模型类型')), 400
+
+  try:
+    date_from = parse_date_arg(request.args.get('from'))
+    date_to = parse_date_arg(request.args.get('to'))
+  except ValueError:
+    return jsonify(api_error('日期格式错误，应为 YYYY-MM-DD')), 400
+
+  def build():
+    return {
+      'granularity': granularity,
+      'from': date_from.isoformat() if date_from else None,
+      'to': date_to.isoformat() if date_to else None,
+      'types': model_types,
+      'series': compute_timeseries(granularity, date_from, date_to, model_types)
     }
-  }
-
-  # 按比例分组统计
-  scale_stats = {}
-  for items, get_price in [
-    (locomotives, lambda l: l.total_price),
-    (carriage_sets, lambda c: c.total_price),
-    (trainsets, lambda t: t.total_price),
-    (locomotive_heads, lambda l: l.total_price)
-  ]:
-    for item in items:
-      scale = item.scale
-      if scale not in scale_stats:
-        scale_stats[scale] = {'count': 0, 'total': 0}
-      scale_stats[scale]['count'] += 1
-      scale_stats[scale]['total'] += get_price(item) or 0
-
-  # 按品牌分组统计
-  brand_stats = {}
-  for items, get_brand, get_price in [
-    (locomotives, lambda l: l.brand.name if l.brand else '未知', lambda l: l.total_price),
-    (carriage_sets, lambda c: c.brand.name if c.brand else '未知', lambda c: c.total_price),
-    (trainsets, lambda t: t.brand.name if t.brand else '未知', lambda t: t.total_price),
-    (locomotive_heads, lambda h: h.brand.name if h.brand else '未知', lambda h: h.total_price)
-  ]:
-    for item in items:
-      brand = get_brand(item)
-      if brand not in brand_stats:
-        brand_stats[brand] = {'count': 0, 'total': 0}
-      brand_stats[brand]['count'] += 1
-      brand_stats[brand]['total'] += get_price(item) or 0
-
-  # 按商家分组统计
-  merchant_stats = {}
-  for items, get_merchant, get_price in [
-    (locomotives, lambda l: l.merchant.name if l.merchant else '未知', lambda l: l.total_price),
-    (carriage_sets, lambda c: c.merchant.name if c.merchant else '未知', lambda c: c.total_price),
-    (trainsets, lambda t: t.merchant.name if t.merchant else '未知', lambda t: t.total_price),
-    (locomotive_heads, lambda h: h.merchant.name if h.merchant else '未知', lambda h: h.total_price)
-  ]:
-    for item in items:
-      merchant = get_merchant(item)
-      if merchant not in merchant_stats:
-        merchant_stats[merchant] = {'count': 0, 'total': 0}
-      merchant_stats[merchant]['count'] += 1
-      merchant_stats[merchant]['total'] += get_price(item) or 0
-
-  return jsonify({
-    'type_stats': type_stats,
-    'scale_stats': scale_stats,
-    'brand_stats': brand_stats,
-    'merchant_stats': merchant_stats
-  })
+
+  cache_key = ('timeseries', granularity, date_from, date_to, tuple(model_types))
+  return cached_json_response(cache_key, build)
+
+
+@main_bp.route('/api/statistics/pivot')
+def statistics_pivot():
+  """任意两个维度的交叉统计（brand/merchant/scale/depot/series/power_type/chip_model）"""
+  row_dimension = request.args.get('rows', 'brand')
+  col_dimension = request.args.get('cols', 'scale')
+  if row_dimension not in PIVOT_DIMENSIONS or col_dimension not in PIVOT_DIMENSIONS:
+    return jsonify(api_error(f"维度必须是 {', '.join(PIVOT_DIMENSIONS)} 之一")), 400
+
+  measure = request.args.get('measure', 'sum')
+  if measure not in ('sum', 'count'):
+    return jsonify(api_error('measure 必须是 sum 或 count')), 400
+
+  model_types = parse_model_types(request.args.get('types'))
+  if model_types is None:
+    return jsonify(api_error('未知模型类型')), 400
+
+  def build():
+    result = compute_pivot(row_dimension, col_dimension, measure, model_types)
+    result.update({
+      'row_dimension': row_dimension,
+      'col_dimension': col_dimension,
+      'measure': measure,
+      'types': model_types
+    })
+    return result
+
+  cache_key = ('pivot', row_dimension, col_dimension, measure, tuple(model_types))
+  return cached_json_response(cache_key, build)
+
+
+@main_bp.route('/api/statistics/carriage-items')
+def statistics_carriage_items():
+  """按单节车厢统计：车型类型（客车/货车/工程车）、车厢系列、灯光"""
+  return cached_json_response(('carriage_items',), compute_carriage_item_statistics)
+
+
+@main_bp.route('/api/statistics/distribution')
+def statistics_distribution():
+  """总价分布直方图，以及按类型和比例的 p50/p90/p99 与最小/最大值"""
+  model_types = parse_model_types(request.args.get('type'))
+  if model_types is None:
+    return jsonify(api_error('未知模型类型')), 400
+
+  bins_arg = request.args.get('bins')
+  bins = safe_int(bins_arg) if bins_arg else DEFAULT_HISTOGRAM_BINS
+  if bins is None or not 1 <= bins <= MAX_HISTOGRAM_BINS:
+    return jsonify(api_error(f'bins 必须是 1-{MAX_HISTOGRAM_BINS} 之间的整数')), 400
+
+  def build():
+    result = compute_price_distribution(model_types, bins)
+    result.update({'types': model_types, 'bins': bins})
+    return result
+
+  return cached_json_response(('distribution', tuple(model_types), bins), build)
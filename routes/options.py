@@ -2,7 +2,7 @@
 信息维护路由 Blueprint
 使用工厂函数简化 CRUD 操作
 """
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, current_app
 from models import db
 from models import (
   PowerType, Brand, Merchant, Depot, ChipInterface, ChipModel,
@@ -10,6 +10,11 @@ from models import (
   TrainsetSeries, TrainsetModel
 )
 from utils.helpers import safe_int, api_success, api_error, generate_brand_abbreviation
+from utils.option_cache import invalidate_options, option_bundle
+from utils.option_listing import fetch_option_page, usage_counts, is_in_use
+from utils.listing import parse_limit
+from utils.autocomplete import AUTOCOMPLETE_MODELS, DEFAULT_AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT
+from utils.autocomplete import search as search_autocomplete
 import subprocess
 import logging
 
@@ -102,21 +107,90 @@ OPTION_CONFIG = {
 
 @options_bp.route('/options')
 def options():
-  """信息维护页面"""
-  return render_template('options.html',
-    power_types=PowerType.query.all(),
-    brands=Brand.query.all(),
-    merchants=Merchant.query.all(),
-    depots=Depot.query.all(),
-    chip_interfaces=ChipInterface.query.all(),
-    chip_models=ChipModel.query.all(),
-    locomotive_series=LocomotiveSeries.query.all(),
-    locomotive_models=LocomotiveModel.query.all(),
-    carriage_series=CarriageSeries.query.all(),
-    carriage_models=CarriageModel.query.all(),
-    trainset_series=TrainsetSeries.query.all(),
-    trainset_models=TrainsetModel.query.all()
-  )
+  """信息维护页面（各标签页的数据打开时通过 /api/options/<type>/list 加载）"""
+  return render_template('options.html')
+
+
+@options_bp.route('/api/options/<string:type>/list')
+def list_options(type):
+  """
+  系统信息分页列表
+
+  @param type: 选项类型，如 brand、merchant、locomotive_model
+  @param q: 查询参数，按名称（品牌同时按缩写）搜索
+  @param after: 上一页返回的 next_cursor
+  @param limit: 每页行数
+  @returns JSON: {items: [{列值..., 关联名称..., usage_count}], next_cursor, has_more}
+  """
+  if type not in OPTION_CONFIG:
+    return jsonify(api_error('未知类型')), 404
+
+  try:
+    page = fetch_option_page(
+      OPTION_CONFIG[type]['model'],
+      query=request.args.get('q'),
+      after=request.args.get('after'),
+      limit=parse_limit(request.args.get('limit'))
+    )
+  except ValueError as e:
+    return jsonify(api_error(str(e))), 400
+  return jsonify(page)
+
+
+@options_bp.route('/api/options/<string:type>/usage')
+def option_usage(type):
+  """
+  整张系统信息表每行的被引用次数（一次分组查询）
+
+  @param type: 选项类型，如 brand、locomotive_series
+  @returns JSON: {usage: {id: 引用次数}}，未被引用的 id 不出现
+  """
+  if type not in OPTION_CONFIG:
+    return jsonify(api_error('未知类型')), 404
+
+  return jsonify({'usage': usage_counts(OPTION_CONFIG[type]['model'])})
+
+
+@options_bp.route('/api/options/bundle')
+def options_bundle():
+  """
+  全部下拉选项（以内容哈希版本化，供表单页面加载一次后长期缓存）
+
+  @param v: 查询参数，选项包版本；与当前版本一致时响应可被浏览器永久缓存
+  @returns JSON: {version, options: {选项键: 记录列表}}，If-None-Match 命中时返回 304
+  """
+  version, body = option_bundle()
+  if request.if_none_match.contains(version):
+    response = current_app.response_class(status=304)
+  else:
+    response = current_app.response_class(body, mimetype='application/json')
+  response.set_etag(version)
+  if request.args.get('v') == version:
+    # 内容变化后版本随之变化，带版本的 URL 内容永不改变
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+  else:
+    response.headers['Cache-Control'] = 'no-cache'
+  return response
+
+
+@options_bp.route('/api/autocomplete/<string:table>')
+def autocomplete(table):
+  """
+  下拉选项自动完成（内存前缀索引，支持拼音首字母）
+
+  @param table: 系统信息表名，如 brand、merchant、locomotive_model
+  @param q: 查询参数，用户输入；匹配名称前缀、拼音首字母/品牌缩写前缀或名称子串
+  @param limit: 查询参数，最多返回条数
+  @returns JSON: {items: [{id, name}]}
+  """
+  if table not in AUTOCOMPLETE_MODELS:
+    return jsonify(api_error('未知类型')), 404
+
+  limit = safe_int(request.args.get('limit'), DEFAULT_AUTOCOMPLETE_LIMIT)
+  if not 1 <= limit <= MAX_AUTOCOMPLETE_LIMIT:
+    return jsonify(api_error(f'limit 必须是 1-{MAX_AUTOCOMPLETE_LIMIT} 之间的整数')), 400
+
+  return jsonify({'items': search_autocomplete(table, request.args.get('q'), limit)})
 
 
 # 使用工厂函数生成路由
@@ -147,6 +221,7 @@ def create_option_add_route(option_type):
       item = model_class(**kwargs)
       db.session.add(item)
       db.session.commit()
+      invalidate_options()
       logger.info(f"{option_type} added: ID={item.id}")
     except Exception as e:
       db.session.rollback()
@@ -166,13 +241,12 @@ def create_option_delete_route(option_type):
       item = db.get_or_404(model_class, id)
 
       # 检查是否被使用
-      if config['cascade_check']:
-        for relation in config['cascade_check']:
-          if hasattr(item, relation) and getattr(item, relation):
-            return f"该{option_type}正在被使用，无法删除！<script>setTimeout(()=>location.href='/options', 2000);</script>"
+      if config['cascade_check'] and is_in_use(item, config['cascade_check']):
+        return f"该{option_type}正在被使用，无法删除！<script>setTimeout(()=>location.href='/options', 2000);</script>"
 
       db.session.delete(item)
       db.session.commit()
+      invalidate_options()
       logger.info(f"{option_type} deleted: ID={id}")
     except Exception as e:
       db.session.rollback()
@@ -220,6 +294,7 @@ def create_option_edit_route(option_type):
             return f"缩写 '{item.abbreviation}' 已被其他品牌使用！<script>setTimeout(()=>history.back(), 2000);</script>"
 
         db.session.commit()
+        invalidate_options()
         return redirect(url_for('options.options'))
       except Exception as e:
         db.session.rollback()
@@ -255,6 +330,29 @@ for option_type in OPTION_CONFIG:
   options_bp.add_url_rule(f'/options/{option_type}/edit/<int:id>', endpoint=f'edit_{option_type}', methods=['GET', 'POST'], view_func=edit_func)
 
 
+def apply_option_fields(item, config, data):
+  """
+  将行内编辑提交的字段写入选项对象
+
+  @param item: 选项对象
+  @param config: OPTION_CONFIG 中的配置
+  @param data: 字段字典（表单或 JSON）
+  """
+  optional_fields = config.get('optional_fields', [])
+  for field in config['fields']:
+    value = data.get(field)
+    # _id 字段需要非空才能转换为 int
+    if field.endswith('_id'):
+      if value:
+        setattr(item, field, int(value))
+    # 可选字段允许设置为空
+    elif field in optional_fields:
+      setattr(item, field, value or None)
+    # 其他字段需要非空
+    elif value:
+      setattr(item, field, value)
+
+
 @options_bp.route('/api/options/<string:type>/edit', methods=['POST'])
 def edit_option_api(type):
   """选项行内编辑 API"""
@@ -263,23 +361,9 @@ def edit_option_api(type):
 
   try:
     config = OPTION_CONFIG[type]
-    model_class = config['model']
-    optional_fields = config.get('optional_fields', [])
     id = request.form.get('id')
-    item = db.get_or_404(model_class, id)
-
-    for field in config['fields']:
-      value = request.form.get(field)
-      # _id 字段需要非空才能转换为 int
-      if field.endswith('_id'):
-        if value:
-          setattr(item, field, int(value))
-      # 可选字段允许设置为空
-      elif field in optional_fields:
-        setattr(item, field, value or None)
-      # 其他字段需要非空
-      elif value:
-        setattr(item, field, value)
+    item = db.get_or_404(config['model'], id)
+    apply_option_fields(item, config, request.form)
 
     # 品牌特殊处理：验证 abbreviation 唯一性
     if type == 'brand' and item.abbreviation:
@@ -291,8 +375,148 @@ def edit_option_api(type):
         return jsonify(api_error(f"缩写 '{item.abbreviation}' 已被其他品牌使用")), 400
 
     db.session.commit()
+    invalidate_options()
     return jsonify(api_success('保存成功'))
   except Exception as e:
     db.session.rollback()
     logger.error(f"Error editing {type}: {e}")
     return jsonify(api_error(str(e))), 500
+
+
+@options_bp.route('/api/options/batch', methods=['POST'])
+def batch_options_api():
+  """
+  批量行内编辑和删除（可跨选项类型，全部通过校验后一次提交）
+
+  @param edits: [{option_type, id, fields: {字段...}}]，字段含义与 /api/options/<type>/edit 相同
+  @param deletes: [{option_type, id}]
+  @returns JSON: {success, edited, deleted}；任一操作校验失败时不做任何修改，
+           返回 400 和 errors: [{index, field, message}]（index 为 edits 与 deletes 拼接后的序号）
+  """
+  data = request.get_json(silent=True) or {}
+  edits = data.get('edits') or []
+  deletes = data.get('deletes') or []
+  operations = [(op, 'edit') for op in edits] + [(op, 'delete') for op in deletes]
+  if not operations:
+    return jsonify(api_error('没有要保存的修改')), 400
+
+  errors = []
+  ids_by_type = {}
+  for index, (op, action) in enumerate(operations):
+    if not isinstance(op, dict) or op.get('option_type') not in OPTION_CONFIG:
+      errors.append({'index': index, 'field': 'option_type', 'message': '未知类型'})
+    elif safe_int(op.get('id')) is None:
+      errors.append({'index': index, 'field': 'id', 'message': 'id 必须是整数'})
+    elif action == 'edit' and not isinstance(op.get('fields'), dict):
+      errors.append({'index': index, 'field': 'fields', 'message': 'fields 必须是对象'})
+    else:
+      ids_by_type.setdefault(op['option_type'], set()).add(safe_int(op['id']))
+  if errors:
+    return jsonify(api_error('验证失败', errors=errors)), 400
+
+  try:
+    # 每种类型一次查询取出全部涉及的行
+    items = {}
+    for type, ids in ids_by_type.items():
+      model_class = OPTION_CONFIG[type]['model']
+      for item in model_class.query.filter(model_class.id.in_(ids)):
+        items[(type, item.id)] = item
+
+    seen = set()
+    name_edits = []
+    brand_edits = []
+    with db.session.no_autoflush:
+      for index, (op, action) in enumerate(operations):
+        key = (op['option_type'], safe_int(op['id']))
+        config = OPTION_CONFIG[op['option_type']]
+        item = items.get(key)
+        if item is None:
+          errors.append({'index': index, 'field': 'id', 'message': '记录不存在'})
+        elif key in seen:
+          errors.append({'index': index, 'field': 'id', 'message': '同一记录只能出现一次'})
+        elif action == 'delete':
+          if config['cascade_check'] and is_in_use(item, config['cascade_check']):
+            errors.append({'index': index, 'field': 'id', 'message': f'{item.name} 正在被使用，无法删除'})
+        else:
+          # 字段放在 fields 中，与 option_type、id 等信封键分开（车厢车型本身有 type 字段）
+          apply_option_fields(item, config, op['fields'])
+          name_edits.append((index, item))
+          if op['option_type'] == 'brand':
+            if not item.abbreviation:
+              item.abbreviation = generate_brand_abbreviation(item.name)
+            brand_edits.append((index, item))
+        seen.add(key)
+
+      # 名称和品牌缩写唯一性：批内互查，再与已有数据一次集合查询（提交前检查，避免违反唯一索引）
+      errors.extend(check_name_keys(name_edits))
+      errors.extend(check_brand_abbreviations(brand_edits))
+      errors.sort(key=lambda error: error['index'])
+
+    if errors:
+      db.session.rollback()
+      return jsonify(api_error('验证失败', errors=errors)), 400
+
+    for op in deletes:
+      db.session.delete(items[(op['option_type'], safe_int(op['id']))])
+    db.session.commit()
+    invalidate_options()
+    logger.info(f"Options batch saved: {len(edits)} edited, {len(deletes)} deleted")
+    return jsonify(api_success('保存成功', data={'edited': len(edits), 'deleted': len(deletes)}))
+  except Exception as e:
+    db.session.rollback()
+    logger.error(f"Error saving options batch: {e}")
+    return jsonify(api_error(str(e))), 500
+
+
+def check_name_keys(name_edits):
+  """
+  校验批量编辑后的名称查找键（name_key）唯一，只检查 name_key 带唯一索引的表
+  （本批改名或删除的记录在提交时才生效，其原名称仍视为已占用）
+
+  @param name_edits: [(操作序号, 已写入新值的选项对象)]
+  @returns list: 错误列表 [{index, field, message}]
+  """
+  errors = []
+  # 模型类 -> {name_key: (操作序号, 对象)}
+  owners = {}
+  for index, item in name_edits:
+    model_class = type(item)
+    if not model_class.__table__.c.name_key.unique or not item.name_key:
+      continue
+    by_key = owners.setdefault(model_class, {})
+    if item.name_key in by_key:
+      errors.append({'index': index, 'field': 'name', 'message': f"名称 '{item.name}' 在本次修改中重复"})
+    else:
+      by_key[item.name_key] = (index, item)
+
+  for model_class, by_key in owners.items():
+    rows = db.session.query(model_class.id, model_class.name_key).filter(model_class.name_key.in_(by_key))
+    for row_id, name_key in rows:
+      index, item = by_key[name_key]
+      if row_id != item.id:
+        errors.append({'index': index, 'field': 'name', 'message': f"名称 '{item.name}' 已被其他记录使用"})
+  return errors
+
+
+def check_brand_abbreviations(brand_edits):
+  """
+  校验批量编辑后的品牌缩写唯一（本批删除的品牌在提交时才删除，其缩写仍视为已占用）
+
+  @param brand_edits: [(操作序号, 已写入新值的品牌对象)]
+  @returns list: 错误列表 [{index, field, message}]
+  """
+  errors = []
+  owners = {}
+  for index, brand in brand_edits:
+    if brand.abbreviation in owners:
+      errors.append({'index': index, 'field': 'abbreviation', 'message': f"缩写 '{brand.abbreviation}' 在本次修改中重复"})
+    owners.setdefault(brand.abbreviation, index)
+
+  if owners:
+    taken = {abbreviation for abbreviation, in db.session.query(Brand.abbreviation).filter(
+      Brand.abbreviation.in_(owners),
+      Brand.id.notin_([brand.id for _, brand in brand_edits])
+    )}
+    for abbreviation in taken:
+      errors.append({'index': owners[abbreviation], 'field': 'abbreviation', 'message': f"缩写 '{abbreviation}' 已被其他品牌使用"})
+  return errors
@@ -25,7 +25,12 @@ def reinit_database():
     """重新初始化数据库"""
     try:
         # 删除所有数据（按外键依赖顺序）
-        from models import CarriageItem, Locomotive, CarriageSet, Trainset, LocomotiveHead
+        from models import CarriageItem, Locomotive, CarriageSet, Trainset, LocomotiveHead, CollectionSummary
+        from models import RowVersionCounter, RowTombstone
+        CollectionSummary.query.delete()
+        # 重置行版本计数器，下次分配时生成新纪元，客户端据此全量重新同步
+        RowTombstone.query.delete()
+        RowVersionCounter.query.delete()
         CarriageItem.query.delete()
         Locomotive.query.delete()
         CarriageSet.query.delete()
@@ -48,6 +53,16 @@ def reinit_database():
         # 运行初始化脚本
         subprocess.run(['python', 'init_db.py'], check=True)
 
+        # 初始化脚本在独立进程中修改数据，需手动递增数据版本
+        from utils.cache import bump_generation
+        from utils.option_cache import invalidate_options
+        from utils.autocomplete import reset_indexes
+        from utils.decoder_numbers import reset_decoder_numbers
+        bump_generation()
+        invalidate_options()
+        reset_indexes()
+        reset_decoder_numbers()
+
         logger.info("Database reinitialized successfully")
         return jsonify({'success': True, 'message': '数据库重新初始化成功'})
     except Exception as e:
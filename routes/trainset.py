@@ -1,36 +1,19 @@
 """
 动车组模型路由 Blueprint
 """
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify
-from models import db, Trainset, TrainsetModel, TrainsetSeries, PowerType, Brand, Depot, ChipInterface, ChipModel, Merchant
-from utils.helpers import parse_purchase_date, safe_int, validate_unique, parse_boolean, api_success, api_error
-from utils.validators import validate_trainset_number, validate_decoder_number
+from flask import Blueprint, stream_template, request, redirect, url_for, jsonify
+from models import db, Trainset, Brand
+from utils.helpers import parse_purchase_date, safe_int, parse_boolean, api_success, api_error
+from utils.validation import validate_record
 from utils.price_calculator import calculate_price
 from utils.file_sync import rename_model_folder, update_file_records_in_db
+from utils.query_options import iter_list_batches
 import logging
 
 logger = logging.getLogger(__name__)
 trainset_bp = Blueprint('trainset', __name__, url_prefix='')
 
 
-def get_trainset_form_data():
-  """
-  获取动车组表单所需的下拉框数据
-
-  @returns dict: 包含所有下拉选项的字典
-  """
-  return {
-    'trainset_models': TrainsetModel.query.all(),
-    'trainset_series': TrainsetSeries.query.all(),
-    'power_types': PowerType.query.all(),
-    'brands': Brand.query.all(),
-    'depots': Depot.query.all(),
-    'chip_interfaces': ChipInterface.query.all(),
-    'chip_models': ChipModel.query.all(),
-    'merchants': Merchant.query.all()
-  }
-
-
 def validate_trainset_data(trainset_number, decoder_number, scale, exclude_id=None):
   """
   验证动车组数据
@@ -41,21 +24,11 @@ def validate_trainset_data(trainset_number, decoder_number, scale, exclude_id=No
   @param exclude_id: 排除的动车组ID（用于编辑时排除自身）
   @returns list: 错误信息列表
   """
-  errors = []
-
-  # 格式验证
-  if trainset_number and not validate_trainset_number(trainset_number):
-    errors.append({'field': 'trainset_number', 'message': '动车号格式错误：应为3-12位数字，允许前导0'})
-  if decoder_number and not validate_decoder_number(decoder_number):
-    errors.append({'field': 'decoder_number', 'message': '编号格式错误：应为1-4位数字，无前导0'})
-
-  # 唯一性验证
-  if trainset_number and not validate_unique(Trainset, 'trainset_number', trainset_number, scale, exclude_id):
-    errors.append({'field': 'trainset_number', 'message': f'动车号 {trainset_number} 在 {scale} 比例下已存在'})
-  if decoder_number and not validate_unique(Trainset, 'decoder_number', decoder_number, scale, exclude_id):
-    errors.append({'field': 'decoder_number', 'message': f'编号 {decoder_number} 在 {scale} 比例下已存在'})
-
-  return errors
+  return validate_record('trainset', {
+    'trainset_number': trainset_number,
+    'decoder_number': decoder_number,
+    'scale': scale
+  }, exclude_id)
 
 
 def create_trainset_from_form(form_data, is_json=False):
@@ -206,10 +179,7 @@ def trainset():
 
     errors = validate_trainset_data(trainset_number, decoder_number, scale)
     if errors:
-      form_data = get_trainset_form_data()
-      form_data['trainsets'] = Trainset.query.all()
-      form_data['errors'] = [e['message'] for e in errors]
-      return render_template('trainset.html', **form_data)
+      return stream_template('trainset.html', trainset_batches=iter_list_batches(Trainset), errors=[e['message'] for e in errors])
 
     try:
       trainset = create_trainset_from_form(request.form)
@@ -220,15 +190,9 @@ def trainset():
     except Exception as e:
       db.session.rollback()
       logger.error(f"Error adding trainset: {e}")
-      form_data = get_trainset_form_data()
-      form_data['trainsets'] = Trainset.query.all()
-      form_data['errors'] = [str(e)]
-      return render_template('trainset.html', **form_data)
-
-  form_data = get_trainset_form_data()
-  form_data['trainsets'] = Trainset.query.all()
-  form_data['errors'] = []
-  return render_template('trainset.html', **form_data)
+      return stream_template('trainset.html', trainset_batches=iter_list_batches(Trainset), errors=[str(e)])
+
+  return stream_template('trainset.html', trainset_batches=iter_list_batches(Trainset), errors=[])
 
 
 @trainset_bp.route('/trainset/delete/<int:id>', methods=['POST'])
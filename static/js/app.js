@@ -47,14 +47,12 @@ function getCurrentPage() {
  * 初始化机车页面
  */
 function initLocomotivePage() {
-  // 如果系列数据存在，初始化系列选择事件
-  if (window.locomotiveSeriesData) {
-    const seriesSelect = document.getElementById('series_id');
-    if (seriesSelect) {
-      seriesSelect.addEventListener('change', function() {
-        ModelForm.handleLocomotiveSeriesChange();
-      });
-    }
+  // 初始化系列选择事件（系列数据由 OptionBundle 异步加载）
+  const seriesSelect = document.getElementById('series_id');
+  if (seriesSelect) {
+    seriesSelect.addEventListener('change', function() {
+      ModelForm.handleLocomotiveSeriesChange();
+    });
   }
 }
 
@@ -62,14 +60,12 @@ function initLocomotivePage() {
  * 初始化动车组页面
  */
 function initTrainsetPage() {
-  // 如果系列数据存在，初始化系列选择事件
-  if (window.trainsetSeriesData) {
-    const seriesSelect = document.getElementById('series_id');
-    if (seriesSelect) {
-      seriesSelect.addEventListener('change', function() {
-        ModelForm.handleTrainsetSeriesChange();
-      });
-    }
+  // 初始化系列选择事件（系列数据由 OptionBundle 异步加载）
+  const seriesSelect = document.getElementById('series_id');
+  if (seriesSelect) {
+    seriesSelect.addEventListener('change', function() {
+      ModelForm.handleTrainsetSeriesChange();
+    });
   }
 }
 
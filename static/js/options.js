@@ -36,16 +36,20 @@ function generateAbbreviation(name) {
 
 // 选项编辑管理
 const OptionEditor = {
-  // 存储原始值，用于取消编辑时恢复
+  // 存储每个编辑中行的原始值（键为 类型:ID），用于取消编辑时恢复
   originalValues: {},
 
+  rowKey(row) {
+    return `${row.dataset.type}:${row.dataset.id}`;
+  },
+
   /**
    * 编辑行
    * @param {HTMLElement} button - 编辑按钮
    */
   editRow(button) {
     const row = button.closest('tr');
-    const fieldType = row.dataset.type;
+    row.classList.add('editing');
 
     // 切换按钮显示
     button.style.display = 'none';
@@ -54,10 +58,11 @@ const OptionEditor = {
     row.querySelector('.btn-danger').style.display = 'none';
 
     // 存储原始值
+    const originalValues = {};
     row.querySelectorAll('[data-field]').forEach(cell => {
-      const fieldName = cell.dataset.field;
-      this.originalValues[fieldName] = cell.textContent.trim();
+      originalValues[cell.dataset.field] = cell.textContent.trim();
     });
+    this.originalValues[this.rowKey(row)] = originalValues;
 
     // 获取字段列表
     const fields = row.dataset.fields.split(',');
@@ -75,9 +80,10 @@ const OptionEditor = {
    */
   createEditControl(row, field) {
     const cell = row.querySelector(`[data-field="${field}"]`);
+    const originalValues = this.originalValues[this.rowKey(row)];
 
     if (field === 'name') {
-      const originalValue = this.originalValues[field];
+      const originalValue = originalValues[field];
       const input = document.createElement('input');
       input.type = 'text';
       input.name = field;
@@ -91,8 +97,7 @@ const OptionEditor = {
         const select = document.createElement('select');
         select.name = field;
         select.style.cssText = 'width:100%; padding:0.25rem 0.5rem;';
-        const dataAttr = field === 'type' ? 'carriageType' : field.replace('_id', '');
-        const originalValue = row.dataset[dataAttr] || '';
+        const originalValue = row.dataset[`${field}Value`] || '';
         addFormSelect.querySelectorAll('option').forEach(opt => {
           const option = document.createElement('option');
           option.value = opt.value;
@@ -106,7 +111,7 @@ const OptionEditor = {
         cell.appendChild(select);
       }
     } else if (field === 'website' || field === 'search_url') {
-      const originalValue = this.originalValues[field] || '';
+      const originalValue = originalValues[field] || '';
       const input = document.createElement('input');
       input.type = 'text';
       input.name = field;
@@ -116,7 +121,7 @@ const OptionEditor = {
       cell.textContent = '';
       cell.appendChild(input);
     } else if (field === 'abbreviation') {
-      const originalValue = this.originalValues[field] || '';
+      const originalValue = originalValues[field] || '';
       const input = document.createElement('input');
       input.type = 'text';
       input.name = field;
@@ -166,7 +171,7 @@ const OptionEditor = {
         // 更新单元格显示
         this.updateCellDisplay(row, fields);
         // 清空原始值，避免被 cancelEdit 覆盖
-        this.originalValues = {};
+        delete this.originalValues[this.rowKey(row)];
         // 恢复按钮状态
         this.restoreButtonState(row);
       } else {
@@ -179,6 +184,42 @@ const OptionEditor = {
     });
   },
 
+  /**
+   * 一次保存所有编辑中的行（跨标签页，服务端统一校验后一次提交）
+   */
+  saveAll() {
+    const rows = Array.from(document.querySelectorAll('.tabs-container tr.editing'));
+    if (rows.length === 0) {
+      alert('没有编辑中的行');
+      return;
+    }
+
+    const edits = rows.map(row => {
+      // 字段放在 fields 中，避免与信封键冲突（车厢车型本身有 type 字段）
+      const fields = {};
+      row.dataset.fields.split(',').forEach(field => {
+        const input = row.querySelector(`[name="${field}"]`);
+        if (input) fields[field] = input.value;
+      });
+      return { option_type: row.dataset.type, id: row.dataset.id, fields };
+    });
+
+    Api.post('/api/options/batch', { edits })
+      .then(() => {
+        rows.forEach(row => {
+          this.updateCellDisplay(row, row.dataset.fields.split(','));
+          delete this.originalValues[this.rowKey(row)];
+          this.restoreButtonState(row);
+        });
+      })
+      .catch(error => {
+        // 校验失败时 errors 中的 index 对应 edits 的序号
+        const messages = ((error && error.errors) || []).map(e => `${rows[e.index].dataset.name}: ${e.message}`);
+        console.error('Error:', error);
+        alert('保存失败: ' + (messages.join('\n') || (error && error.error) || '请重试'));
+      });
+  },
+
   /**
    * 更新单元格显示
    * @param {HTMLElement} row - 表格行
@@ -191,6 +232,7 @@ const OptionEditor = {
       if (input) {
         if (input.tagName === 'SELECT') {
           cell.textContent = input.options[input.selectedIndex].text;
+          row.dataset[`${field}Value`] = input.value;
         } else {
           cell.textContent = input.value;
         }
@@ -203,6 +245,7 @@ const OptionEditor = {
    * @param {HTMLElement} row - 表格行
    */
   restoreButtonState(row) {
+    row.classList.remove('editing');
     row.querySelector('.btn-edit').style.display = 'inline-block';
     row.querySelector('.btn-save').style.display = 'none';
     row.querySelector('.btn-cancel').style.display = 'none';
@@ -217,21 +260,162 @@ const OptionEditor = {
     const row = button.closest('tr');
 
     // 恢复原始值
-    Object.keys(this.originalValues).forEach(field => {
+    const originalValues = this.originalValues[this.rowKey(row)] || {};
+    Object.keys(originalValues).forEach(field => {
       const cell = row.querySelector(`[data-field="${field}"]`);
       if (cell) {
-        cell.textContent = this.originalValues[field];
+        cell.textContent = originalValues[field];
       }
     });
 
     // 清空原始值存储
-    this.originalValues = {};
+    delete this.originalValues[this.rowKey(row)];
 
     // 恢复按钮状态
     this.restoreButtonState(row);
   }
 };
 
+// 标签页数据：打开时按需分页加载，支持按名称搜索
+const OptionTabs = {
+  // 标签页 ID -> { type, query, after, seq }
+  states: {},
+  pageSize: 100,
+
+  /**
+   * 打开标签页，首次打开时加载第一页并填充新增表单的下拉框
+   * @param {string} tabId - 标签页 ID（如 brands）
+   */
+  open(tabId) {
+    const tab = document.getElementById(tabId);
+    if (!tab || this.states[tabId]) return;
+
+    this.states[tabId] = { type: tab.dataset.optionType, query: '', after: null, seq: 0 };
+    this.fillSelects(tab);
+
+    let searchTimer = null;
+    tab.querySelector('.option-search').addEventListener('input', e => {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(() => {
+        this.states[tabId].query = e.target.value.trim();
+        this.load(tabId, true);
+      }, 300);
+    });
+    tab.querySelector('.btn-load-more').addEventListener('click', () => this.load(tabId));
+
+    this.load(tabId);
+  },
+
+  /**
+   * 加载下一页
+   * @param {string} tabId - 标签页 ID
+   * @param {boolean} reset - 是否清空已加载的行从第一页开始（搜索条件变化时）
+   */
+  load(tabId, reset = false) {
+    const state = this.states[tabId];
+    const tab = document.getElementById(tabId);
+    const tableId = `${tabId}-table`;
+    if (reset) {
+      state.after = null;
+      TableManager.clearRows(tableId);
+    }
+
+    // 只采用最后一次请求的结果，避免快速输入时旧结果覆盖新结果
+    const seq = ++state.seq;
+    const params = new URLSearchParams({ limit: this.pageSize });
+    if (state.query) params.set('q', state.query);
+    if (state.after) params.set('after', state.after);
+
+    return fetch(`/api/options/${state.type}/list?${params}`)
+      .then(response => response.json())
+      .then(page => {
+        if (seq !== state.seq) return;
+        const table = document.getElementById(tableId);
+        TableManager.appendRows(tableId, page.items.map(item => this.renderRow(state.type, table, item)));
+        state.after = page.next_cursor;
+        tab.querySelector('.btn-load-more').style.display = page.has_more ? 'inline-block' : 'none';
+      })
+      .catch(error => {
+        console.error('Error:', error);
+      });
+  },
+
+  /**
+   * 用选项包填充新增表单中带 data-options 的下拉框
+   * @param {HTMLElement} tab - 标签页元素
+   */
+  fillSelects(tab) {
+    tab.querySelectorAll('select[data-options]').forEach(select => {
+      OptionBundle.get(select.dataset.options).then(records => {
+        records.forEach(record => {
+          const option = document.createElement('option');
+          option.value = record.id;
+          option.textContent = record.name;
+          select.appendChild(option);
+        });
+      });
+    });
+  },
+
+  /**
+   * 生成表格行
+   * @param {string} type - 选项类型
+   * @param {HTMLElement} table - 表格（data-fields 为可编辑字段）
+   * @param {Object} item - 列表接口返回的行数据
+   * @returns {HTMLElement}
+   */
+  renderRow(type, table, item) {
+    const fields = table.dataset.fields.split(',');
+    const row = document.createElement('tr');
+    row.dataset.id = item.id;
+    row.dataset.type = type;
+    row.dataset.fields = fields.join(',');
+    row.dataset.usage = item.usage_count;
+
+    fields.forEach(field => {
+      const cell = document.createElement('td');
+      cell.dataset.field = field;
+      if (field === 'series_id' || field === 'power_type_id') {
+        // 排序键沿用 series / power，编辑时按 ID 选中
+        const name = item[field.replace('_id', '')] || '';
+        row.dataset[field === 'series_id' ? 'series' : 'power'] = name;
+        row.dataset[`${field}Value`] = item[field] === null ? '' : String(item[field]);
+        cell.textContent = name || '-';
+      } else if (field === 'type') {
+        row.dataset.carriageType = item.type || '';
+        row.dataset.typeValue = item.type || '';
+        cell.textContent = item.type || '';
+      } else if (field === 'website' && type === 'merchant' && item.website) {
+        row.dataset.website = item.website;
+        const link = document.createElement('a');
+        link.href = item.website;
+        link.target = '_blank';
+        link.rel = 'noopener';
+        link.textContent = item.website;
+        cell.appendChild(link);
+      } else {
+        row.dataset[field] = item[field] || '';
+        cell.textContent = item[field] || '';
+      }
+      row.appendChild(cell);
+    });
+
+    const usageCell = document.createElement('td');
+    usageCell.className = 'usage-count';
+    usageCell.textContent = item.usage_count;
+    row.appendChild(usageCell);
+
+    const actions = document.createElement('td');
+    actions.innerHTML = `
+      <button type="button" class="btn-edit" onclick="editRow(this)">编辑</button>
+      <button type="button" class="btn-save" onclick="saveRow(this, '${type}')" style="display:none;">保存</button>
+      <button type="button" class="btn-cancel" onclick="cancelEdit(this)" style="display:none;">取消</button>
+      <button type="button" class="btn-danger" onclick="deleteItem(this, '${type}', ${item.id}, '/options/${type}/delete/${item.id}')">删除</button>`;
+    row.appendChild(actions);
+    return row;
+  }
+};
+
 // 删除操作
 const DeleteHelper = {
   /**
@@ -276,6 +460,10 @@ function saveRow(button, type) {
   OptionEditor.saveRow(button, type);
 }
 
+function saveAllRows() {
+  OptionEditor.saveAll();
+}
+
 function cancelEdit(button) {
   OptionEditor.cancelEdit(button);
 }
@@ -284,6 +472,11 @@ function deleteItem(button, type, id, deleteUrl) {
   DeleteHelper.deleteItem(button, type, id, deleteUrl);
 }
 
+function showOptionTab(tabId) {
+  Utils.showTab(tabId, event);
+  OptionTabs.open(tabId);
+}
+
 // 品牌名称输入时自动生成缩写建议（在编辑模式下）
 document.addEventListener('focusout', function(e) {
   if (e.target.matches('#brands .editable[data-field="name"] input, #brands [data-field="name"] input')) {
@@ -182,6 +182,80 @@ const Api = {
       }
       return response.json();
     });
+  },
+
+  /**
+   * 获取一页列表数据（服务端排序、筛选和游标分页）
+   * @param {string} modelType - locomotive/carriage/trainset/locomotive_head
+   * @param {Object} options - { sort, filters: {brand: 1, scale: 'HO'}, after, limit }
+   * @returns {Promise} 解析为 { items, next_cursor, has_more }
+   */
+  listPage(modelType, options = {}) {
+    const params = new URLSearchParams();
+    if (options.sort) params.set('sort', options.sort);
+    if (options.after) params.set('after', options.after);
+    if (options.limit) params.set('limit', options.limit);
+    Object.entries(options.filters || {}).forEach(([field, value]) => {
+      if (value !== '' && value !== null && value !== undefined) {
+        params.set(`filter[${field}]`, value);
+      }
+    });
+
+    return fetch(`/api/${modelType}/list?${params}`).then(response => {
+      if (!response.ok) {
+        return response.json().then(err => Promise.reject(err));
+      }
+      return response.json();
+    });
+  },
+
+  /**
+   * 创建增量加载器，每次调用 next() 获取下一页
+   * @param {string} modelType - 模型类型
+   * @param {Object} options - 同 listPage，不含 after
+   * @returns {Object} { next(): Promise<Array>, hasMore: boolean }
+   */
+  listLoader(modelType, options = {}) {
+    const loader = {
+      cursor: null,
+      hasMore: true,
+      next() {
+        if (!loader.hasMore) return Promise.resolve([]);
+        return Api.listPage(modelType, { ...options, after: loader.cursor }).then(page => {
+          loader.cursor = page.next_cursor;
+          loader.hasMore = page.has_more;
+          return page.items;
+        });
+      }
+    };
+    return loader;
+  },
+
+  /**
+   * 查询下拉选项自动完成候选项（服务端前缀索引，支持拼音首字母）
+   * @param {string} table - 系统信息表名，如 brand、locomotive_model
+   * @param {string} query - 用户输入
+   * @param {number} limit - 最多返回条数
+   * @returns {Promise<Array>} 解析为 [{ id, name }]，id 为字符串
+   */
+  autocomplete(table, query, limit = 50) {
+    const params = new URLSearchParams({ q: query || '', limit });
+    return fetch(`/api/autocomplete/${table}?${params}`)
+      .then(response => response.json())
+      .then(data => (data.items || []).map(item => ({ id: String(item.id), name: item.name })));
+  },
+
+  /**
+   * 查询比例内未被占用的机车编号（服务端占用位图）
+   * @param {string} scale - 比例
+   * @param {number} count - 返回个数
+   * @returns {Promise<Array>} 解析为升序的空闲编号字符串
+   */
+  freeDecoderNumbers(scale, count = 5) {
+    const params = new URLSearchParams({ scale, count });
+    return fetch(`/api/decoder-numbers/free?${params}`)
+      .then(response => response.json())
+      .then(data => data.numbers || []);
   }
 };
 
@@ -481,6 +555,111 @@ const ModelForm = {
   }
 };
 
+// 列表行数据存储（读取页面内嵌的紧凑 JSON，代替每行的 data-* 属性）
+const RowStore = {
+  // `${modelType}:${id}` -> 行记录
+  records: new Map(),
+  loaded: false,
+
+  /**
+   * 解析页面中所有 script.row-data 数据块
+   * 数据格式：{ columns: [...], rows: [[...]], lookups: { brand: { id: name } } }
+   * 行记录包含所有列，以及按 ID 从 lookups 还原的关联名称（如 brand_id -> brand）
+   */
+  load() {
+    document.querySelectorAll('script.row-data').forEach(el => {
+      if (el.dataset.parsed) return;
+      el.dataset.parsed = 'true';
+
+      const modelType = el.dataset.modelType;
+      const payload = JSON.parse(el.textContent);
+      const lookups = Object.entries(payload.lookups);
+
+      payload.rows.forEach(values => {
+        const record = {};
+        payload.columns.forEach((column, index) => {
+          record[column] = values[index];
+        });
+        lookups.forEach(([name, names]) => {
+          const id = record[`${name}_id`];
+          record[name] = id === null || id === undefined ? '' : (names[id] || '');
+        });
+        this.records.set(`${modelType}:${record.id}`, record);
+      });
+    });
+    this.loaded = true;
+  },
+
+  /**
+   * 获取表格行对应的记录
+   * @param {HTMLElement} row - 带 data-model_type 和 data-model_id 的表格行
+   * @returns {Object|undefined}
+   */
+  get(row) {
+    if (!this.loaded) this.load();
+    return this.records.get(`${row.dataset.model_type}:${row.dataset.model_id}`);
+  },
+
+  /**
+   * 获取表格行某个字段的字符串值（用于排序、筛选和表单填充）
+   * 没有对应记录的行（如信息维护表格）回退到 data-* 属性
+   * @param {HTMLElement} row - 表格行
+   * @param {string} key - 字段名
+   * @returns {string}
+   */
+  value(row, key) {
+    const record = this.get(row);
+    const value = record ? record[key] : row.dataset[key];
+    return value === null || value === undefined ? '' : String(value);
+  }
+};
+
+// 下拉选项包（系统信息表数据，按内容哈希版本化，浏览器长期缓存）
+const OptionBundle = {
+  promise: null,
+
+  /**
+   * 加载选项包，页面 head 中已发起的请求（window.optionBundleRequest）直接复用
+   * ID 类字段转换为字符串，与表单控件的值保持一致
+   * @returns {Promise<Object>} { 选项键: [{ id, name, ... }] }
+   */
+  load() {
+    if (!this.promise) {
+      const request = window.optionBundleRequest
+        || fetch('/api/options/bundle').then(response => response.json());
+      this.promise = request.then(bundle => {
+        const options = {};
+        Object.entries(bundle.options).forEach(([key, records]) => {
+          options[key] = records.map(record => this.normalize(record));
+        });
+        return options;
+      });
+    }
+    return this.promise;
+  },
+
+  /**
+   * 获取某个选项键的记录列表
+   * @param {string} key - 选项键（如 brands、locomotive_models）
+   * @returns {Promise<Array>}
+   */
+  get(key) {
+    return this.load().then(options => options[key] || []);
+  },
+
+  normalize(record) {
+    const result = {};
+    Object.entries(record).forEach(([key, value]) => {
+      if (key === 'id' || key.endsWith('_id')) {
+        result[key] = value === null || value === undefined ? '' : String(value);
+      } else {
+        result[key] = value;
+      }
+    });
+    return result;
+  }
+};
+
 // 表格排序筛选管理器
 const TableManager = {
   // 存储每个表格实例的状态
@@ -591,7 +770,7 @@ const TableManager = {
 
     const values = new Set();
     state.originalRows.forEach(row => {
-      const value = row.dataset[key];
+      const value = RowStore.value(row, key);
       if (value !== undefined && value !== '') {
         values.add(value);
       }
@@ -675,15 +854,15 @@ const TableManager = {
     // 筛选
     let filteredRows = state.originalRows.filter(row => {
       return Object.entries(state.filters).every(([key, value]) => {
-        return row.dataset[key] === value;
+        return RowStore.value(row, key) === value;
       });
     });
 
     // 排序
     if (state.sortColumn) {
       filteredRows.sort((a, b) => {
-        const aVal = a.dataset[state.sortColumn] || '';
-        const bVal = b.dataset[state.sortColumn] || '';
+        const aVal = RowStore.value(a, state.sortColumn);
+        const bVal = RowStore.value(b, state.sortColumn);
 
         // 尝试数字比较
         const aNum = parseFloat(aVal);
@@ -705,6 +884,31 @@ const TableManager = {
     filteredRows.forEach(row => state.tbody.appendChild(row.cloneNode(true)));
   },
 
+  /**
+   * 追加行（分页加载的表格），保持当前的排序和筛选
+   * @param {string} tableId - 表格 ID
+   * @param {HTMLElement[]} rows - 新行
+   */
+  appendRows(tableId, rows) {
+    const state = this.instances.get(tableId);
+    if (!state) return;
+
+    state.originalRows.push(...rows);
+    this.applySortAndFilter(tableId);
+  },
+
+  /**
+   * 清空所有行（重新搜索前调用）
+   * @param {string} tableId - 表格 ID
+   */
+  clearRows(tableId) {
+    const state = this.instances.get(tableId);
+    if (!state) return;
+
+    state.originalRows = [];
+    this.applySortAndFilter(tableId);
+  },
+
   /**
    * 重置表格
    * @param {string} tableId - 表格 ID
@@ -740,8 +944,8 @@ const AutocompleteManager = {
    * 初始化自动完成组件
    * @param {string} inputId - 输入框ID
    * @param {string} hiddenId - 隐藏域ID（存储实际值）
-   * @param {Array} options - 选项数组 [{id, name}]
-   * @param {Object} config - 配置项 { onchange }
+   * @param {Array} options - 选项数组 [{id, name}]（用于失焦时按名称校验）
+   * @param {Object} config - 配置项 { onchange, table }；指定 table 时输入过滤由服务端自动完成接口完成
    */
   init(inputId, hiddenId, options, config = {}) {
     const input = document.getElementById(inputId);
@@ -757,7 +961,8 @@ const AutocompleteManager = {
       options: options || [],
       config,
       selectedIndex: -1,
-      filteredOptions: []
+      filteredOptions: [],
+      requestSeq: 0
     };
 
     this.instances[inputId] = instance;
@@ -822,7 +1027,7 @@ const AutocompleteManager = {
    * 处理输入
    */
   handleInput(instance, value) {
-    const { options, dropdown } = instance;
+    const { options, config } = instance;
     instance.selectedIndex = -1;
 
     if (!value) {
@@ -830,11 +1035,35 @@ const AutocompleteManager = {
       return;
     }
 
+    if (config.table) {
+      this.searchRemote(instance, value);
+      return;
+    }
+
     // 过滤选项
     const lowerValue = value.toLowerCase();
-    instance.filteredOptions = options.filter(opt =>
+    this.showFiltered(instance, options.filter(opt =>
       opt.name.toLowerCase().includes(lowerValue)
-    );
+    ), value);
+  },
+
+  /**
+   * 通过服务端自动完成接口检索，只渲染最后一次输入的结果
+   */
+  searchRemote(instance, value) {
+    const seq = ++instance.requestSeq;
+    Api.autocomplete(instance.config.table, value).then(items => {
+      if (seq !== instance.requestSeq) return;
+      this.showFiltered(instance, items, value);
+    });
+  },
+
+  /**
+   * 渲染过滤后的选项
+   */
+  showFiltered(instance, filteredOptions, value) {
+    const { dropdown } = instance;
+    instance.filteredOptions = filteredOptions;
 
     // 渲染下拉列表
     this.renderDropdown(instance, value);
@@ -850,10 +1079,22 @@ const AutocompleteManager = {
    * 显示所有选项
    */
   showAllOptions(instance) {
-    const { options, dropdown } = instance;
-    instance.filteredOptions = options;
+    const { options, dropdown, config } = instance;
     instance.selectedIndex = -1;
 
+    if (config.table) {
+      // 选项很多时只显示按名称排序的前若干项
+      const seq = ++instance.requestSeq;
+      Api.autocomplete(config.table, '').then(items => {
+        if (seq !== instance.requestSeq) return;
+        instance.filteredOptions = items;
+        this.renderDropdown(instance, '');
+        dropdown.classList.add('show');
+      });
+      return;
+    }
+
+    instance.filteredOptions = options;
     this.renderDropdown(instance, '');
     dropdown.classList.add('show');
   },
@@ -941,6 +1182,8 @@ const AutocompleteManager = {
   handleBlur(instance) {
     const { input, hidden, wrapper, options, config } = instance;
     instance.dropdown.classList.remove('show');
+    // 丢弃尚未返回的检索结果，避免失焦后重新弹出
+    instance.requestSeq++;
 
     const value = input.value.trim();
 
@@ -1060,7 +1303,7 @@ const FormFiller = {
    * @param {HTMLElement} button - 复制按钮
    * @param {Object} fieldMappings - 字段映射 { dataAttr: 'formFieldId' }
    *   对于自动完成字段，dataAttr 应该是存储 ID 的属性名（如 model_id）
-   *   会自动查找对应的名称属性（如 data-model）来获取显示名称
+   *   会自动查找对应的名称字段（如 model）来获取显示名称，字段值由 RowStore 提供
    * @param {string} modalId - 可选，模态框ID，复制前先打开模态框
    */
   copyFromRow(button, fieldMappings, modalId) {
@@ -1074,7 +1317,7 @@ const FormFiller = {
 
     // 遍历字段映射，填充表单
     Object.entries(fieldMappings).forEach(([dataAttr, fieldId]) => {
-      const value = row.dataset[dataAttr];
+      const value = RowStore.value(row, dataAttr);
       const element = document.getElementById(fieldId);
 
       if (!element) return;
@@ -1088,7 +1331,7 @@ const FormFiller = {
           // 对于自动完成字段，dataAttr 存储的是 ID（如 model_id）
           // 需要查找对应的名称属性（去掉 _id 后缀）
           const nameAttr = dataAttr.replace('_id', '');
-          const nameValue = row.dataset[nameAttr] || value;
+          const nameValue = RowStore.value(row, nameAttr) || value;
           AutocompleteManager.setValue(inputId, value || '', nameValue || '');
         }
       } else {
@@ -5,6 +5,8 @@ Pytest 配置文件
 import pytest
 import os
 import sys
+from contextlib import contextmanager
+from sqlalchemy import event
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,6 +31,38 @@ def app():
         db.drop_all()
 
 
+class StatementLog(list):
+    """捕获的 SQL 语句列表，parameters 为对应语句的参数"""
+
+    def __init__(self):
+        super().__init__()
+        self.parameters = []
+
+
+@pytest.fixture
+def sql_statements(app):
+    """
+    记录发出的 SQL 语句
+
+    用法：with sql_statements() as statements: ...，块结束后 statements 为块内执行的语句列表
+    """
+    @contextmanager
+    def capture():
+        statements = StatementLog()
+
+        def listener(conn, cursor, statement, parameters, *args):
+            statements.append(statement)
+            statements.parameters.append(parameters)
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+    return capture
+
+
 @pytest.fixture
 def client(app):
     """创建测试客户端"""
@@ -0,0 +1,95 @@
+"""
+机车编号分配测试
+验证占用位图、空闲编号查询和修改后的失效
+"""
+import base64
+import pytest
+from models import db, Locomotive
+
+
+@pytest.fixture
+def decoders(app, sample_data):
+    """HO 比例占用 1-3、5、8-16，N 比例占用 1"""
+    numbers = [('HO', n) for n in [1, 2, 3, 5] + list(range(8, 17))] + [('N', 1)]
+    for scale, number in numbers:
+        db.session.add(Locomotive(series_id=1, power_type_id=1, model_id=1, brand_id=1,
+                                  scale=scale, decoder_number=str(number)))
+    db.session.add(Locomotive(series_id=1, power_type_id=1, model_id=1, brand_id=1, scale='HO'))
+    db.session.commit()
+
+
+class TestFreeDecoderNumbers:
+    """空闲编号接口测试"""
+
+    def test_free_numbers(self, client, decoders):
+        """测试按比例返回升序空闲编号，跳过已占满的字节"""
+        response = client.get('/api/decoder-numbers/free?scale=HO&count=5')
+        assert response.status_code == 200
+        assert response.json == {'scale': 'HO', 'numbers': ['4', '6', '7', '17', '18']}
+
+        response = client.get('/api/decoder-numbers/free?scale=N&count=2')
+        assert response.json['numbers'] == ['2', '3']
+
+    def test_start_and_unused_scale(self, client, decoders):
+        """测试起始编号和没有机车的比例"""
+        response = client.get('/api/decoder-numbers/free?scale=HO&count=3&start=9998')
+        assert response.json['numbers'] == ['9998', '9999']
+
+        response = client.get('/api/decoder-numbers/free?scale=Z&count=2')
+        assert response.json['numbers'] == ['1', '2']
+
+    def test_invalid_params(self, client, decoders):
+        """测试缺少比例或参数超出范围"""
+        assert client.get('/api/decoder-numbers/free').status_code == 400
+        assert client.get('/api/decoder-numbers/free?scale=HO&count=0').status_code == 400
+        assert client.get('/api/decoder-numbers/free?scale=HO&count=101').status_code == 400
+        assert client.get('/api/decoder-numbers/free?scale=HO&start=10000').status_code == 400
+
+    def test_cached_until_locomotive_write(self, client, decoders, sql_statements):
+        """测试位图缓存到下一次机车修改：重复请求不查询，修改提交后重建"""
+        client.get('/api/decoder-numbers/free?scale=HO')
+        with sql_statements() as statements:
+            client.get('/api/decoder-numbers/free?scale=HO')
+        assert statements == []
+
+        response = client.post('/api/locomotive/add', json={
+            'model_id': 1, 'series_id': 1, 'power_type_id': 1, 'brand_id': 1,
+            'scale': 'HO', 'locomotive_number': '0004', 'decoder_number': '4'
+        })
+        assert response.json['success'] is True
+
+        response = client.get('/api/decoder-numbers/free?scale=HO&count=1')
+        assert response.json['numbers'] == ['6']
+
+    def test_single_column_query(self, client, decoders, sql_statements):
+        """测试位图由一条只读取比例和编号两列的查询构建"""
+        from utils.decoder_numbers import reset_decoder_numbers
+
+        reset_decoder_numbers()
+        with sql_statements() as statements:
+            client.get('/api/decoder-numbers/free?scale=HO')
+        assert len(statements) == 1
+        assert statements[0].split('FROM')[0].count(',') == 1
+
+
+class TestDecoderNumberOccupancy:
+    """编号占用图接口测试"""
+
+    def test_occupancy_bitmap(self, client, decoders):
+        """测试位图第 n 位表示编号 n 已占用"""
+        response = client.get('/api/decoder-numbers/occupancy?scale=HO')
+        assert response.status_code == 200
+        assert response.json['max'] == 9999
+
+        ho = response.json['scales']['HO']
+        assert ho['used'] == 13
+        bitmap = base64.b64decode(ho['bitmap'])
+        used = [n for n in range(1, 10000) if bitmap[n >> 3] & (1 << (n & 7))]
+        assert used == [1, 2, 3, 5] + list(range(8, 17))
+
+    def test_all_scales(self, client, decoders):
+        """测试不指定比例时返回所有已有编号的比例"""
+        response = client.get('/api/decoder-numbers/occupancy')
+        scales = response.json['scales']
+        assert sorted(scales) == ['HO', 'N']
+        assert scales['N']['used'] == 1
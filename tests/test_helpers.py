@@ -1,5 +1,5 @@
 import pytest
-from utils.helpers import generate_brand_abbreviation
+from utils.helpers import generate_brand_abbreviation, normalize_name
 
 
 class TestGenerateBrandAbbreviation:
@@ -37,3 +37,24 @@ class TestGenerateBrandAbbreviation:
     def test_empty_string(self):
         """空字符串返回空"""
         assert generate_brand_abbreviation('') == ''
+
+
+class TestNormalizeName:
+    """测试名称查找键规范化"""
+
+    def test_case_and_width(self):
+        """大小写折叠，全角字母数字转半角"""
+        assert normalize_name('KATO') == 'kato'
+        assert normalize_name('ＫＡＴＯ') == 'kato'
+        assert normalize_name('ＣＲＨ３８０Ａ') == 'crh380a'
+
+    def test_whitespace(self):
+        """去除首尾空白，合并中间连续空白（含全角空格）"""
+        assert normalize_name('  百万城 ') == '百万城'
+        assert normalize_name('Piko\u3000 Expert') == 'piko expert'
+
+    def test_empty(self):
+        """空值和纯空白返回 None"""
+        assert normalize_name(None) is None
+        assert normalize_name('') is None
+        assert normalize_name('   ') is None
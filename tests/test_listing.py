@@ -0,0 +1,197 @@
+"""
+列表分页 API 测试
+验证数据库端排序、筛选和游标分页
+"""
+import pytest
+from datetime import date
+from models import db, Locomotive, CarriageSet, CarriageItem, Trainset, LocomotiveHead, Brand
+
+
+@pytest.fixture
+def list_data(app, sample_data):
+    """创建 25 台机车：价格 10-250，其中 5 台无价格，品牌交替"""
+    other = Brand(name='第二品牌', abbreviation='DEP')
+    db.session.add(other)
+    db.session.flush()
+    for i in range(25):
+        db.session.add(Locomotive(
+            model_id=1, series_id=1, power_type_id=1,
+            brand_id=1 if i % 2 == 0 else other.id,
+            scale='HO' if i < 20 else 'N',
+            locomotive_number=f'{i:04d}',
+            total_price=None if i % 5 == 4 else (i % 10 + 1) * 10,
+            purchase_date=date(2024, 1, i + 1)
+        ))
+    db.session.commit()
+    return {'other_brand_id': other.id}
+
+
+def fetch_all(client, url):
+    """沿 next_cursor 翻完所有页，返回行列表和页数"""
+    rows, pages, cursor = [], 0, None
+    while True:
+        page_url = url + (f'&after={cursor}' if cursor else '')
+        data = client.get(page_url).get_json()
+        rows.extend(data['items'])
+        pages += 1
+        if not data['has_more']:
+            assert data['next_cursor'] is None
+            return rows, pages
+        cursor = data['next_cursor']
+
+
+class TestListPagination:
+    """游标分页测试"""
+
+    def test_first_page(self, client, list_data):
+        """测试首页数据与关联名称"""
+        data = client.get('/api/locomotive/list?limit=10').get_json()
+        assert len(data['items']) == 10
+        assert data['has_more'] is True
+        assert [row['id'] for row in data['items']] == list(range(1, 11))
+        assert data['items'][0]['brand'] == '测试品牌'
+        assert data['items'][0]['purchase_date'] == '2024-01-01'
+
+    def test_walk_all_pages_by_id(self, client, list_data):
+        """测试按 id 翻页不重复不遗漏"""
+        rows, pages = fetch_all(client, '/api/locomotive/list?limit=7')
+        assert [row['id'] for row in rows] == list(range(1, 26))
+        assert pages == 4
+
+    @pytest.mark.parametrize('sort', ['total_price', '-total_price', 'purchase_date', '-purchase_date'])
+    def test_walk_all_pages_sorted(self, client, list_data, sort):
+        """测试按有重复值和空值的列翻页，顺序与整体排序一致"""
+        rows, _ = fetch_all(client, f'/api/locomotive/list?sort={sort}&limit=4')
+        assert len({row['id'] for row in rows}) == 25
+
+        field = sort.lstrip('-')
+        descending = sort.startswith('-')
+        present = [row for row in rows if row[field] is not None]
+        missing = [row for row in rows if row[field] is None]
+        assert rows == present + missing
+        expected = sorted(present, key=lambda row: (row[field], row['id']), reverse=descending)
+        assert present == expected
+        assert [row['id'] for row in missing] == sorted((row['id'] for row in missing), reverse=descending)
+
+    def test_filters(self, client, list_data):
+        """测试按品牌和比例筛选"""
+        other_id = list_data['other_brand_id']
+        rows, _ = fetch_all(client, f'/api/locomotive/list?filter[brand]={other_id}&filter[scale]=HO&limit=3')
+        assert len(rows) == 10
+        assert all(row['brand_id'] == other_id and row['scale'] == 'HO' for row in rows)
+
+        data = client.get(f'/api/locomotive/list?filter[brand]=1,{other_id}&limit=100').get_json()
+        assert len(data['items']) == 25
+
+    def test_carriage_item_count(self, client, sample_data):
+        """测试车厢套装返回车厢数量"""
+        db.session.add(CarriageSet(brand_id=1, scale='HO', items=[CarriageItem(model_id=1), CarriageItem(model_id=1)]))
+        db.session.commit()
+        data = client.get('/api/carriage/list').get_json()
+        assert data['items'][0]['item_count'] == 2
+
+    @pytest.mark.parametrize('query', [
+        'sort=color', 'limit=0', 'limit=abc', 'filter[unknown]=1', 'filter[brand]=abc', 'after=not-a-cursor'
+    ])
+    def test_invalid_params(self, client, list_data, query):
+        """测试非法参数返回 400"""
+        response = client.get(f'/api/locomotive/list?{query}')
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_filter_not_on_model(self, client):
+        """测试模型没有的筛选字段返回 400"""
+        response = client.get('/api/locomotive_head/list?filter[depot]=1')
+        assert response.status_code == 400
+
+    def test_unknown_model_type(self, client):
+        """测试未知模型类型返回 404"""
+        assert client.get('/api/unknown/list').status_code == 404
+
+    def test_page_query_count(self, client, list_data, sql_statements):
+        """测试每页查询次数固定（主查询加关联预加载）"""
+        def count(url):
+            db.session.expunge_all()
+            with sql_statements() as statements:
+                client.get(url)
+            return len(statements)
+
+        assert count('/api/locomotive/list?limit=2') == count('/api/locomotive/list?limit=20')
+
+
+@pytest.fixture
+def feed_data(list_data):
+    """在 25 台机车之外，再添加与机车购买日期和价格重叠的车厢、动车组和先头车"""
+    for i in range(6):
+        db.session.add(CarriageSet(
+            brand_id=1, scale='HO', item_number=f'C{i}',
+            total_price=None if i == 5 else (i + 1) * 10,
+            purchase_date=date(2024, 1, i * 2 + 1)
+        ))
+        db.session.add(Trainset(
+            model_id=1, brand_id=list_data['other_brand_id'], scale='N',
+            total_price=(i + 1) * 20, purchase_date=date(2024, 1, i + 1)
+        ))
+        db.session.add(LocomotiveHead(
+            brand_id=1, scale='HO', total_price=15,
+            purchase_date=date(2024, 2, i + 1)
+        ))
+    db.session.commit()
+    return list_data
+
+
+class TestCollectionFeed:
+    """藏品流水测试"""
+
+    def test_default_recent_first(self, client, feed_data):
+        """测试默认按购买日期倒序合并四类模型，并返回品牌名称"""
+        data = client.get('/api/collection?limit=5').get_json()
+        assert data['has_more'] is True
+        assert [(row['model_type'], row['purchase_date']) for row in data['items']] == [
+            ('locomotive_head', '2024-02-06'), ('locomotive_head', '2024-02-05'),
+            ('locomotive_head', '2024-02-04'), ('locomotive_head', '2024-02-03'),
+            ('locomotive_head', '2024-02-02')
+        ]
+        assert data['items'][0]['brand'] == '测试品牌'
+
+    @pytest.mark.parametrize('sort', ['total_price', '-total_price', 'purchase_date', '-purchase_date'])
+    def test_walk_all_pages_sorted(self, client, feed_data, sort):
+        """测试跨类型翻页不重复不遗漏，顺序为 (排序列, 类型, id)，空值在最后"""
+        rows, _ = fetch_all(client, f'/api/collection?sort={sort}&limit=4')
+        assert len({(row['model_type'], row['id']) for row in rows}) == 25 + 18
+
+        field = sort.lstrip('-')
+        descending = sort.startswith('-')
+        present = [row for row in rows if row[field] is not None]
+        missing = [row for row in rows if row[field] is None]
+        assert rows == present + missing
+        key = lambda row: (row[field], row['model_type'], row['id'])
+        assert present == sorted(present, key=key, reverse=descending)
+        assert missing == sorted(missing, key=lambda row: (row['model_type'], row['id']), reverse=descending)
+
+    def test_type_and_filters(self, client, feed_data):
+        """测试按类型和公共字段筛选"""
+        rows, _ = fetch_all(client, '/api/collection?type=carriage,trainset&limit=4')
+        assert {row['model_type'] for row in rows} == {'carriage', 'trainset'}
+        assert len(rows) == 12
+
+        other_id = feed_data['other_brand_id']
+        rows, _ = fetch_all(client, f'/api/collection?filter[brand]={other_id}&filter[scale]=N&limit=100')
+        assert {row['model_type'] for row in rows} == {'locomotive', 'trainset'}
+        assert all(row['brand_id'] == other_id and row['scale'] == 'N' for row in rows)
+
+    def test_single_union_query(self, client, feed_data, sql_statements):
+        """测试每页只执行一条查询"""
+        with sql_statements() as statements:
+            client.get('/api/collection?limit=10')
+        assert len(statements) == 1
+        assert statements[0].count('UNION ALL') == 3
+
+    @pytest.mark.parametrize('query', [
+        'sort=id', 'type=unknown', 'limit=0', 'filter[power_type]=1', 'after=not-a-cursor'
+    ])
+    def test_invalid_params(self, client, feed_data, query):
+        """测试非法参数和不适用于所有类型的筛选字段返回 400"""
+        response = client.get(f'/api/collection?{query}')
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
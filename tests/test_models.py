@@ -150,3 +150,98 @@ class TestBrandModel:
             saved = Brand.query.filter_by(name='新品牌').first()
             assert saved is not None
             assert saved.search_url == 'http://example.com/{query}'
+
+
+class TestNameKey:
+    """系统信息表名称查找键测试"""
+
+    def test_key_follows_name(self, app, sample_data):
+        """测试创建和改名时同步 name_key"""
+        brand = Brand(name='  ＫＡＴＯ ', abbreviation='KT')
+        db.session.add(brand)
+        db.session.commit()
+        assert brand.name_key == 'kato'
+
+        brand.name = 'Kato Hobby'
+        db.session.commit()
+        assert Brand.query.filter_by(name_key='kato hobby').one().id == brand.id
+
+    def test_unique_key_rejects_variants(self, app, sample_data):
+        """测试仅大小写或全半角不同的名称违反唯一索引"""
+        from sqlalchemy.exc import IntegrityError
+
+        db.session.add(PowerType(name='电力 '))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+    def test_same_model_name_in_different_series(self, app, sample_data):
+        """测试车型的查找键不唯一（同名车型可属于不同系列）"""
+        db.session.add(LocomotiveSeries(name='另一系列'))
+        db.session.flush()
+        existing = LocomotiveModel.query.first()
+        db.session.add(LocomotiveModel(name=existing.name.lower(), series_id=2, power_type_id=1))
+        db.session.commit()
+        assert LocomotiveModel.query.filter_by(name_key=existing.name_key).count() == 2
+
+    def test_lookup_helpers_use_key(self, app, sample_data, sql_statements):
+        """测试导入的名称解析按查找键匹配并走索引"""
+        from routes.api import find_id_by_name, resolve_foreign_key, check_unique_conflict
+
+        assert find_id_by_name(Brand, ' 测试品牌') == 1
+        assert resolve_foreign_key('brand', '测试品牌　') == 1
+        assert check_unique_conflict(Merchant, 'name', '测试商家 ').id == 1
+
+        with sql_statements() as statements:
+            find_id_by_name(Depot, 'ABC')
+
+        statement, parameters = statements[-1], statements.parameters[-1]
+        connection = db.session.connection().connection
+        plan = ' '.join(row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters))
+        assert 'ix_depot_name_key' in plan
+
+    def test_upgrade_backfills_keys(self, app, sample_data):
+        """测试已有数据库补建 name_key 时回填，规范化后重名的行只保留 id 最小的一行"""
+        from sqlalchemy import text
+        from utils.schema import upgrade_schema
+
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_merchant_name_key'))
+            connection.execute(text('ALTER TABLE merchant DROP COLUMN name_key'))
+            connection.execute(text("INSERT INTO merchant (name) VALUES ('测试商家 ')"))
+
+        upgrade_schema()
+        db.session.expire_all()
+        merchants = Merchant.query.order_by(Merchant.id).all()
+        assert [merchant.name_key for merchant in merchants] == ['测试商家', f'\t{merchants[1].id}']
+
+    def test_backfill_resolves_collisions_once(self, app, sample_data, caplog):
+        """测试规范化后重名的旧数据只处理一次：最早的行保留查找键，其余行写入占位键并只警告一次"""
+        import logging
+        from sqlalchemy import text
+        from utils.helpers import find_by_name
+        from utils.schema import backfill_name_keys
+
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO depot (name) VALUES ('ＡＢＣ'), ('abc')"))
+        abc_ids = [depot.id for depot in Depot.query.filter(Depot.name.in_(['ＡＢＣ', 'abc'])).order_by(Depot.id)]
+
+        with caplog.at_level(logging.WARNING, logger='utils.schema'):
+            assert backfill_name_keys() == 2
+        assert len([r for r in caplog.records if 'Duplicate normalized name' in r.message]) == 1
+
+        db.session.expire_all()
+        assert find_by_name(Depot, 'Abc').id == abc_ids[0]
+        assert db.session.get(Depot, abc_ids[1]).name_key == f'\t{abc_ids[1]}'
+
+        caplog.clear()
+        with caplog.at_level(logging.WARNING, logger='utils.schema'):
+            assert backfill_name_keys() == 0
+        assert caplog.records == []
+
+        # 改名后写入正常的查找键
+        db.session.get(Depot, abc_ids[1]).name = 'abc2'
+        db.session.commit()
+        assert find_by_name(Depot, 'ABC2').id == abc_ids[1]
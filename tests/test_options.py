@@ -461,3 +461,398 @@ class TestModelOptions:
 
                 model = TrainsetModel.query.filter_by(name='CR400AF').first()
                 assert model is not None
+
+
+class TestOptionCache:
+    """下拉选项缓存测试"""
+
+    def _lookup_queries(self, client, sql_statements, url):
+        """请求页面，返回查询系统信息表的 SQL 语句"""
+        with sql_statements() as statements:
+            response = client.get(url)
+            response.get_data()
+        return [sql for sql in statements if 'FROM brand' in sql or 'FROM merchant' in sql]
+
+    def test_form_page_uses_cache(self, client, sample_data, sql_statements):
+        """测试再次打开表单页面不再查询系统信息表"""
+        assert self._lookup_queries(client, sql_statements, '/locomotive-head')
+        assert self._lookup_queries(client, sql_statements, '/locomotive-head') == []
+
+    def test_records_are_plain(self, app, sample_data):
+        """测试缓存的是普通记录而非 ORM 对象"""
+        from utils.option_cache import get_options
+
+        options = get_options('brands', 'locomotive_models')
+        assert options['brands'][0]['name'] == '测试品牌'
+        assert options['locomotive_models'][0]['series_id'] == 1
+        assert get_options('brands')['brands'] is options['brands']
+
+    def test_option_routes_invalidate(self, client, sample_data):
+        """测试信息维护添加、编辑、删除后选项包返回最新选项"""
+        def brand_names():
+            return [b['name'] for b in client.get('/api/options/bundle').get_json()['options']['brands']]
+
+        brand_names()
+        client.post('/options/brand', data={'name': 'CacheBrandNew'})
+        assert 'CacheBrandNew' in brand_names()
+
+        brand_id = Brand.query.filter_by(name='CacheBrandNew').first().id
+        client.post('/api/options/brand/edit', data={'id': brand_id, 'name': 'CacheBrandRenamed', 'abbreviation': 'CBR'})
+        names = brand_names()
+        assert 'CacheBrandRenamed' in names and 'CacheBrandNew' not in names
+
+        client.post(f'/options/brand/delete/{brand_id}')
+        assert 'CacheBrandRenamed' not in brand_names()
+
+    def test_explicit_invalidate(self, app, sample_data):
+        """测试绕过会话的修改在显式清除缓存后可见"""
+        from sqlalchemy import text
+        from utils.option_cache import get_options, invalidate_options
+
+        get_options('merchants')
+        with db.engine.begin() as connection:
+            connection.execute(text("INSERT INTO merchant (name) VALUES ('进程外商家')"))
+        assert '进程外商家' not in [m['name'] for m in get_options('merchants')['merchants']]
+
+        invalidate_options()
+        assert '进程外商家' in [m['name'] for m in get_options('merchants')['merchants']]
+
+
+class TestOptionBundle:
+    """下拉选项包测试"""
+
+    def test_bundle_content(self, client, sample_data):
+        """测试选项包包含全部选项键和记录字段"""
+        data = client.get('/api/options/bundle').get_json()
+        assert data['version']
+        assert data['options']['brands'][0]['name'] == '测试品牌'
+        assert data['options']['locomotive_models'][0]['power_type_id'] == 1
+        assert set(data['options']) >= {'power_types', 'merchants', 'carriage_series', 'trainset_models'}
+
+    def test_versioned_url_cache_headers(self, client, sample_data):
+        """测试带当前版本的地址可长期缓存，其他请求需重新验证"""
+        version = client.get('/api/options/bundle').get_json()['version']
+
+        response = client.get(f'/api/options/bundle?v={version}')
+        assert 'immutable' in response.headers['Cache-Control']
+        assert response.headers['ETag'] == f'"{version}"'
+
+        response = client.get('/api/options/bundle?v=old')
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+    def test_if_none_match(self, client, sample_data):
+        """测试 If-None-Match 命中返回 304，选项变化后返回新内容"""
+        etag = client.get('/api/options/bundle').headers['ETag']
+        response = client.get('/api/options/bundle', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+
+        client.post('/options/merchant', data={'name': '新商家'})
+        response = client.get('/api/options/bundle', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_page_references_bundle(self, client, sample_data):
+        """测试表单页面引用带版本的选项包，不再内联选项数组"""
+        version = client.get('/api/options/bundle').get_json()['version']
+        html = client.get('/locomotive').get_data(as_text=True)
+        assert f'/api/options/bundle?v={version}' in html
+        assert 'window.locomotiveSeriesData = [' not in html
+        assert 'SS系列' not in html
+
+
+@pytest.fixture
+def autocomplete_brands(app):
+    """创建一组用于自动完成的品牌"""
+    for name, abbreviation in [
+        ('百万城', 'BWC'), ('长城', 'CC'), ('百城', 'BC2'), ('KATO', 'KATO'), ('Bachmann', 'BAC')
+    ]:
+        db.session.add(Brand(name=name, abbreviation=abbreviation))
+    db.session.commit()
+
+
+class TestAutocomplete:
+    """自动完成接口测试"""
+
+    def names(self, client, query, limit=None):
+        url = f'/api/autocomplete/brand?q={query}' + (f'&limit={limit}' if limit else '')
+        return [item['name'] for item in client.get(url).get_json()['items']]
+
+    def test_pinyin_initials(self, client, autocomplete_brands):
+        """测试拼音首字母查询"""
+        assert self.names(client, 'bwc') == ['百万城']
+        assert self.names(client, 'BW') == ['百万城']
+
+    def test_prefix_before_initials_and_infix(self, client, autocomplete_brands):
+        """测试名称前缀优先，其次拼音首字母和缩写，最后名称子串"""
+        assert self.names(client, 'ba') == ['Bachmann']
+        assert self.names(client, 'b') == ['Bachmann', '百城', '百万城']
+        assert self.names(client, '百') == ['百万城', '百城']
+        assert self.names(client, '城') == ['百万城', '长城', '百城']
+
+    def test_empty_query_and_limit(self, client, autocomplete_brands):
+        """测试空查询按名称顺序返回，limit 限制条数"""
+        assert self.names(client, '', limit=2) == ['Bachmann', 'KATO']
+        assert len(self.names(client, '')) == 5
+
+    def test_incremental_update(self, client, autocomplete_brands, monkeypatch):
+        """测试信息维护修改后索引增量更新，不重新构建"""
+        import utils.autocomplete as autocomplete
+        self.names(client, '')
+
+        def fail(table):
+            raise AssertionError('不应重建索引')
+        monkeypatch.setattr(autocomplete, '_build_index', fail)
+
+        client.post('/options/brand', data={'name': '浩瀚'})
+        assert self.names(client, 'hh') == ['浩瀚']
+
+        brand_id = Brand.query.filter_by(name='浩瀚').first().id
+        client.post('/api/options/brand/edit', data={'id': brand_id, 'name': '深东', 'abbreviation': 'SD'})
+        assert self.names(client, 'hh') == []
+        assert self.names(client, 'sd') == ['深东']
+
+        client.post(f'/options/brand/delete/{brand_id}')
+        assert self.names(client, 'sd') == []
+
+    def test_bulk_change_rebuilds(self, client, autocomplete_brands):
+        """测试批量 SQL 修改后整表重建"""
+        assert self.names(client, 'kato') == ['KATO']
+        Brand.query.filter_by(name='KATO').delete()
+        db.session.commit()
+        assert self.names(client, 'kato') == []
+
+    def test_invalid_params(self, client):
+        """测试未知表和非法 limit"""
+        assert client.get('/api/autocomplete/unknown?q=a').status_code == 404
+        assert client.get('/api/autocomplete/brand?limit=0').status_code == 400
+        assert client.get('/api/autocomplete/brand?limit=1000').status_code == 400
+
+
+class TestOptionList:
+    """信息维护分页列表测试"""
+
+    def test_page_shell_without_lookup_queries(self, client, sample_data, sql_statements):
+        """测试信息维护页面不查询任何系统信息表"""
+        with sql_statements() as statements:
+            html = client.get('/options').get_data(as_text=True)
+        assert statements == []
+        assert '测试品牌' not in html
+        assert 'data-option-type="brand"' in html
+
+    def test_rows_with_usage_counts(self, client, sample_data):
+        """测试行数据附带关联名称和被引用次数"""
+        from models import Locomotive
+        db.session.add_all([Locomotive(model_id=1, brand_id=1, scale='HO') for _ in range(2)])
+        db.session.commit()
+
+        brand = client.get('/api/options/brand/list').get_json()['items'][0]
+        assert (brand['name'], brand['abbreviation'], brand['usage_count']) == ('测试品牌', 'CSP', 2)
+
+        model = client.get('/api/options/locomotive_model/list').get_json()['items'][0]
+        assert model['series'] == 'SS系列'
+        assert model['power_type'] == '电力'
+        assert model['usage_count'] == 2
+
+        # 系列只被车型引用（新增的机车未指定系列）
+        series = client.get('/api/options/locomotive_series/list').get_json()['items'][0]
+        assert series['usage_count'] == 1
+
+    def test_paging_and_search(self, client, app):
+        """测试游标分页不重复不遗漏，搜索匹配名称任意位置和品牌缩写"""
+        for i in range(5):
+            db.session.add(Merchant(name=f'商家{i}'))
+        db.session.add(Merchant(name='100%模型'))
+        db.session.commit()
+
+        names, after = [], None
+        while True:
+            url = '/api/options/merchant/list?limit=2' + (f'&after={after}' if after else '')
+            data = client.get(url).get_json()
+            names.extend(item['name'] for item in data['items'])
+            after = data['next_cursor']
+            if not data['has_more']:
+                break
+        assert names == [f'商家{i}' for i in range(5)] + ['100%模型']
+
+        data = client.get('/api/options/merchant/list?q=家3').get_json()
+        assert [item['name'] for item in data['items']] == ['商家3']
+        data = client.get('/api/options/merchant/list?q=%25').get_json()
+        assert [item['name'] for item in data['items']] == ['100%模型']
+
+        db.session.add(Brand(name='Bachmann', abbreviation='BAC'))
+        db.session.commit()
+        data = client.get('/api/options/brand/list?q=bac').get_json()
+        assert [item['name'] for item in data['items']] == ['Bachmann']
+
+    def test_invalid_params(self, client):
+        """测试未知类型和非法参数"""
+        assert client.get('/api/options/unknown/list').status_code == 404
+        assert client.get('/api/options/brand/list?limit=0').status_code == 400
+        assert client.get('/api/options/brand/list?after=bad').status_code == 400
+
+
+class TestOptionUsage:
+    """引用检查与引用次数测试"""
+
+    def test_delete_in_use_uses_exists(self, client, sample_data, sql_statements):
+        """测试删除被引用的系列时以 EXISTS 检查，不加载引用行"""
+        with sql_statements() as statements:
+            response = client.post('/options/locomotive_series/delete/1')
+        assert '正在被使用' in response.get_data(as_text=True)
+        assert db.session.get(LocomotiveSeries, 1) is not None
+        assert any('EXISTS' in sql for sql in statements)
+        assert not any(sql.lstrip().startswith('SELECT locomotive_model.') for sql in statements)
+
+    def test_delete_unused(self, client, sample_data):
+        """测试未被引用的系列可以删除"""
+        db.session.add(LocomotiveSeries(name='未使用系列'))
+        db.session.commit()
+        series_id = LocomotiveSeries.query.filter_by(name='未使用系列').first().id
+
+        client.post(f'/options/locomotive_series/delete/{series_id}')
+        assert db.session.get(LocomotiveSeries, series_id) is None
+
+    def test_usage_counts(self, client, sample_data):
+        """测试整表引用次数接口"""
+        from models import Locomotive, Trainset
+        db.session.add_all([Locomotive(model_id=1, brand_id=1, scale='HO') for _ in range(3)])
+        db.session.add(Trainset(model_id=1, brand_id=1, power_type_id=1, scale='HO'))
+        db.session.add(Brand(name='未使用品牌', abbreviation='WSY'))
+        db.session.commit()
+
+        assert client.get('/api/options/brand/usage').get_json() == {'usage': {'1': 4}}
+        # 动力同时被机车车型、动车组车型和动车组引用
+        assert client.get('/api/options/power_type/usage').get_json()['usage']['1'] == 3
+        assert client.get('/api/options/unknown/usage').status_code == 404
+
+
+class TestOptionBatch:
+    """批量行内编辑测试"""
+
+    def test_batch_edit_and_delete(self, client, sample_data):
+        """测试跨类型批量编辑和删除只提交一次"""
+        from sqlalchemy import event
+
+        db.session.add_all([Merchant(name='商家A'), Merchant(name='商家B'), ChipModel(name='待删芯片')])
+        db.session.commit()
+        merchant_a = Merchant.query.filter_by(name='商家A').first().id
+        merchant_b = Merchant.query.filter_by(name='商家B').first().id
+        chip_id = ChipModel.query.filter_by(name='待删芯片').first().id
+
+        commits = []
+        listener = lambda session: commits.append(session)
+        event.listen(db.session, 'after_commit', listener)
+        try:
+            response = client.post('/api/options/batch', json={
+                'edits': [
+                    {'option_type': 'merchant', 'id': merchant_a, 'fields': {'name': '商家A2', 'website': 'https://a.example'}},
+                    {'option_type': 'merchant', 'id': merchant_b, 'fields': {'name': '商家B2'}},
+                    {'option_type': 'brand', 'id': 1, 'fields': {'name': '测试品牌2', 'abbreviation': 'CSP2'}}
+                ],
+                'deletes': [{'option_type': 'chip_model', 'id': chip_id}]
+            })
+        finally:
+            event.remove(db.session, 'after_commit', listener)
+
+        assert response.status_code == 200
+        assert response.get_json()['edited'] == 3
+        assert len(commits) == 1
+        db.session.expire_all()
+        assert db.session.get(Merchant, merchant_a).website == 'https://a.example'
+        assert db.session.get(Merchant, merchant_b).name == '商家B2'
+        assert db.session.get(Brand, 1).abbreviation == 'CSP2'
+        assert db.session.get(ChipModel, chip_id) is None
+
+    def test_abbreviation_conflicts_reject_whole_batch(self, client, sample_data):
+        """测试缩写与批外品牌冲突或批内重复时整批不生效"""
+        db.session.add_all([
+            Brand(name='品牌X', abbreviation='PX'), Brand(name='品牌Y', abbreviation='PY'), Brand(name='品牌Z', abbreviation='PZ')
+        ])
+        db.session.commit()
+        x_id, y_id, z_id = [Brand.query.filter_by(name=name).first().id for name in ('品牌X', '品牌Y', '品牌Z')]
+
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'merchant', 'id': 1, 'fields': {'name': '改名商家'}},
+            {'option_type': 'brand', 'id': x_id, 'fields': {'name': '品牌X', 'abbreviation': 'CSP'}},
+            {'option_type': 'brand', 'id': y_id, 'fields': {'name': '品牌Y', 'abbreviation': 'NEW'}},
+            {'option_type': 'brand', 'id': z_id, 'fields': {'name': '品牌Z', 'abbreviation': 'NEW'}}
+        ]})
+        assert response.status_code == 400
+        errors = response.get_json()['errors']
+        assert {(e['index'], e['field']) for e in errors} == {(1, 'abbreviation'), (3, 'abbreviation')}
+
+        db.session.expire_all()
+        assert db.session.get(Merchant, 1).name == '测试商家'
+        assert db.session.get(Brand, x_id).abbreviation == 'PX'
+
+        # 批内编辑的品牌让出的缩写可被其他品牌使用
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'brand', 'id': 1, 'fields': {'name': '测试品牌', 'abbreviation': 'CSP9'}},
+            {'option_type': 'brand', 'id': x_id, 'fields': {'name': '品牌X', 'abbreviation': 'CSP'}}
+        ]})
+        assert response.status_code == 200
+
+    def test_name_conflicts_reject_whole_batch(self, client, sample_data):
+        """测试改名后名称查找键与已有记录或批内其他记录冲突时返回 400，不触发唯一索引错误"""
+        db.session.add_all([Depot(name='机务段A'), Depot(name='机务段B')])
+        db.session.commit()
+        a_id, b_id = [Depot.query.filter_by(name=name).first().id for name in ('机务段A', '机务段B')]
+
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'depot', 'id': a_id, 'fields': {'name': 'Ｄｅｐｏｔ'}},
+            {'option_type': 'depot', 'id': b_id, 'fields': {'name': 'depot '}},
+            {'option_type': 'merchant', 'id': 1, 'fields': {'name': ' 测试品牌'}},
+            {'option_type': 'brand', 'id': 1, 'fields': {'name': '测试品牌'}}
+        ]})
+        assert response.status_code == 400
+        errors = response.get_json()['errors']
+        assert [(e['index'], e['field']) for e in errors] == [(1, 'name')]
+
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'depot', 'id': a_id, 'fields': {'name': '机务段b'}}
+        ]})
+        assert response.status_code == 400
+        assert response.get_json()['errors'][0] == {'index': 0, 'field': 'name', 'message': "名称 '机务段b' 已被其他记录使用"}
+
+        db.session.expire_all()
+        assert db.session.get(Depot, a_id).name == '机务段A'
+        assert db.session.get(Merchant, 1).name == '测试商家'
+
+    def test_invalid_operations(self, client, sample_data):
+        """测试未知类型、不存在的记录、重复记录和被占用的删除"""
+        response = client.post('/api/options/batch', json={'edits': [{'option_type': 'unknown', 'id': 1}]})
+        assert response.status_code == 400
+
+        response = client.post('/api/options/batch', json={
+            'edits': [{'option_type': 'depot', 'id': 999, 'fields': {'name': 'x'}}, {'option_type': 'depot', 'id': 1, 'fields': {'name': 'a'}}],
+            'deletes': [{'option_type': 'depot', 'id': 1}, {'option_type': 'locomotive_series', 'id': 1}]
+        })
+        assert response.status_code == 400
+        assert [e['index'] for e in response.get_json()['errors']] == [0, 2, 3]
+        assert client.post('/api/options/batch', json={}).status_code == 400
+
+    def test_carriage_model_type_field(self, client, sample_data):
+        """测试车厢车型自身的 type 字段不与选项类型混淆：未提交时保留，提交时可修改"""
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'carriage_model', 'id': 1, 'fields': {'name': 'YZ22B', 'series_id': '1'}}
+        ]})
+        assert response.status_code == 200
+        db.session.expire_all()
+        carriage_model = db.session.get(CarriageModel, 1)
+        assert (carriage_model.name, carriage_model.type) == ('YZ22B', '客车')
+
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'carriage_model', 'id': 1, 'fields': {'name': 'YZ22B', 'series_id': '1', 'type': '货车'}}
+        ]})
+        assert response.status_code == 200
+        db.session.expire_all()
+        assert db.session.get(CarriageModel, 1).type == '货车'
+
+    def test_fields_must_be_object(self, client, sample_data):
+        """测试编辑操作缺少 fields 对象时拒绝"""
+        response = client.post('/api/options/batch', json={'edits': [
+            {'option_type': 'depot', 'id': 1, 'name': '新名称'}
+        ]})
+        assert response.status_code == 400
+        assert response.get_json()['errors'] == [{'index': 0, 'field': 'fields', 'message': 'fields 必须是对象'}]
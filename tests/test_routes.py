@@ -3,6 +3,18 @@
 验证页面路由和表单提交
 """
 import pytest
+import json
+import re
+
+
+def extract_row_data(html, model_type):
+    """从页面中提取内嵌的紧凑行数据"""
+    match = re.search(
+        r'<script type="application/json" class="row-data" data-model-type="%s">(.*?)</script>' % model_type,
+        html, re.S
+    )
+    assert match, f'{model_type} 页面缺少行数据'
+    return json.loads(match.group(1))
 
 
 class TestPageRoutes:
@@ -144,8 +156,8 @@ class TestCopyButtons:
         assert '复制' in html
         assert 'copyCarriage' in html
 
-    def test_locomotive_copy_data_attributes(self, client, sample_data):
-        """测试机车表格行包含复制所需的 data 属性"""
+    def test_locomotive_copy_row_data(self, client, sample_data):
+        """测试机车页面内嵌复制所需的紧凑行数据（关联以 ID 引用，名称只出现在 lookups 中）"""
         from models import db, Locomotive
 
         with client.application.app_context():
@@ -167,15 +179,32 @@ class TestCopyButtons:
         response = client.get('/locomotive')
         assert response.status_code == 200
         html = response.data.decode('utf-8')
-        # 验证关键 data 属性存在（ID 和名称属性）
-        assert 'data-model_id=' in html
-        assert 'data-model=' in html
-        assert 'data-series_id=' in html
-        assert 'data-series=' in html
-        assert 'data-brand_id=' in html
-        assert 'data-brand=' in html
-        assert 'data-item_number=' in html
-        assert 'data-purchase_date=' in html
+        # 表格行只保留定位记录所需的属性
+        assert 'data-model_type="locomotive" data-model_id=' in html
+        assert 'data-brand=' not in html
+
+        payload = extract_row_data(html, 'locomotive')
+        record = dict(zip(payload['columns'], payload['rows'][0]))
+        assert record['model_id'] == 1
+        assert record['series_id'] == 1
+        assert record['brand_id'] == 1
+        assert record['locomotive_number'] == 'DATA001'
+        assert record['item_number'] == 'ITEM001'
+        assert 'purchase_date' in record
+        assert payload['lookups']['brand'] == {'1': '测试品牌'}
+        assert payload['lookups']['model'] == {'1': 'SS4'}
+
+    def test_carriage_row_data_item_count(self, client, sample_data):
+        """测试车厢页面行数据包含车厢数量"""
+        from models import db, CarriageSet, CarriageItem
+
+        db.session.add(CarriageSet(brand_id=1, scale='HO', items=[CarriageItem(model_id=1), CarriageItem(model_id=1)]))
+        db.session.commit()
+
+        payload = extract_row_data(client.get('/carriage').data.decode('utf-8'), 'carriage')
+        record = dict(zip(payload['columns'], payload['rows'][0]))
+        assert record['item_count'] == 2
+        assert payload['lookups']['depot'] == {}
 
 
 class TestLocomotiveHeadRoutes:
@@ -212,3 +241,203 @@ class TestTrainsetCRUD:
         # 检查表单字段
         assert b'model_id' in response.data
         assert b'formation' in response.data  # 编组
+
+
+class TestListPageQueryCount:
+    """列表页查询次数测试（预加载关联后查询次数不随行数增长）"""
+
+    def _seed(self, row_count):
+        """为每种模型创建 row_count 行数据，每行引用互不相同的关联对象"""
+        from models import db, Locomotive, CarriageSet, CarriageItem, Trainset, LocomotiveHead
+        from models import Brand, Depot, Merchant, ChipInterface, ChipModel, PowerType
+        from models import LocomotiveSeries, LocomotiveModel, CarriageSeries, CarriageModel
+        from models import TrainsetSeries, TrainsetModel
+
+        offset = Brand.query.count()
+        for i in range(offset, offset + row_count):
+            brand = Brand(name=f'品牌{i}', abbreviation=f'B{i}')
+            depot = Depot(name=f'机务段{i}')
+            merchant = Merchant(name=f'商家{i}')
+            power_type = PowerType(name=f'动力{i}')
+            chip_interface = ChipInterface(name=f'接口{i}')
+            chip_model = ChipModel(name=f'芯片{i}')
+            loco_model = LocomotiveModel(
+                name=f'机车型号{i}', series=LocomotiveSeries(name=f'机车系列{i}'), power_type=power_type
+            )
+            carriage_model = CarriageModel(name=f'车厢型号{i}', series=CarriageSeries(name=f'车厢系列{i}'), type='客车')
+            trainset_model = TrainsetModel(
+                name=f'动车组车型{i}', series=TrainsetSeries(name=f'动车组系列{i}'), power_type=power_type
+            )
+            db.session.add_all([
+                Locomotive(
+                    series=loco_model.series, power_type=power_type, model=loco_model, brand=brand,
+                    depot=depot, chip_interface=chip_interface, chip_model=chip_model, merchant=merchant,
+                    scale='HO', locomotive_number=f'{i:04d}'
+                ),
+                Trainset(
+                    series=trainset_model.series, power_type=power_type, model=trainset_model, brand=brand,
+                    depot=depot, chip_interface=chip_interface, chip_model=chip_model, merchant=merchant,
+                    scale='HO', trainset_number=f'{i:04d}'
+                ),
+                CarriageSet(
+                    series=carriage_model.series, brand=brand, depot=depot, merchant=merchant, scale='HO',
+                    items=[CarriageItem(model=carriage_model, car_number=f'{i}-{n}') for n in range(3)]
+                ),
+                LocomotiveHead(model=trainset_model, brand=brand, merchant=merchant, scale='HO')
+            ])
+        db.session.commit()
+
+    def _count_queries(self, client, sql_statements, url):
+        """统计渲染页面发出的 SQL 语句数"""
+        from models import db
+
+        # 清空标识映射，避免已加载的对象掩盖懒加载查询
+        db.session.expunge_all()
+        with sql_statements() as statements:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(statements)
+
+    @pytest.mark.parametrize('url', ['/locomotive', '/trainset', '/carriage', '/locomotive-head'])
+    def test_query_count_constant(self, client, sql_statements, url):
+        """测试列表页查询次数与行数无关"""
+        self._seed(2)
+        small = self._count_queries(client, sql_statements, url)
+        self._seed(20)
+        large = self._count_queries(client, sql_statements, url)
+        assert small == large
+
+
+class TestListStreaming:
+    """列表页流式渲染测试"""
+
+    @pytest.mark.parametrize('url', ['/locomotive', '/trainset', '/carriage', '/locomotive-head'])
+    def test_list_page_streamed(self, client, url):
+        """测试列表页以流式响应返回"""
+        response = client.get(url, buffered=False)
+        assert response.status_code == 200
+        assert response.is_streamed
+        response.close()
+
+    def test_batches_cover_all_rows(self, app, sample_data):
+        """测试分批读取按 id 顺序覆盖全部行，每批一段行数据"""
+        from models import db, Locomotive
+        from utils.query_options import iter_list_batches
+
+        db.session.add_all([Locomotive(model_id=1, brand_id=1, scale='HO') for _ in range(7)])
+        db.session.commit()
+
+        batches = list(iter_list_batches(Locomotive, batch_size=3))
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert [loco.id for batch in batches for loco in batch] == list(range(1, 8))
+
+    def test_multi_batch_page(self, client, sample_data, monkeypatch):
+        """测试多批渲染时每批输出一段行数据，合并后包含全部行"""
+        from models import db, Locomotive
+        from utils import query_options
+
+        monkeypatch.setattr(query_options, 'LIST_BATCH_SIZE', 2)
+        db.session.add_all([Locomotive(model_id=1, brand_id=1, scale='HO') for _ in range(5)])
+        db.session.commit()
+
+        html = client.get('/locomotive').data.decode('utf-8')
+        payloads = re.findall(r'<script type="application/json" class="row-data" data-model-type="locomotive">(.*?)</script>', html, re.S)
+        assert len(payloads) == 3
+        assert sum(len(json.loads(payload)['rows']) for payload in payloads) == 5
+        assert html.count('data-model_type="locomotive" data-model_id=') == 5
+
+
+class TestRowFragmentCache:
+    """列表行片段缓存测试"""
+
+    def _spy(self):
+        """记录调用次数的行渲染函数"""
+        calls = []
+
+        def macro(obj):
+            calls.append(obj.id)
+            return f'<tr>{obj.id}</tr>'
+        return macro, calls
+
+    def test_unchanged_row_not_rerendered(self, app, sample_data):
+        """测试行数据未变化时复用缓存，修改后只重新渲染该行"""
+        from models import db, Locomotive
+        from utils.fragment_cache import render_row
+
+        first = Locomotive(model_id=1, brand_id=1, scale='HO', color='红')
+        second = Locomotive(model_id=1, brand_id=1, scale='HO', color='蓝')
+        db.session.add_all([first, second])
+        db.session.commit()
+        macro, calls = self._spy()
+
+        for _ in range(2):
+            for loco in (first, second):
+                assert str(render_row('locomotive', loco, macro)) == f'<tr>{loco.id}</tr>'
+        assert calls == [first.id, second.id]
+
+        second.color = '绿'
+        db.session.commit()
+        render_row('locomotive', first, macro)
+        render_row('locomotive', second, macro)
+        assert calls == [first.id, second.id, second.id]
+
+    def test_lookup_change_invalidates(self, app, sample_data):
+        """测试系统信息修改后所有行重新渲染"""
+        from models import db, Locomotive, Brand
+        from utils.fragment_cache import render_row
+
+        loco = Locomotive(model_id=1, brand_id=1, scale='HO')
+        db.session.add(loco)
+        db.session.commit()
+        macro, calls = self._spy()
+
+        render_row('locomotive', loco, macro)
+        db.session.get(Brand, 1).name = '改名品牌'
+        db.session.commit()
+        render_row('locomotive', loco, macro)
+        assert len(calls) == 2
+
+    def test_core_change_keeps_other_fragments(self, app, sample_data):
+        """测试核心表修改不影响其他行的缓存"""
+        from models import db, Locomotive, Trainset
+        from utils.fragment_cache import render_row
+
+        loco = Locomotive(model_id=1, brand_id=1, scale='HO')
+        db.session.add(loco)
+        db.session.commit()
+        macro, calls = self._spy()
+
+        render_row('locomotive', loco, macro)
+        db.session.add(Trainset(model_id=1, brand_id=1, scale='HO'))
+        db.session.commit()
+        render_row('locomotive', loco, macro)
+        assert len(calls) == 1
+
+    def test_carriage_item_count_invalidates(self, app, sample_data):
+        """测试车厢数变化后套装行重新渲染"""
+        from models import db, CarriageSet, CarriageItem
+        from utils.fragment_cache import render_row
+
+        carriage_set = CarriageSet(brand_id=1, scale='HO', items=[CarriageItem(model_id=1)])
+        db.session.add(carriage_set)
+        db.session.commit()
+        macro, calls = self._spy()
+
+        render_row('carriage', carriage_set, macro)
+        carriage_set.items.append(CarriageItem(model_id=1))
+        db.session.commit()
+        render_row('carriage', carriage_set, macro)
+        assert len(calls) == 2
+
+    def test_page_shows_renamed_lookup(self, client, sample_data):
+        """测试修改品牌名称后列表页显示新名称"""
+        from models import db, Locomotive, Brand
+
+        db.session.add(Locomotive(model_id=1, brand_id=1, scale='HO'))
+        db.session.commit()
+        assert '测试品牌' in client.get('/locomotive').data.decode('utf-8')
+
+        db.session.get(Brand, 1).name = '新品牌名'
+        db.session.commit()
+        html = client.get('/locomotive').data.decode('utf-8')
+        assert '<td>新品牌名</td>' in html
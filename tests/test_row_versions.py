@@ -0,0 +1,176 @@
+"""
+行版本与增量同步测试
+验证核心表行版本分配、删除记录以及 /api/<model_type>/changes 接口
+"""
+import pytest
+from sqlalchemy import text
+from models import db, Locomotive, CarriageSet, CarriageItem, RowTombstone
+from utils.row_versions import current_version
+
+
+@pytest.fixture
+def versioned_data(app, sample_data):
+    """创建 3 台机车和 1 套含两节车厢的车厢套装"""
+    for i in range(3):
+        db.session.add(Locomotive(model_id=1, brand_id=1, scale='HO', locomotive_number=f'{i:04d}'))
+    carriage_set = CarriageSet(brand_id=1, scale='HO', item_number='C1')
+    carriage_set.items = [CarriageItem(model_id=1, car_number='1'), CarriageItem(model_id=1, car_number='2')]
+    db.session.add(carriage_set)
+    db.session.commit()
+    return {'carriage_set_id': carriage_set.id}
+
+
+def sync_all(client, model_type, since=0, epoch=None, limit=500):
+    """沿 version 拉取全部变更，返回变更行、删除 ID 和最终位置"""
+    changed, deleted = [], []
+    while True:
+        url = f'/api/{model_type}/changes?since={since}&limit={limit}'
+        data = client.get(url + (f'&epoch={epoch}' if epoch else '')).get_json()
+        assert data['reset'] is False
+        changed.extend(data['changed'])
+        deleted.extend(data['deleted'])
+        since, epoch = data['version'], data['epoch']
+        if not data['has_more']:
+            return changed, deleted, since, epoch
+
+
+class TestRowVersions:
+    """行版本分配测试"""
+
+    def test_insert_assigns_increasing_versions(self, app, versioned_data):
+        """测试新增行获得递增的版本号，计数器与最大版本一致"""
+        versions = [loco.row_version for loco in Locomotive.query.order_by(Locomotive.id)]
+        assert None not in versions
+        assert versions == sorted(versions)
+        assert len(set(versions)) == 3
+        assert current_version()[0] >= max(versions)
+        assert current_version()[1]
+
+    def test_update_bumps_version(self, app, versioned_data):
+        """测试修改行后版本号大于此前所有版本"""
+        loco = db.session.get(Locomotive, 1)
+        before = current_version()[0]
+        loco.total_price = 99
+        db.session.commit()
+        assert loco.row_version > before
+
+    def test_unmodified_flush_keeps_version(self, app, versioned_data):
+        """测试未修改的提交不分配版本"""
+        before = current_version()[0]
+        db.session.get(Locomotive, 1)
+        db.session.commit()
+        assert current_version()[0] == before
+
+    def test_delete_writes_tombstone(self, app, versioned_data):
+        """测试删除行写入删除记录"""
+        db.session.delete(db.session.get(Locomotive, 2))
+        db.session.commit()
+        tombstone = RowTombstone.query.one()
+        assert (tombstone.model_type, tombstone.row_id) == ('locomotive', 2)
+        assert tombstone.row_version == current_version()[0]
+
+    def test_item_change_bumps_set(self, app, versioned_data):
+        """测试车厢增删改时所属套装版本递增，且不单独写删除记录"""
+        carriage_set = db.session.get(CarriageSet, versioned_data['carriage_set_id'])
+        before = carriage_set.row_version
+
+        carriage_set.items[0].color = '绿'
+        db.session.commit()
+        assert carriage_set.row_version > before
+
+        before = carriage_set.row_version
+        db.session.delete(carriage_set.items[1])
+        db.session.commit()
+        assert carriage_set.row_version > before
+        assert RowTombstone.query.count() == 0
+
+        before = carriage_set.row_version
+        db.session.add(CarriageItem(set_id=carriage_set.id, model_id=1, car_number='3'))
+        db.session.commit()
+        assert carriage_set.row_version > before
+
+    def test_carriage_edit_api_bumps_set(self, client, versioned_data):
+        """测试编辑车厢套装接口替换车厢后套装版本递增"""
+        set_id = versioned_data['carriage_set_id']
+        before = db.session.get(CarriageSet, set_id).row_version
+        response = client.post(f'/api/carriage/edit/{set_id}', json={
+            'brand_id': 1, 'scale': 'HO', 'item_number': 'C1', 'model_0': 1, 'car_number_0': '9'
+        })
+        assert response.status_code == 200
+        db.session.expire_all()
+        carriage_set = db.session.get(CarriageSet, set_id)
+        assert carriage_set.row_version > before
+        assert [item.car_number for item in carriage_set.items] == ['9']
+
+    def test_upgrade_schema_adds_and_backfills(self, app, versioned_data):
+        """测试已有数据库缺少行版本列时，启动升级会补列、建索引并回填"""
+        from utils.schema import upgrade_schema
+
+        db.session.commit()
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_locomotive_row_version'))
+            connection.execute(text('ALTER TABLE locomotive DROP COLUMN row_version'))
+        before = current_version()[0]
+
+        upgrade_schema()
+        db.session.expire_all()
+        versions = [loco.row_version for loco in Locomotive.query.order_by(Locomotive.id)]
+        assert all(version > before for version in versions)
+        assert len(set(versions)) == 3
+        assert current_version()[0] >= max(versions)
+
+
+class TestChangesApi:
+    """增量同步接口测试"""
+
+    def test_full_sync(self, client, versioned_data):
+        """测试从 0 开始同步返回全部行，车厢套装附带车厢明细"""
+        changed, deleted, version, epoch = sync_all(client, 'carriage')
+        assert deleted == []
+        assert len(changed) == 1
+        assert [item['car_number'] for item in changed[0]['items']] == ['1', '2']
+        assert changed[0]['items'][0]['model'] == 'YZ22'
+        assert version == current_version()[0]
+
+    def test_incremental_sync(self, client, versioned_data):
+        """测试同步后只返回新修改和删除的行"""
+        _, _, version, epoch = sync_all(client, 'locomotive')
+
+        loco = db.session.get(Locomotive, 1)
+        loco.total_price = 50
+        db.session.delete(db.session.get(Locomotive, 3))
+        db.session.commit()
+
+        changed, deleted, new_version, _ = sync_all(client, 'locomotive', version, epoch)
+        assert [row['id'] for row in changed] == [1]
+        assert changed[0]['total_price'] == 50
+        assert deleted == [3]
+        assert new_version > version
+
+        changed, deleted, _, _ = sync_all(client, 'locomotive', new_version, epoch)
+        assert changed == [] and deleted == []
+
+    def test_paged_sync(self, client, versioned_data):
+        """测试 limit 较小时分多次拉取，不重复不遗漏"""
+        db.session.delete(db.session.get(Locomotive, 2))
+        db.session.commit()
+        changed, deleted, _, _ = sync_all(client, 'locomotive', limit=1)
+        assert [row['id'] for row in changed] == [1, 3]
+        assert deleted == [2]
+
+    def test_epoch_mismatch_resets(self, client, versioned_data):
+        """测试纪元不一致或版本超前时要求全量重新同步"""
+        _, _, version, epoch = sync_all(client, 'locomotive')
+
+        data = client.get(f'/api/locomotive/changes?since={version}&epoch=other').get_json()
+        assert data['reset'] is True
+        assert data['epoch'] == epoch
+
+        data = client.get(f'/api/locomotive/changes?since={version + 100}&epoch={epoch}').get_json()
+        assert data['reset'] is True
+
+    def test_invalid_params(self, client, versioned_data):
+        """测试非法参数和未知类型"""
+        assert client.get('/api/locomotive/changes?since=abc').status_code == 400
+        assert client.get('/api/locomotive/changes?since=-1').status_code == 400
+        assert client.get('/api/unknown/changes').status_code == 404
@@ -0,0 +1,420 @@
+"""
+统计测试
+验证数据库端聚合的统计结果
+"""
+import pytest
+from models import db, Locomotive, CarriageSet, Trainset, LocomotiveHead
+
+
+@pytest.fixture
+def stats_data(app, sample_data):
+    """创建跨四种类型的统计数据"""
+    with app.app_context():
+        db.session.add_all([
+            Locomotive(brand_id=1, merchant_id=1, scale='HO', total_price=100),
+            Locomotive(brand_id=1, scale='N', total_price=50.5),
+            CarriageSet(brand_id=1, merchant_id=1, scale='HO', total_price=200),
+            Trainset(scale='HO', merchant_id=1, total_price=None),
+            LocomotiveHead(model_id=1, brand_id=1, scale='N', total_price=30)
+        ])
+        db.session.commit()
+
+
+class TestStatisticsAggregation:
+    """统计聚合测试"""
+
+    def test_type_stats(self, client, stats_data):
+        """测试各类型数量和总价"""
+        data = client.get('/api/statistics').get_json()
+        type_stats = data['type_stats']
+        assert type_stats['locomotive'] == {'name': '机车模型', 'count': 2, 'total': 150.5}
+        assert type_stats['carriage']['count'] == 1
+        assert type_stats['carriage']['total'] == 200
+        assert type_stats['trainset']['count'] == 1
+        assert type_stats['trainset']['total'] == 0
+        assert type_stats['locomotive_head']['total'] == 30
+
+    def test_scale_stats(self, client, stats_data):
+        """测试按比例分组"""
+        data = client.get('/api/statistics').get_json()
+        assert data['scale_stats']['HO'] == {'count': 3, 'total': 300}
+        assert data['scale_stats']['N'] == {'count': 2, 'total': 80.5}
+
+    def test_brand_and_merchant_stats(self, client, stats_data):
+        """测试按品牌和商家分组，缺失关联归入未知"""
+        data = client.get('/api/statistics').get_json()
+        assert data['brand_stats']['测试品牌'] == {'count': 4, 'total': 380.5}
+        assert data['brand_stats']['未知'] == {'count': 1, 'total': 0}
+        assert data['merchant_stats']['测试商家'] == {'count': 3, 'total': 300}
+        assert data['merchant_stats']['未知'] == {'count': 2, 'total': 80.5}
+
+    def test_empty_type_stats(self, client):
+        """测试无数据时四种类型均返回零值"""
+        data = client.get('/api/statistics').get_json()
+        assert set(data['type_stats']) == {'locomotive', 'carriage', 'trainset', 'locomotive_head'}
+        assert all(stats['count'] == 0 for stats in data['type_stats'].values())
+        assert data['brand_stats'] == {}
+
+
+def summary_rows():
+    """读取汇总表为 {分组键: (数量, 总价)}"""
+    from models import CollectionSummary
+    return {
+        (row.model_type, row.scale, row.brand_id, row.merchant_id): (row.count, row.total_price)
+        for row in CollectionSummary.query.all()
+    }
+
+
+class TestCollectionSummary:
+    """汇总表增量维护测试"""
+
+    def test_insert_updates_summary(self, app, stats_data):
+        """测试新增记录在同一事务内写入汇总表"""
+        rows = summary_rows()
+        assert rows[('locomotive', 'HO', 1, 1)] == (1, 100)
+        assert rows[('trainset', 'HO', 0, 1)] == (1, 0)
+
+    def test_edit_moves_group(self, client, stats_data):
+        """测试编辑比例和价格后旧分组减少、新分组增加"""
+        response = client.post('/api/locomotive/edit/1', json={
+            'brand_id': '1', 'merchant_id': '1', 'scale': 'N', 'price': '120'
+        })
+        assert response.status_code == 200
+
+        rows = summary_rows()
+        assert ('locomotive', 'HO', 1, 1) not in rows
+        assert rows[('locomotive', 'N', 1, 1)] == (1, 120)
+
+    def test_delete_decrements_summary(self, client, stats_data):
+        """测试删除记录后分组计数归零并移除"""
+        client.post('/locomotive-head/delete/1')
+        assert ('locomotive_head', 'N', 1, 0) not in summary_rows()
+
+    def test_excel_import_updates_summary(self, client, sample_data):
+        """测试 Excel 导入的记录计入汇总表"""
+        import io
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = '先头车'
+        ws.append(['车型', '品牌', '比例', '价格'])
+        ws.append(['CRH380A', '测试品牌', 'HO', '100+50'])
+        ws.append(['CRH380A', '测试品牌', 'HO', '80'])
+        excel_file = io.BytesIO()
+        wb.save(excel_file)
+        excel_file.seek(0)
+
+        response = client.post('/api/import/excel', data={'file': (excel_file, 'test.xlsx')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 200
+        assert summary_rows()[('locomotive_head', 'HO', 1, 0)] == (2, 230)
+
+    def test_summary_matches_full_aggregation(self, app, stats_data):
+        """测试汇总表读取结果与全量聚合一致"""
+        from utils.aggregation import compute_statistics
+        from utils.collection_summary import summary_statistics
+        assert summary_statistics() == compute_statistics()
+
+    def test_rebuild_repairs_drift(self, app, runner, stats_data):
+        """测试批量删除造成偏差后，重建命令恢复一致"""
+        from utils.aggregation import compute_statistics
+        from utils.collection_summary import summary_statistics
+
+        Locomotive.query.delete()
+        db.session.commit()
+        assert summary_statistics() != compute_statistics()
+
+        result = runner.invoke(args=['rebuild-summary'])
+        assert '汇总表已重建' in result.output
+        assert summary_statistics() == compute_statistics()
+
+    def test_upgrade_schema_creates_and_fills_summary(self, app, stats_data):
+        """测试已有数据库缺少汇总表时，启动升级会建表并回填"""
+        from models import CollectionSummary
+        from utils.schema import upgrade_schema
+
+        CollectionSummary.__table__.drop(db.engine)
+        assert upgrade_schema() == ['collection_summary']
+        assert summary_rows()[('locomotive', 'HO', 1, 1)] == (1, 100)
+
+
+    def test_unknown_keys_share_one_row(self, app, stats_data):
+        """测试缺少品牌的记录归入同一分组行，分组键重复插入被唯一约束拒绝"""
+        from sqlalchemy.exc import IntegrityError
+        from models import CollectionSummary
+
+        db.session.add(Trainset(scale='HO', merchant_id=1, total_price=10))
+        db.session.commit()
+        assert CollectionSummary.query.filter_by(model_type='trainset').count() == 1
+        assert summary_rows()[('trainset', 'HO', 0, 1)] == (2, 10)
+
+        db.session.add(CollectionSummary(model_type='trainset', scale='HO', brand_id=0, merchant_id=1, count=1, total_price=0))
+        with pytest.raises(IntegrityError):
+            db.session.flush()
+        db.session.rollback()
+
+    def test_upgrade_schema_recreates_summary_without_unique_key(self, app, stats_data):
+        """测试旧版汇总表（非唯一索引、空值分组键、重复行）在启动升级时重建"""
+        from models import CollectionSummary
+        from utils.schema import upgrade_schema
+
+        CollectionSummary.__table__.drop(db.engine)
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                'CREATE TABLE collection_summary (id INTEGER PRIMARY KEY, model_type VARCHAR(20) NOT NULL, '
+                'scale VARCHAR(2) NOT NULL, brand_id INTEGER, merchant_id INTEGER, '
+                'count INTEGER NOT NULL, total_price FLOAT NOT NULL)'
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO collection_summary (model_type, scale, brand_id, merchant_id, count, total_price) "
+                "VALUES ('trainset', 'HO', NULL, 1, 1, 0), ('trainset', 'HO', NULL, 1, 1, 0)"
+            )
+
+        assert upgrade_schema() == ['collection_summary']
+        assert summary_rows()[('trainset', 'HO', 0, 1)] == (1, 0)
+        assert upgrade_schema() == []
+
+class TestStatisticsCache:
+    """统计缓存与条件请求测试"""
+
+    def test_etag_and_not_modified(self, client, stats_data):
+        """测试响应带 ETag，If-None-Match 命中返回 304"""
+        response = client.get('/api/statistics')
+        etag = response.headers['ETag']
+        assert etag
+
+        cached = client.get('/api/statistics', headers={'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+
+    def test_cache_skips_query(self, client, stats_data, monkeypatch):
+        """测试数据未变化时不再查询"""
+        import utils.collection_summary as collection_summary
+        client.get('/api/statistics')
+
+        def fail():
+            raise AssertionError('不应重新查询')
+        monkeypatch.setattr(collection_summary, 'summary_statistics', fail)
+        import routes.main
+        monkeypatch.setattr(routes.main, 'summary_statistics', fail)
+        assert client.get('/api/statistics').status_code == 200
+
+    def test_write_invalidates(self, client, stats_data):
+        """测试提交修改后版本变化，旧 ETag 失效并返回新数据"""
+        etag = client.get('/api/statistics').headers['ETag']
+
+        client.post('/locomotive-head/delete/1')
+
+        response = client.get('/api/statistics', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.get_json()['type_stats']['locomotive_head']['count'] == 0
+
+    def test_lookup_change_invalidates(self, client, stats_data):
+        """测试系统信息表修改也会使缓存失效"""
+        etag = client.get('/api/statistics').headers['ETag']
+        client.post('/api/options/brand/edit', data={'id': 1, 'name': '新品牌名', 'abbreviation': 'CSP'})
+
+        response = client.get('/api/statistics', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert '新品牌名' in response.get_json()['brand_stats']
+
+    def test_bulk_delete_invalidates(self, app, client, stats_data):
+        """测试批量删除（不经过 flush）同样递增版本"""
+        from utils.cache import data_generation
+        before = data_generation()
+        Locomotive.query.delete()
+        db.session.commit()
+        assert data_generation() != before
+
+    def test_rollback_keeps_generation(self, app, stats_data):
+        """测试回滚的修改不递增版本"""
+        from utils.cache import data_generation
+        before = data_generation()
+        db.session.add(Locomotive(brand_id=1, scale='HO'))
+        db.session.flush()
+        db.session.rollback()
+        assert data_generation() == before
+
+
+@pytest.fixture
+def dated_data(app, sample_data):
+    """创建跨年份和季度的购买记录"""
+    from datetime import date
+    with app.app_context():
+        db.session.add_all([
+            Locomotive(brand_id=1, scale='HO', total_price=100, purchase_date=date(2023, 1, 15)),
+            Locomotive(brand_id=1, scale='HO', total_price=200, purchase_date=date(2023, 3, 2)),
+            CarriageSet(brand_id=1, scale='HO', total_price=50, purchase_date=date(2023, 5, 20)),
+            Trainset(scale='N', total_price=300, purchase_date=date(2024, 11, 1)),
+            LocomotiveHead(model_id=1, brand_id=1, scale='N', total_price=80, purchase_date=date(2024, 12, 31))
+        ])
+        db.session.commit()
+
+
+class TestTimeseries:
+    """购买时间序列测试"""
+
+    def test_month_granularity(self, client, dated_data):
+        """测试按月分期"""
+        data = client.get('/api/statistics/timeseries?granularity=month').get_json()
+        periods = {entry['period']: entry for entry in data['series']}
+        assert list(periods) == ['2023-01', '2023-03', '2023-05', '2024-11', '2024-12']
+        assert periods['2023-03']['total'] == 200
+        assert periods['2024-12']['by_type'] == {'locomotive_head': {'count': 1, 'total': 80}}
+
+    def test_quarter_granularity(self, client, dated_data):
+        """测试按季度分期"""
+        data = client.get('/api/statistics/timeseries?granularity=quarter').get_json()
+        periods = {entry['period']: entry for entry in data['series']}
+        assert periods['2023-Q1']['count'] == 2
+        assert periods['2023-Q1']['total'] == 300
+        assert periods['2023-Q2']['count'] == 1
+        assert periods['2024-Q4']['count'] == 2
+
+    def test_year_with_range_and_type(self, client, dated_data):
+        """测试按年分期，并按日期范围和类型过滤"""
+        data = client.get('/api/statistics/timeseries?granularity=year&from=2023-02-01&to=2024-12-30'
+                          '&type=locomotive,trainset').get_json()
+        assert data['types'] == ['locomotive', 'trainset']
+        assert data['series'] == [
+            {'period': '2023', 'count': 1, 'total': 200, 'by_type': {'locomotive': {'count': 1, 'total': 200}}},
+            {'period': '2024', 'count': 1, 'total': 300, 'by_type': {'trainset': {'count': 1, 'total': 300}}}
+        ]
+
+    def test_invalid_arguments(self, client):
+        """测试非法参数返回 400"""
+        assert client.get('/api/statistics/timeseries?granularity=week').status_code == 400
+        assert client.get('/api/statistics/timeseries?type=unknown').status_code == 400
+        assert client.get('/api/statistics/timeseries?from=2024/01/01').status_code == 400
+
+    def test_purchase_date_indexes(self, app):
+        """测试四张核心表均有 purchase_date 索引，且升级时会补建"""
+        from sqlalchemy import inspect as sa_inspect
+        from utils.schema import create_missing_indexes
+
+        inspector = sa_inspect(db.engine)
+        for table_name in ('locomotive', 'carriage_set', 'trainset', 'locomotive_head'):
+            indexed = [index['column_names'] for index in inspector.get_indexes(table_name)]
+            assert ['purchase_date'] in indexed
+
+        db.session.execute(db.text('DROP INDEX ix_locomotive_purchase_date'))
+        db.session.commit()
+        created = create_missing_indexes(Locomotive.__table__, sa_inspect(db.engine))
+        assert created == ['ix_locomotive_purchase_date']
+
+
+class TestPivot:
+    """交叉统计测试"""
+
+    def test_brand_by_scale_sum(self, client, stats_data):
+        """测试品牌 × 比例的总价交叉表"""
+        data = client.get('/api/statistics/pivot?rows=brand&cols=scale&measure=sum').get_json()
+        assert data['rows'] == ['测试品牌', '未知']
+        assert data['cols'] == ['HO', 'N']
+        assert data['cells']['测试品牌'] == {'HO': 300, 'N': 80.5}
+        assert data['cells']['未知'] == {'HO': 0}
+        assert data['grand_total'] == 380.5
+
+    def test_count_with_type_filter(self, client, stats_data):
+        """测试数量度量和类型过滤"""
+        data = client.get('/api/statistics/pivot?rows=merchant&cols=scale&measure=count'
+                          '&types=locomotive,trainset').get_json()
+        assert data['cells'] == {'测试商家': {'HO': 2}, '未知': {'N': 1}}
+        assert data['row_totals'] == {'测试商家': 2, '未知': 1}
+        assert data['col_totals'] == {'HO': 2, 'N': 1}
+
+    def test_joined_dimensions(self, client, sample_data):
+        """测试经车型关联的维度（先头车系列）和不适用维度归入未知"""
+        from models import LocomotiveHead
+        db.session.add_all([
+            LocomotiveHead(model_id=1, brand_id=1, scale='HO', total_price=10),
+            CarriageSet(brand_id=1, series_id=1, scale='HO', total_price=20)
+        ])
+        db.session.commit()
+
+        data = client.get('/api/statistics/pivot?rows=series&cols=power_type&measure=count').get_json()
+        assert data['cells'] == {'CRH系列': {'电力': 1}, 'YZ系列': {'未知': 1}}
+
+    def test_invalid_arguments(self, client):
+        """测试非法参数返回 400"""
+        assert client.get('/api/statistics/pivot?rows=color').status_code == 400
+        assert client.get('/api/statistics/pivot?measure=avg').status_code == 400
+        assert client.get('/api/statistics/pivot?types=boat').status_code == 400
+
+
+class TestCarriageItemStatistics:
+    """单节车厢统计测试"""
+
+    def test_item_counts(self, client, sample_data):
+        """测试按车型类型、系列和灯光统计单节车厢"""
+        from models import CarriageItem, CarriageModel
+        db.session.add(CarriageModel(name='P64', series_id=1, type='货车'))
+        carriage_set = CarriageSet(brand_id=1, scale='HO', total_price=500)
+        carriage_set.items = [
+            CarriageItem(model_id=1, lighting='LED'),
+            CarriageItem(model_id=1, lighting='LED'),
+            CarriageItem(model_id=1),
+            CarriageItem(model_id=2, lighting='无')
+        ]
+        db.session.add(carriage_set)
+        db.session.commit()
+
+        data = client.get('/api/statistics/carriage-items').get_json()
+        assert data['total'] == 4
+        assert data['by_type'] == {'客车': 3, '货车': 1}
+        assert data['by_series'] == {'YZ系列': 4}
+        assert data['by_lighting'] == {'LED': 2, '无': 1, '未知': 1}
+
+    def test_single_query(self, client, app, sample_data, sql_statements):
+        """测试统计只执行一条查询，与套装和车厢数量无关"""
+        from models import CarriageItem
+        for _ in range(5):
+            carriage_set = CarriageSet(brand_id=1, scale='HO')
+            carriage_set.items = [CarriageItem(model_id=1) for _ in range(12)]
+            db.session.add(carriage_set)
+        db.session.commit()
+
+        with sql_statements() as statements:
+            data = client.get('/api/statistics/carriage-items').get_json()
+        assert data['total'] == 60
+        assert len(statements) == 1
+
+
+class TestPriceDistribution:
+    """价格分布测试"""
+
+    def test_histogram_and_percentiles(self, client, sample_data):
+        """测试直方图计数和按类型比例的分位数"""
+        db.session.add_all([Locomotive(brand_id=1, scale='HO', total_price=price) for price in range(10, 101, 10)])
+        db.session.add(Locomotive(brand_id=1, scale='N', total_price=None))
+        db.session.add(Trainset(scale='N', total_price=500))
+        db.session.commit()
+
+        data = client.get('/api/statistics/distribution?bins=5').get_json()
+        assert data['bins'] == 5
+        assert data['histogram']['edges'] == [10, 108, 206, 304, 402, 500]
+        assert data['histogram']['counts'] == [10, 0, 0, 0, 1]
+        assert data['overall']['count'] == 11
+
+        groups = {(g['model_type'], g['scale']): g for g in data['groups']}
+        assert set(groups) == {('locomotive', 'HO'), ('trainset', 'N')}
+        loco = groups[('locomotive', 'HO')]
+        assert (loco['min'], loco['max'], loco['p50']) == (10, 100, 55)
+        assert loco['p90'] == pytest.approx(91)
+        assert groups[('trainset', 'N')]['p99'] == 500
+
+    def test_type_filter_and_empty(self, client, sample_data):
+        """测试类型过滤和无数据时的结构"""
+        db.session.add(Locomotive(brand_id=1, scale='HO', total_price=100))
+        db.session.commit()
+
+        data = client.get('/api/statistics/distribution?type=trainset').get_json()
+        assert data['overall'] is None
+        assert data['histogram'] == {'edges': [], 'counts': []}
+
+    def test_invalid_bins(self, client):
+        """测试非法分箱数返回 400"""
+        assert client.get('/api/statistics/distribution?bins=0').status_code == 400
+        assert client.get('/api/statistics/distribution?bins=abc').status_code == 400
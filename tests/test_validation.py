@@ -259,3 +259,213 @@ class TestBrandValidation:
                 db.session.commit()
             except Exception:
                 db.session.rollback()
+
+
+class TestUniqueInScaleIndexes:
+    """比例内唯一校验索引测试"""
+
+    UNIQUE_IN_SCALE = [
+        (Locomotive, 'locomotive_number'),
+        (Locomotive, 'decoder_number'),
+        (Trainset, 'trainset_number'),
+        (Trainset, 'decoder_number')
+    ]
+
+    def test_rules_have_indexes(self, app):
+        """测试 SYSTEM_TABLES 中每个 unique_in_scale 字段都有 (scale, 字段) 复合索引"""
+        from sqlalchemy import inspect as sa_inspect
+        from utils.system_tables import SYSTEM_TABLES
+
+        inspector = sa_inspect(db.engine)
+        rules = [
+            (table_name, field['name'])
+            for table_name, config in SYSTEM_TABLES.items()
+            for field in config['fields'] if field.get('unique_in_scale')
+        ]
+        assert sorted(rules) == sorted((model.__tablename__, field) for model, field in self.UNIQUE_IN_SCALE)
+        for table_name, field_name in rules:
+            indexed = [index['column_names'] for index in inspector.get_indexes(table_name)]
+            assert ['scale', field_name] in indexed
+
+    @pytest.mark.parametrize('model_class,field_name', UNIQUE_IN_SCALE)
+    def test_validate_unique_uses_index(self, app, sample_data, sql_statements, model_class, field_name):
+        """测试 validate_unique 生成的查询走复合索引（EXPLAIN QUERY PLAN）"""
+        from utils.helpers import validate_unique
+
+        with sql_statements() as statements:
+            validate_unique(model_class, field_name, '0001', 'HO', exclude_id=1)
+
+        statement, parameters = statements[-1], statements.parameters[-1]
+        connection = db.session.connection().connection
+        plan = ' '.join(row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters))
+        assert f'INDEX ix_{model_class.__tablename__}_scale_{field_name}' in plan
+
+    def test_upgrade_creates_missing_indexes(self, app):
+        """测试已有数据库启动升级时补建复合索引"""
+        from sqlalchemy import inspect as sa_inspect
+        from utils.schema import upgrade_schema
+
+        db.session.execute(db.text('DROP INDEX ix_trainset_scale_trainset_number'))
+        db.session.commit()
+        upgrade_schema()
+        indexed = [index['name'] for index in sa_inspect(db.engine).get_indexes('trainset')]
+        assert 'ix_trainset_scale_trainset_number' in indexed
+
+
+class TestValidationEngine:
+    """记录校验引擎测试"""
+
+    @pytest.fixture
+    def locomotive(self, app, sample_data):
+        loco = Locomotive(series_id=1, power_type_id=1, model_id=1, brand_id=1, scale='HO',
+                          locomotive_number='0001', decoder_number='1')
+        db.session.add(loco)
+        db.session.commit()
+        return loco
+
+    def test_format_errors_before_unique_errors(self, app, locomotive):
+        """测试格式错误在前，唯一性错误使用字段显示名"""
+        from utils.validation import validate_record
+
+        errors = validate_record('locomotive', {'locomotive_number': '12', 'decoder_number': '1', 'scale': 'HO'})
+        assert errors == [
+            {'field': 'locomotive_number', 'message': '机车号格式错误：应为4-12位数字，允许前导0'},
+            {'field': 'decoder_number', 'message': '编号 1 在 HO 比例下已存在'}
+        ]
+
+    def test_all_unique_rules_in_one_query(self, app, locomotive, sql_statements):
+        """测试一条记录的全部唯一性规则只发出一条查询"""
+        from utils.validation import validate_record
+
+        with sql_statements() as statements:
+            errors = validate_record('locomotive', {
+                'locomotive_number': '0001', 'decoder_number': '1', 'scale': 'HO'
+            })
+        assert [error['field'] for error in errors] == ['locomotive_number', 'decoder_number']
+        assert len(statements) == 1
+
+    def test_scale_and_exclude_id(self, app, locomotive):
+        """测试其他比例和排除自身时无冲突"""
+        from utils.validation import validate_record
+
+        data = {'locomotive_number': '0001', 'decoder_number': '1', 'scale': 'N'}
+        assert validate_record('locomotive', data) == []
+        data['scale'] = 'HO'
+        assert validate_record('locomotive', data, exclude_id=locomotive.id) == []
+
+    def test_empty_values_skip_query(self, app, sample_data, sql_statements):
+        """测试没有需要检查的值时不访问数据库"""
+        from utils.validation import validate_record
+
+        with sql_statements() as statements:
+            errors = validate_record('locomotive', {
+                'locomotive_number': '', 'decoder_number': None, 'scale': 'HO'
+            })
+        assert errors == []
+        assert statements == []
+
+    def test_unique_name_rule(self, app, sample_data):
+        """测试系统信息表的全表唯一规则"""
+        from utils.validation import find_existing
+
+        assert find_existing('brand', {'name': '测试品牌'}).id == 1
+        assert find_existing('brand', {'name': '另一个品牌'}) is None
+
+    def test_trainset_decoder_number_conflict_in_import(self, app, sample_data):
+        """测试导入时动车组编号同样按比例内唯一检查"""
+        from routes.api import check_import_conflicts
+
+        db.session.add(Trainset(series_id=1, power_type_id=1, model_id=1, brand_id=1, scale='HO',
+                                trainset_number='380001', decoder_number='12'))
+        db.session.commit()
+
+        conflicts = check_import_conflicts({'动车组': [{'比例': 'HO', '动车号': '380002', '编号': '12'}]})
+        assert [conflict['field'] for conflict in conflicts] == ['编号']
+
+    def test_or_query_uses_indexes(self, app, locomotive, sql_statements):
+        """测试合并的 OR 查询对每个分支使用复合索引（EXPLAIN QUERY PLAN）"""
+        from utils.validation import find_conflicts
+
+        with sql_statements() as statements:
+            find_conflicts('locomotive', {
+                'locomotive_number': '0002', 'decoder_number': '2', 'scale': 'HO'
+            })
+        statement, parameters = statements[-1], statements.parameters[-1]
+        connection = db.session.connection().connection
+        plan = ' '.join(row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters))
+        assert 'ix_locomotive_scale_locomotive_number' in plan
+        assert 'ix_locomotive_scale_decoder_number' in plan
+
+
+class TestValidateBatch:
+    """批量校验 API 测试"""
+
+    @pytest.fixture
+    def locomotive(self, app, sample_data):
+        loco = Locomotive(series_id=1, power_type_id=1, model_id=1, brand_id=1, scale='HO',
+                          locomotive_number='0001', decoder_number='1')
+        db.session.add(loco)
+        db.session.commit()
+        return loco
+
+    def test_valid_batch(self, client, locomotive):
+        """测试全部通过"""
+        response = client.post('/api/locomotive/validate-batch', json=[
+            {'scale': 'HO', 'locomotive_number': '0002', 'decoder_number': '2'},
+            {'scale': 'N', 'locomotive_number': '0001', 'decoder_number': '1'}
+        ])
+        assert response.status_code == 200
+        assert response.json['valid'] is True
+        assert response.json['errors'] == []
+
+    def test_per_row_errors(self, client, locomotive):
+        """测试格式错误、批内重复和已有数据冲突按行返回"""
+        response = client.post('/api/locomotive/validate-batch', json=[
+            {'scale': 'HO', 'locomotive_number': '0001'},
+            {'scale': 'HO', 'locomotive_number': '0002', 'decoder_number': '05'},
+            {'scale': 'HO', 'locomotive_number': '0002', 'decoder_number': '3'},
+            {'scale': 'N', 'locomotive_number': '0002', 'decoder_number': '3'}
+        ])
+        assert response.status_code == 200
+        assert response.json['valid'] is False
+        assert response.json['errors'] == [
+            {'index': 0, 'field': 'locomotive_number', 'message': '机车号 0001 在 HO 比例下已存在'},
+            {'index': 1, 'field': 'decoder_number', 'message': '编号格式错误：应为1-4位数字，无前导0'},
+            {'index': 2, 'field': 'locomotive_number', 'message': '机车号 0002 与第 2 条重复'}
+        ]
+
+    def test_existing_row_not_conflict_with_itself(self, client, locomotive):
+        """测试带 id 的记录与自身不冲突"""
+        response = client.post('/api/locomotive/validate-batch', json=[
+            {'id': locomotive.id, 'scale': 'HO', 'locomotive_number': '0001', 'decoder_number': '1'}
+        ])
+        assert response.json['valid'] is True
+
+    def test_query_count_independent_of_batch_size(self, client, locomotive, sql_statements):
+        """测试每个（唯一字段, 比例）只发出一条 IN 查询"""
+        batch = [
+            {'scale': scale, 'locomotive_number': f'{1000 + i}', 'decoder_number': str(i + 2)}
+            for i in range(200) for scale in ('HO', 'N')
+        ]
+        with sql_statements() as statements:
+            response = client.post('/api/locomotive/validate-batch', json=batch)
+
+        assert response.json['valid'] is True
+        assert len(statements) == 4
+        assert all(' IN (' in statement for statement in statements)
+
+    def test_trainset_decoder_number(self, client, sample_data):
+        """测试动车组编号同样按比例内唯一检查"""
+        response = client.post('/api/trainset/validate-batch', json=[
+            {'scale': 'HO', 'trainset_number': '380001', 'decoder_number': '8'},
+            {'scale': 'HO', 'trainset_number': '380002', 'decoder_number': '8'}
+        ])
+        assert [error['field'] for error in response.json['errors']] == ['decoder_number']
+
+    def test_invalid_requests(self, client, sample_data):
+        """测试未知类型、非数组请求体和非对象元素"""
+        assert client.post('/api/unknown/validate-batch', json=[]).status_code == 404
+        assert client.post('/api/locomotive/validate-batch', json={'scale': 'HO'}).status_code == 400
+        response = client.post('/api/locomotive/validate-batch', json=[{'scale': 'HO'}, 'x'])
+        assert response.status_code == 400
+        assert response.json['errors'][0]['index'] == 1
@@ -0,0 +1,485 @@
+"""
+统计聚合模块
+在数据库端通过 UNION ALL + GROUP BY 完成统计，避免加载 ORM 对象和逐行懒加载
+"""
+from sqlalchemy import select, func, literal, union_all, cast, String, Integer, null
+from sqlalchemy.orm import aliased
+from models import db, Locomotive, CarriageSet, Trainset, LocomotiveHead, Brand, Merchant
+from models import Depot, PowerType, ChipModel, LocomotiveSeries, CarriageSeries, TrainsetSeries, TrainsetModel
+from models import CarriageItem, CarriageModel
+
+
+# 核心模型类型配置：类型键 -> (模型类, 显示名称)
+CORE_MODELS = {
+  'locomotive': (Locomotive, '机车模型'),
+  'carriage': (CarriageSet, '车厢模型'),
+  'trainset': (Trainset, '动车组模型'),
+  'locomotive_head': (LocomotiveHead, '先头车模型')
+}
+
+# 缺失关联时的分组名称
+UNKNOWN_LABEL = '未知'
+
+# 时间序列支持的粒度
+TIMESERIES_GRANULARITIES = ('month', 'quarter', 'year')
+
+# 价格分布默认和最大分箱数
+DEFAULT_HISTOGRAM_BINS = 10
+MAX_HISTOGRAM_BINS = 100
+
+# 交叉统计维度：维度键 -> 显示名称
+PIVOT_DIMENSIONS = {
+  'brand': '品牌',
+  'merchant': '商家',
+  'scale': '比例',
+  'depot': '配属',
+  'series': '系列',
+  'power_type': '动力',
+  'chip_model': '芯片型号'
+}
+
+# 各模型类型的维度来源：
+#   字符串表示本表列；元组为 (外键, 关联模型, [外键, 关联模型 ...]) 的连接路径，取末端的 name
+# 未列出的维度对该类型不适用，统一归入“未知”
+DIMENSION_SOURCES = {
+  'locomotive': {
+    'brand': ('brand_id', Brand),
+    'merchant': ('merchant_id', Merchant),
+    'scale': 'scale',
+    'depot': ('depot_id', Depot),
+    'series': ('series_id', LocomotiveSeries),
+    'power_type': ('power_type_id', PowerType),
+    'chip_model': ('chip_model_id', ChipModel)
+  },
+  'carriage': {
+    'brand': ('brand_id', Brand),
+    'merchant': ('merchant_id', Merchant),
+    'scale': 'scale',
+    'depot': ('depot_id', Depot),
+    'series': ('series_id', CarriageSeries)
+  },
+  'trainset': {
+    'brand': ('brand_id', Brand),
+    'merchant': ('merchant_id', Merchant),
+    'scale': 'scale',
+    'depot': ('depot_id', Depot),
+    'series': ('series_id', TrainsetSeries),
+    'power_type': ('power_type_id', PowerType),
+    'chip_model': ('chip_model_id', ChipModel)
+  },
+  'locomotive_head': {
+    'brand': ('brand_id', Brand),
+    'merchant': ('merchant_id', Merchant),
+    'scale': 'scale',
+    'series': ('model_id', TrainsetModel, 'series_id', TrainsetSeries),
+    'power_type': ('model_id', TrainsetModel, 'power_type_id', PowerType)
+  }
+}
+
+
+def collection_union(model_types=None, criteria=None, detail=False, order_by=None, limit=None):
+  """
+  构建四张核心表公共列的 UNION ALL 子查询
+
+  Args:
+    model_types: 要包含的模型类型列表，默认全部
+    criteria: 可选函数，接收模型类返回过滤条件列表；条件加在各分支内部，便于使用单表索引
+    detail: 是否附带 id 和 item_number 列（逐行列表使用）
+    order_by: 可选函数，接收模型类返回分支内的排序列表，与 limit 配合使用
+    limit: 每个分支最多返回的行数；各分支先按索引取前 limit 行，外层再合并排序
+
+  Returns:
+    Subquery: 包含 model_type, scale, brand_id, merchant_id, total_price, purchase_date 列的子查询
+  """
+  selects = []
+  for model_type, (model_class, _) in CORE_MODELS.items():
+    if model_types and model_type not in model_types:
+      continue
+    columns = [
+      literal(model_type).label('model_type'),
+      model_class.scale.label('scale'),
+      model_class.brand_id.label('brand_id'),
+      model_class.merchant_id.label('merchant_id'),
+      model_class.total_price.label('total_price'),
+      model_class.purchase_date.label('purchase_date')
+    ]
+    if detail:
+      columns += [model_class.id.label('id'), model_class.item_number.label('item_number')]
+    query = select(*columns)
+    if criteria:
+      query = query.where(*criteria(model_class))
+    if limit is not None:
+      if order_by:
+        query = query.order_by(*order_by(model_class))
+      # 部分数据库不允许 UNION 分支直接带 LIMIT，包一层子查询
+      query = select(query.limit(limit).subquery())
+    selects.append(query)
+  return union_all(*selects).subquery('collection')
+
+
+def grouped_collection_rows():
+  """
+  按 (类型, 比例, 品牌, 商家) 分组统计数量和总价，品牌和商家各只连接一次
+
+  Returns:
+    list: 每项为 (model_type, scale, brand_name, merchant_name, count, total) 行
+  """
+  collection = collection_union()
+  query = (
+    select(
+      collection.c.model_type,
+      collection.c.scale,
+      Brand.name.label('brand_name'),
+      Merchant.name.label('merchant_name'),
+      func.count().label('count'),
+      func.coalesce(func.sum(collection.c.total_price), 0).label('total')
+    )
+    .select_from(collection)
+    .outerjoin(Brand, Brand.id == collection.c.brand_id)
+    .outerjoin(Merchant, Merchant.id == collection.c.merchant_id)
+    .group_by(collection.c.model_type, collection.c.scale, Brand.name, Merchant.name)
+  )
+  return db.session.execute(query).all()
+
+
+def build_statistics(rows):
+  """
+  将分组结果汇总为统计 API 的响应结构
+
+  Args:
+    rows: 可迭代的 (model_type, scale, brand_name, merchant_name, count, total) 行
+
+  Returns:
+    dict: 包含 type_stats, scale_stats, brand_stats, merchant_stats 的字典
+  """
+  type_stats = {
+    model_type: {'name': display_name, 'count': 0, 'total': 0}
+    for model_type, (_, display_name) in CORE_MODELS.items()
+  }
+  scale_stats = {}
+  brand_stats = {}
+  merchant_stats = {}
+
+  def accumulate(stats, key, count, total):
+    if key not in stats:
+      stats[key] = {'count': 0, 'total': 0}
+    stats[key]['count'] += count
+    stats[key]['total'] += total
+
+  for model_type, scale, brand_name, merchant_name, count, total in rows:
+    accumulate(type_stats, model_type, count, total)
+    accumulate(scale_stats, scale, count, total)
+    accumulate(brand_stats, brand_name or UNKNOWN_LABEL, count, total)
+    accumulate(merchant_stats, merchant_name or UNKNOWN_LABEL, count, total)
+
+  return {
+    'type_stats': type_stats,
+    'scale_stats': scale_stats,
+    'brand_stats': brand_stats,
+    'merchant_stats': merchant_stats
+  }
+
+
+def compute_statistics():
+  """
+  计算汇总统计数据（单条分组查询）
+
+  Returns:
+    dict: 统计 API 响应结构
+  """
+  return build_statistics(grouped_collection_rows())
+
+
+def period_expression(column, granularity, dialect_name):
+  """
+  构建按粒度分桶的日期表达式（SQLite 使用 strftime，MySQL 使用 DATE_FORMAT）
+
+  Args:
+    column: 日期列
+    granularity: month / quarter / year
+    dialect_name: 数据库方言名称
+
+  Returns:
+    ColumnElement: 形如 2024-03、2024-Q1、2024 的字符串表达式
+  """
+  if dialect_name == 'mysql':
+    if granularity == 'month':
+      return func.date_format(column, '%Y-%m')
+    if granularity == 'quarter':
+      return func.concat(func.year(column), '-Q', func.quarter(column))
+    return func.date_format(column, '%Y')
+
+  year = func.strftime('%Y', column, type_=String)
+  if granularity == 'month':
+    return func.strftime('%Y-%m', column, type_=String)
+  if granularity == 'quarter':
+    quarter = (cast(func.strftime('%m', column), Integer) + 2) // 3
+    return year + '-Q' + cast(quarter, String)
+  return year
+
+
+def compute_timeseries(granularity, date_from=None, date_to=None, model_types=None):
+  """
+  按购买日期分期统计数量和花费（分桶和聚合均在数据库端完成）
+
+  Args:
+    granularity: month / quarter / year
+    date_from: 起始日期（含），可选
+    date_to: 结束日期（含），可选
+    model_types: 模型类型列表，默认全部
+
+  Returns:
+    list: 按期间升序的 {period, count, total, by_type} 列表
+  """
+  def criteria(model_class):
+    conditions = [model_class.purchase_date.isnot(None)]
+    if date_from:
+      conditions.append(model_class.purchase_date >= date_from)
+    if date_to:
+      conditions.append(model_class.purchase_date <= date_to)
+    return conditions
+
+  collection = collection_union(model_types, criteria)
+  dialect_name = db.session.get_bind().dialect.name
+  period = period_expression(collection.c.purchase_date, granularity, dialect_name).label('period')
+
+  rows = db.session.execute(
+    select(
+      period,
+      collection.c.model_type,
+      func.count().label('count'),
+      func.coalesce(func.sum(collection.c.total_price), 0).label('total')
+    )
+    .group_by(period, collection.c.model_type)
+    .order_by(period)
+  ).all()
+
+  series = {}
+  for period_key, model_type, count, total in rows:
+    entry = series.setdefault(period_key, {'period': period_key, 'count': 0, 'total': 0, 'by_type': {}})
+    entry['count'] += count
+    entry['total'] += total
+    entry['by_type'][model_type] = {'count': count, 'total': total}
+  return list(series.values())
+
+
+def dimension_expression(model_type, dimension):
+  """
+  构建某模型类型上某维度的分组表达式
+
+  Args:
+    model_type: 模型类型键
+    dimension: 维度键（见 PIVOT_DIMENSIONS）
+
+  Returns:
+    tuple: (表达式, [(关联别名, 连接条件), ...])
+  """
+  model_class = CORE_MODELS[model_type][0]
+  source = DIMENSION_SOURCES[model_type].get(dimension)
+  if source is None:
+    return null(), []
+  if isinstance(source, str):
+    return getattr(model_class, source), []
+
+  joins = []
+  current = model_class
+  for fk_name, target_class in zip(source[::2], source[1::2]):
+    target = aliased(target_class)
+    joins.append((target, target.id == getattr(current, fk_name)))
+    current = target
+  return current.name, joins
+
+
+def grouped_by_dimensions(model_type, dimensions):
+  """
+  对单个模型类型按多个维度分组统计（单条 GROUP BY 查询）
+
+  Args:
+    model_type: 模型类型键
+    dimensions: 维度键列表
+
+  Returns:
+    list: 每项为 (维度值..., count, total) 行
+  """
+  model_class = CORE_MODELS[model_type][0]
+  labels = []
+  query_joins = []
+  for index, dimension in enumerate(dimensions):
+    expression, joins = dimension_expression(model_type, dimension)
+    labels.append(expression.label(f'dim_{index}'))
+    query_joins.extend(joins)
+
+  query = select(
+    *labels,
+    func.count().label('count'),
+    func.coalesce(func.sum(model_class.total_price), 0).label('total')
+  ).select_from(model_class)
+  for target, onclause in query_joins:
+    query = query.outerjoin(target, onclause)
+  query = query.group_by(*labels)
+  return db.session.execute(query).all()
+
+
+def _sort_labels(labels):
+  """维度值排序，未知放在最后"""
+  return sorted(labels, key=lambda label: (label == UNKNOWN_LABEL, str(label)))
+
+
+def compute_pivot(row_dimension, col_dimension, measure='sum', model_types=None):
+  """
+  计算两个维度的交叉统计表（每种模型类型一条分组查询）
+
+  Args:
+    row_dimension: 行维度键
+    col_dimension: 列维度键
+    measure: sum（总价）或 count（数量）
+    model_types: 模型类型列表，默认全部
+
+  Returns:
+    dict: 包含 rows, cols, cells, row_totals, col_totals, grand_total 的字典
+  """
+  value_index = 3 if measure == 'sum' else 2
+  cells = {}
+  row_totals = {}
+  col_totals = {}
+  grand_total = 0
+
+  for model_type in model_types or CORE_MODELS:
+    for row in grouped_by_dimensions(model_type, [row_dimension, col_dimension]):
+      row_key = row[0] if row[0] is not None else UNKNOWN_LABEL
+      col_key = row[1] if row[1] is not None else UNKNOWN_LABEL
+      value = row[value_index]
+      row_cells = cells.setdefault(row_key, {})
+      row_cells[col_key] = row_cells.get(col_key, 0) + value
+      row_totals[row_key] = row_totals.get(row_key, 0) + value
+      col_totals[col_key] = col_totals.get(col_key, 0) + value
+      grand_total += value
+
+  return {
+    'rows': _sort_labels(row_totals),
+    'cols': _sort_labels(col_totals),
+    'cells': cells,
+    'row_totals': row_totals,
+    'col_totals': col_totals,
+    'grand_total': grand_total
+  }
+
+
+def compute_carriage_item_statistics():
+  """
+  按单节车厢统计（车型类型、车厢系列、灯光），一条连接 carriage_item 和 carriage_model 的分组查询
+
+  Returns:
+    dict: 包含 total, by_type, by_series, by_lighting 的字典，各分组值为车厢数量
+  """
+  rows = db.session.execute(
+    select(
+      CarriageModel.type,
+      CarriageSeries.name,
+      CarriageItem.lighting,
+      func.count().label('count')
+    )
+    .select_from(CarriageItem)
+    .outerjoin(CarriageModel, CarriageModel.id == CarriageItem.model_id)
+    .outerjoin(CarriageSeries, CarriageSeries.id == CarriageModel.series_id)
+    .group_by(CarriageModel.type, CarriageSeries.name, CarriageItem.lighting)
+  ).all()
+
+  result = {'total': 0, 'by_type': {}, 'by_series': {}, 'by_lighting': {}}
+  for car_type, series_name, lighting, count in rows:
+    result['total'] += count
+    for key, label in [('by_type', car_type), ('by_series', series_name), ('by_lighting', lighting)]:
+      label = label or UNKNOWN_LABEL
+      result[key][label] = result[key].get(label, 0) + count
+  return result
+
+
+def percentile(sorted_values, fraction):
+  """
+  计算已排序序列的分位数（线性插值）
+
+  Args:
+    sorted_values: 升序数值列表（非空）
+    fraction: 分位（0-1）
+
+  Returns:
+    float: 分位数
+  """
+  position = (len(sorted_values) - 1) * fraction
+  lower = int(position)
+  upper = min(lower + 1, len(sorted_values) - 1)
+  return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize_prices(sorted_values):
+  """汇总一组已排序价格的数量、极值和分位数"""
+  return {
+    'count': len(sorted_values),
+    'min': sorted_values[0],
+    'max': sorted_values[-1],
+    'p50': percentile(sorted_values, 0.5),
+    'p90': percentile(sorted_values, 0.9),
+    'p99': percentile(sorted_values, 0.99)
+  }
+
+
+def build_histogram(values, low, high, bins):
+  """
+  等宽直方图
+
+  Args:
+    values: 数值可迭代对象
+    low: 最小值
+    high: 最大值
+    bins: 分箱数
+
+  Returns:
+    dict: {edges: 分箱边界（bins + 1 个）, counts: 各箱数量}
+  """
+  width = (high - low) / bins if high > low else 0
+  edges = [low + width * i for i in range(bins)] + [high]
+  counts = [0] * bins
+  for value in values:
+    index = int((value - low) / width) if width else 0
+    counts[min(index, bins - 1)] += 1
+  return {'edges': edges, 'counts': counts}
+
+
+def compute_price_distribution(model_types=None, bins=DEFAULT_HISTOGRAM_BINS):
+  """
+  计算总价分布：整体直方图，以及按 (模型类型, 比例) 的分位数和极值
+
+  只查询 (类型, 比例, 总价) 三列并在数据库端排序，不创建 ORM 对象。
+
+  Args:
+    model_types: 模型类型列表，默认全部
+    bins: 直方图分箱数
+
+  Returns:
+    dict: 包含 histogram, overall, groups 的字典
+  """
+  collection = collection_union(model_types, lambda model_class: [model_class.total_price.isnot(None)])
+  rows = db.session.execute(
+    select(collection.c.model_type, collection.c.scale, collection.c.total_price)
+    .order_by(collection.c.model_type, collection.c.scale, collection.c.total_price)
+  ).all()
+
+  groups = {}
+  for model_type, scale, total_price in rows:
+    groups.setdefault((model_type, scale), []).append(total_price)
+
+  if not groups:
+    return {'histogram': {'edges': [], 'counts': []}, 'overall': None, 'groups': []}
+
+  all_values = sorted(value for values in groups.values() for value in values)
+  group_stats = []
+  for (model_type, scale), values in groups.items():
+    stats = summarize_prices(values)
+    stats.update({'model_type': model_type, 'scale': scale})
+    group_stats.append(stats)
+
+  return {
+    'histogram': build_histogram(all_values, all_values[0], all_values[-1], bins),
+    'overall': summarize_prices(all_values),
+    'groups': group_stats
+  }
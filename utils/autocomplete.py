@@ -0,0 +1,219 @@
+"""
+下拉选项自动完成索引模块
+
+每张系统信息表在内存中维护三组按键排序的 (键, id) 列表，查询时以 bisect 定位前缀区间：
+名称前缀、拼音首字母（及品牌缩写）前缀、名称中间位置的子串。结果按这一顺序排列，
+与原先前端“名称包含输入”的匹配范围一致。
+
+索引在首次查询时从数据库构建；之后通过 Session 事件随 ORM 修改增量更新，
+批量 SQL 修改后整表重建；进程外修改数据库（如重新初始化）后需调用 reset_indexes()。
+"""
+from bisect import bisect_left, insort
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.helpers import pinyin_initials
+from utils.option_cache import OPTION_MODELS
+import threading
+
+# 默认和最大返回条数
+DEFAULT_AUTOCOMPLETE_LIMIT = 20
+MAX_AUTOCOMPLETE_LIMIT = 100
+
+# 表名 -> 模型类
+AUTOCOMPLETE_MODELS = {model_class.__tablename__: model_class for model_class in OPTION_MODELS.values()}
+
+_lock = threading.Lock()
+_indexes = {}
+# 表名 -> 已提交的变更次数，用于丢弃构建期间已过期的索引
+_change_counts = {}
+
+# 会话 info 中记录本事务待应用的索引变更的键
+_CHANGES_KEY = 'autocomplete_changes'
+
+
+def normalize_query(value):
+  """统一查询和索引键的大小写与首尾空白"""
+  return (value or '').strip().casefold()
+
+
+class AutocompleteIndex:
+  """单张表的前缀索引"""
+
+  def __init__(self):
+    self.records = {}
+    self.prefix_keys = []
+    self.initial_keys = []
+    self.infix_keys = []
+    self._entries = {}
+
+  @staticmethod
+  def _keys(record):
+    """计算记录在三组列表中的键"""
+    name = normalize_query(record['name'])
+    initials = {normalize_query(pinyin_initials(record['name']))}
+    if record.get('abbreviation'):
+      initials.add(normalize_query(record['abbreviation']))
+    initials.discard(name)
+    initials.discard('')
+    return {
+      'prefix_keys': [name],
+      'initial_keys': sorted(initials),
+      'infix_keys': sorted({name[i:] for i in range(1, len(name))})
+    }
+
+  def add(self, record):
+    """添加或替换一条记录"""
+    self.remove(record['id'])
+    entries = self._keys(record)
+    for list_name, keys in entries.items():
+      for key in keys:
+        insort(getattr(self, list_name), (key, record['id']))
+    self.records[record['id']] = {'id': record['id'], 'name': record['name']}
+    self._entries[record['id']] = entries
+
+  def remove(self, record_id):
+    """删除一条记录（不存在时忽略）"""
+    entries = self._entries.pop(record_id, None)
+    if entries is None:
+      return
+    for list_name, keys in entries.items():
+      sorted_keys = getattr(self, list_name)
+      for key in keys:
+        i = bisect_left(sorted_keys, (key, record_id))
+        if i < len(sorted_keys) and sorted_keys[i] == (key, record_id):
+          del sorted_keys[i]
+    del self.records[record_id]
+
+  def search(self, query, limit):
+    """
+    前缀查询
+
+    Args:
+      query: 已规范化的查询串，为空时按名称顺序返回
+      limit: 最多返回条数
+
+    Returns:
+      list: [{'id', 'name'}]
+    """
+    results = []
+    seen = set()
+    for sorted_keys in (self.prefix_keys, self.initial_keys, self.infix_keys):
+      i = bisect_left(sorted_keys, (query,))
+      while i < len(sorted_keys) and len(results) < limit:
+        key, record_id = sorted_keys[i]
+        if not key.startswith(query):
+          break
+        if record_id not in seen:
+          seen.add(record_id)
+          results.append(self.records[record_id])
+        i += 1
+      if len(results) >= limit or not query:
+        break
+    return results
+
+
+def _record(obj):
+  """从模型对象提取索引所需字段"""
+  return {'id': obj.id, 'name': obj.name, 'abbreviation': getattr(obj, 'abbreviation', None)}
+
+
+def _build_index(table):
+  """从数据库构建整张表的索引"""
+  index = AutocompleteIndex()
+  for obj in AUTOCOMPLETE_MODELS[table].query.all():
+    index.add(_record(obj))
+  return index
+
+
+def search(table, query, limit=DEFAULT_AUTOCOMPLETE_LIMIT):
+  """
+  查询自动完成候选项
+
+  Args:
+    table: 系统信息表名（如 brand、locomotive_model）
+    query: 用户输入，匹配名称前缀、拼音首字母或名称子串
+    limit: 最多返回条数
+
+  Returns:
+    list: [{'id', 'name'}]
+  """
+  with _lock:
+    index = _indexes.get(table)
+    change_count = _change_counts.get(table, 0)
+  if index is None:
+    index = _build_index(table)
+    with _lock:
+      # 构建期间有修改提交时不缓存，下次查询重新构建
+      if _change_counts.get(table, 0) == change_count:
+        index = _indexes.setdefault(table, index)
+
+  query = normalize_query(query)
+  with _lock:
+    return index.search(query, limit)
+
+
+def reset_indexes(tables=None):
+  """
+  丢弃索引，下次查询时重建
+
+  Args:
+    tables: 表名集合，默认全部
+  """
+  with _lock:
+    for table in list(tables or AUTOCOMPLETE_MODELS):
+      _indexes.pop(table, None)
+      _change_counts[table] = _change_counts.get(table, 0) + 1
+
+
+def _after_flush(session, flush_context):
+  changes = session.info.setdefault(_CHANGES_KEY, [])
+  for obj in list(session.new) + list(session.dirty):
+    table = getattr(obj, '__tablename__', None)
+    if table in AUTOCOMPLETE_MODELS:
+      changes.append((table, obj.id, _record(obj)))
+  for obj in session.deleted:
+    table = getattr(obj, '__tablename__', None)
+    if table in AUTOCOMPLETE_MODELS:
+      changes.append((table, obj.id, None))
+
+
+def _do_orm_execute(orm_execute_state):
+  # 批量 UPDATE/DELETE 无法得知受影响的行，提交后整表重建
+  if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name in AUTOCOMPLETE_MODELS:
+      orm_execute_state.session.info.setdefault(_CHANGES_KEY, []).append((table.name, None, None))
+
+
+def _after_commit(session):
+  changes = session.info.pop(_CHANGES_KEY, None)
+  if not changes:
+    return
+  with _lock:
+    for table, record_id, record in changes:
+      _change_counts[table] = _change_counts.get(table, 0) + 1
+      index = _indexes.get(table)
+      if index is None:
+        continue
+      if record_id is None:
+        _indexes.pop(table, None)
+      elif record is None:
+        index.remove(record_id)
+      else:
+        index.add(record)
+
+
+def _after_rollback(session):
+  session.info.pop(_CHANGES_KEY, None)
+
+
+def register_autocomplete_events():
+  """注册自动完成索引增量维护事件（重复调用安全）"""
+  for name, listener in [
+    ('after_flush', _after_flush),
+    ('do_orm_execute', _do_orm_execute),
+    ('after_commit', _after_commit),
+    ('after_rollback', _after_rollback)
+  ]:
+    if not event.contains(Session, name, listener):
+      event.listen(Session, name, listener)
@@ -0,0 +1,168 @@
+"""
+数据版本与响应缓存模块
+
+维护进程内的全局数据版本号（generation）：任何触及核心表或系统信息表的事务提交后递增。
+统计类接口以版本号为键缓存已序列化的响应，并以此生成 ETag，支持 If-None-Match 返回 304。
+另维护系统信息版本号（lookup generation）：只在系统信息表（品牌、系列等）修改后递增，
+供只依赖这些名称的缓存（如列表行片段）使用。
+"""
+from collections import OrderedDict
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import threading
+import uuid
+
+# 进程启动标识，避免重启后版本号从头计数导致旧 ETag 误命中
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# 触发版本递增的表：核心表、系统信息表及其派生的汇总表
+TRACKED_TABLES = {
+  'locomotive', 'carriage_set', 'carriage_item', 'trainset', 'locomotive_head',
+  'power_type', 'brand', 'chip_interface', 'chip_model', 'merchant', 'depot',
+  'locomotive_series', 'locomotive_model', 'carriage_series', 'carriage_model',
+  'trainset_series', 'trainset_model', 'collection_summary'
+}
+
+# 系统信息表（列表行中显示其名称），修改后递增系统信息版本
+LOOKUP_TABLES = {
+  'power_type', 'brand', 'chip_interface', 'chip_model', 'merchant', 'depot',
+  'locomotive_series', 'locomotive_model', 'carriage_series', 'carriage_model',
+  'trainset_series', 'trainset_model'
+}
+
+# 响应缓存最大条目数（带查询参数的接口会产生多个条目）
+MAX_CACHE_ENTRIES = 256
+
+_lock = threading.Lock()
+_generation = 0
+_lookup_generation = 0
+_response_cache = OrderedDict()
+
+# 会话 info 中标记本事务已修改被跟踪表、系统信息表的键
+_CHANGED_FLAG = 'tracked_data_changed'
+_LOOKUP_CHANGED_FLAG = 'lookup_data_changed'
+
+
+def data_generation() -> str:
+  """获取当前数据版本标识"""
+  return f'{BOOT_ID}-{_generation}'
+
+
+def lookup_generation() -> int:
+  """获取当前系统信息版本号"""
+  return _lookup_generation
+
+
+def _bump_data_generation():
+  """递增数据版本号并清空响应缓存"""
+  global _generation
+  with _lock:
+    _generation += 1
+    _response_cache.clear()
+
+
+def bump_generation():
+  """递增数据版本号和系统信息版本号，并清空响应缓存（进程外修改数据后也应调用）"""
+  global _lookup_generation
+  _bump_data_generation()
+  with _lock:
+    _lookup_generation += 1
+
+
+def get_cached(key, builder):
+  """
+  按当前数据版本获取缓存值，未命中时调用 builder 生成
+
+  Args:
+    key: 可哈希的缓存键（通常为接口名和查询参数组成的元组）
+    builder: 无参函数，返回要缓存的值
+
+  Returns:
+    缓存的值
+  """
+  cache_key = (data_generation(), key)
+  with _lock:
+    if cache_key in _response_cache:
+      _response_cache.move_to_end(cache_key)
+      return _response_cache[cache_key]
+
+  value = builder()
+
+  with _lock:
+    # 生成期间版本可能已变化，只缓存仍然有效的结果
+    if cache_key[0] == data_generation():
+      _response_cache[cache_key] = value
+      while len(_response_cache) > MAX_CACHE_ENTRIES:
+        _response_cache.popitem(last=False)
+  return value
+
+
+def cached_json_response(key, builder):
+  """
+  返回带 ETag 的缓存 JSON 响应；If-None-Match 命中时直接返回 304，不查询也不序列化
+
+  Args:
+    key: 缓存键
+    builder: 无参函数，返回可 JSON 序列化的数据
+
+  Returns:
+    Response: Flask 响应对象
+  """
+  etag = data_generation()
+  if request.if_none_match.contains(etag):
+    response = current_app.response_class(status=304)
+  else:
+    body = get_cached(key, lambda: current_app.json.dumps(builder()))
+    response = current_app.response_class(body, mimetype='application/json')
+  response.set_etag(etag)
+  response.headers['Cache-Control'] = 'no-cache'
+  return response
+
+
+def _mark_if_tracked(session, table_name):
+  """被跟踪表发生修改时在会话中打标记"""
+  if table_name in TRACKED_TABLES:
+    session.info[_CHANGED_FLAG] = True
+  if table_name in LOOKUP_TABLES:
+    session.info[_LOOKUP_CHANGED_FLAG] = True
+
+
+def _after_flush(session, flush_context):
+  for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+    table = getattr(obj, '__table__', None)
+    if table is not None:
+      _mark_if_tracked(session, table.name)
+
+
+def _do_orm_execute(orm_execute_state):
+  # 批量 UPDATE/DELETE（如 Query.delete()）不经过 flush，单独检查
+  if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None:
+      _mark_if_tracked(orm_execute_state.session, table.name)
+
+
+def _after_commit(session):
+  data_changed = session.info.pop(_CHANGED_FLAG, False)
+  if session.info.pop(_LOOKUP_CHANGED_FLAG, False):
+    bump_generation()
+  elif data_changed:
+    _bump_data_generation()
+
+
+def _after_rollback(session):
+  session.info.pop(_CHANGED_FLAG, None)
+  session.info.pop(_LOOKUP_CHANGED_FLAG, None)
+
+
+def register_generation_events():
+  """注册数据版本维护事件（重复调用安全）"""
+  for name, listener in [
+    ('after_flush', _after_flush),
+    ('do_orm_execute', _do_orm_execute),
+    ('after_commit', _after_commit),
+    ('after_rollback', _after_rollback)
+  ]:
+    if not event.contains(Session, name, listener):
+      event.listen(Session, name, listener)
@@ -0,0 +1,194 @@
+"""
+藏品汇总读模型维护模块
+
+collection_summary 表按 (model_type, scale, brand_id, merchant_id) 保存数量和总价合计，
+分组键带唯一约束，未知品牌、商家记为 0（空值不受唯一约束限制）。
+通过 Session before_flush 事件，在核心表增删改的同一事务内增量更新；
+批量 SQL 删除（Query.delete）不经过事件，需调用 rebuild_collection_summary() 修复。
+"""
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from models import db, CollectionSummary, Brand, Merchant
+from utils.aggregation import CORE_MODELS, collection_union, build_statistics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 模型类 -> 类型键
+SUMMARY_MODEL_TYPES = {model_class: model_type for model_type, (model_class, _) in CORE_MODELS.items()}
+
+# 影响汇总的字段（前三个构成分组键）
+TRACKED_FIELDS = ('scale', 'brand_id', 'merchant_id', 'total_price')
+
+
+def _current_values(obj):
+  """获取对象当前（待写入）的汇总字段值"""
+  return tuple(getattr(obj, name) for name in TRACKED_FIELDS)
+
+
+def _committed_values(session, obj):
+  """
+  获取对象在数据库中已提交的汇总字段值
+
+  优先使用属性历史；属性已过期（如提交后未重新加载）时回查数据库，
+  此时尚未 flush，数据库中仍是旧值。
+  """
+  state = sa_inspect(obj)
+  values = []
+  for name in TRACKED_FIELDS:
+    history = state.attrs[name].history
+    if history.deleted:
+      values.append(history.deleted[0])
+    elif history.unchanged:
+      values.append(history.unchanged[0])
+    else:
+      break
+  else:
+    return tuple(values)
+
+  model_class = type(obj)
+  columns = [getattr(model_class, name) for name in TRACKED_FIELDS]
+  row = session.execute(select(*columns).where(model_class.id == state.identity[0])).first()
+  return tuple(row) if row else None
+
+
+def _add_delta(deltas, model_type, values, sign):
+  """累加一条记录对分组键的增量"""
+  scale, brand_id, merchant_id, total_price = values
+  key = (model_type, scale, brand_id or 0, merchant_id or 0)
+  count, total = deltas.get(key, (0, 0))
+  deltas[key] = (count + sign, total + sign * (total_price or 0))
+
+
+def collect_summary_deltas(session):
+  """
+  根据会话中待写入的核心表变更计算汇总增量
+
+  Returns:
+    dict: {(model_type, scale, brand_id, merchant_id): (count_delta, total_delta)}
+  """
+  deltas = {}
+
+  for obj in session.new:
+    model_type = SUMMARY_MODEL_TYPES.get(type(obj))
+    if model_type:
+      _add_delta(deltas, model_type, _current_values(obj), 1)
+
+  for obj in session.deleted:
+    model_type = SUMMARY_MODEL_TYPES.get(type(obj))
+    if model_type:
+      old_values = _committed_values(session, obj)
+      if old_values:
+        _add_delta(deltas, model_type, old_values, -1)
+
+  for obj in session.dirty:
+    model_type = SUMMARY_MODEL_TYPES.get(type(obj))
+    if not model_type or not session.is_modified(obj):
+      continue
+    state = sa_inspect(obj)
+    if not any(state.attrs[name].history.added for name in TRACKED_FIELDS):
+      continue
+    old_values = _committed_values(session, obj)
+    new_values = _current_values(obj)
+    if old_values != new_values:
+      if old_values:
+        _add_delta(deltas, model_type, old_values, -1)
+      _add_delta(deltas, model_type, new_values, 1)
+
+  return deltas
+
+
+def apply_summary_deltas(session, deltas):
+  """将增量写入汇总表（随本次 flush 一起提交），数量归零的分组行会被删除"""
+  for (model_type, scale, brand_id, merchant_id), (count, total) in deltas.items():
+    if count == 0 and not total:
+      continue
+
+    row = session.query(CollectionSummary).filter_by(
+      model_type=model_type, scale=scale, brand_id=brand_id, merchant_id=merchant_id
+    ).first()
+
+    if row is None:
+      session.add(CollectionSummary(
+        model_type=model_type, scale=scale, brand_id=brand_id, merchant_id=merchant_id,
+        count=count, total_price=total
+      ))
+      continue
+
+    row.count += count
+    row.total_price += total
+    if row.count <= 0:
+      session.delete(row)
+
+
+def _before_flush(session, flush_context, instances):
+  """before_flush 事件：在同一事务内增量维护汇总表"""
+  with session.no_autoflush:
+    deltas = collect_summary_deltas(session)
+    if deltas:
+      apply_summary_deltas(session, deltas)
+
+
+def register_summary_events():
+  """注册汇总表维护事件（重复调用安全）"""
+  if not event.contains(Session, 'before_flush', _before_flush):
+    event.listen(Session, 'before_flush', _before_flush)
+
+
+def rebuild_collection_summary():
+  """
+  从核心表全量重建汇总表（用于修复批量操作造成的偏差）
+
+  Returns:
+    int: 重建后的分组行数
+  """
+  collection = collection_union()
+  rows = db.session.execute(
+    select(
+      collection.c.model_type,
+      collection.c.scale,
+      func.coalesce(collection.c.brand_id, 0).label('brand_id'),
+      func.coalesce(collection.c.merchant_id, 0).label('merchant_id'),
+      func.count().label('count'),
+      func.coalesce(func.sum(collection.c.total_price), 0).label('total')
+    ).group_by(
+      collection.c.model_type, collection.c.scale,
+      func.coalesce(collection.c.brand_id, 0), func.coalesce(collection.c.merchant_id, 0)
+    )
+  ).all()
+
+  db.session.execute(CollectionSummary.__table__.delete())
+  if rows:
+    db.session.execute(CollectionSummary.__table__.insert(), [
+      {
+        'model_type': model_type, 'scale': scale, 'brand_id': brand_id,
+        'merchant_id': merchant_id, 'count': count, 'total_price': total
+      }
+      for model_type, scale, brand_id, merchant_id, count, total in rows
+    ])
+  db.session.commit()
+  logger.info(f"Collection summary rebuilt: {len(rows)} groups")
+  return len(rows)
+
+
+def summary_statistics():
+  """
+  从汇总表读取统计数据（只读取少量分组行，与藏品数量无关）
+
+  Returns:
+    dict: 统计 API 响应结构
+  """
+  rows = db.session.execute(
+    select(
+      CollectionSummary.model_type,
+      CollectionSummary.scale,
+      Brand.name,
+      Merchant.name,
+      CollectionSummary.count,
+      CollectionSummary.total_price
+    )
+    .outerjoin(Brand, Brand.id == CollectionSummary.brand_id)
+    .outerjoin(Merchant, Merchant.id == CollectionSummary.merchant_id)
+  ).all()
+  return build_statistics(rows)
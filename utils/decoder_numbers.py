@@ -0,0 +1,156 @@
+"""
+机车编号（DCC 地址）分配模块
+
+机车编号为 1-9999，同一比例内唯一。每个比例在内存中维护一个占用位图（第 n 位表示编号 n 已被占用，
+每个比例约 1.2KB），由一条只读取 (scale, decoder_number) 两列的查询一次构建全部比例。
+机车表的修改提交后位图作废，下次请求时重建；进程外修改数据库后需调用 reset_decoder_numbers()。
+"""
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from models import db, Locomotive
+import threading
+
+# 编号上限（1-4 位数字）
+MAX_DECODER_NUMBER = 9999
+
+# 空闲编号默认和最大返回个数
+DEFAULT_FREE_COUNT = 5
+MAX_FREE_COUNT = 100
+
+# 位图字节数（第 0 位不使用）
+BITMAP_SIZE = MAX_DECODER_NUMBER // 8 + 1
+
+_lock = threading.Lock()
+# 比例 -> 占用位图；None 表示未构建
+_bitmaps = None
+# 已提交的机车表变更次数，用于丢弃构建期间已过期的位图
+_change_count = 0
+
+# 会话 info 中标记本事务已修改机车表的键
+_CHANGED_KEY = 'decoder_numbers_changed'
+
+
+def _build_bitmaps():
+  """从数据库构建全部比例的占用位图（一条两列查询）"""
+  bitmaps = {}
+  rows = db.session.execute(
+    select(Locomotive.scale, Locomotive.decoder_number).where(Locomotive.decoder_number.is_not(None))
+  )
+  for scale, value in rows:
+    if not value or not value.isdigit():
+      continue
+    number = int(value)
+    if 1 <= number <= MAX_DECODER_NUMBER:
+      bitmap = bitmaps.setdefault(scale, bytearray(BITMAP_SIZE))
+      bitmap[number >> 3] |= 1 << (number & 7)
+  return bitmaps
+
+
+def _get_bitmaps():
+  """获取占用位图，未构建或已作废时重建"""
+  global _bitmaps
+  with _lock:
+    if _bitmaps is not None:
+      return _bitmaps
+    change_count = _change_count
+
+  bitmaps = _build_bitmaps()
+  with _lock:
+    # 构建期间机车表可能已被修改，只缓存仍然有效的结果
+    if _change_count == change_count:
+      _bitmaps = bitmaps
+  return bitmaps
+
+
+def _used_count(bitmap):
+  return sum(bin(byte).count('1') for byte in bitmap)
+
+
+def occupancy(scale=None):
+  """
+  获取编号占用位图
+
+  Args:
+    scale: 比例，默认全部已有编号的比例
+
+  Returns:
+    dict: {比例: (位图 bytes, 已占用个数)}；指定比例且没有已占用编号时返回全零位图
+  """
+  bitmaps = _get_bitmaps()
+  scales = [scale] if scale else sorted(bitmaps)
+  result = {}
+  for name in scales:
+    bitmap = bitmaps.get(name)
+    result[name] = (bytes(bitmap), _used_count(bitmap)) if bitmap else (bytes(BITMAP_SIZE), 0)
+  return result
+
+
+def free_numbers(scale, count=DEFAULT_FREE_COUNT, start=1):
+  """
+  查找比例内未被占用的编号
+
+  Args:
+    scale: 比例
+    count: 返回个数
+    start: 起始编号（包含）
+
+  Returns:
+    list: 从 start 起按升序排列的空闲编号（字符串），编号用尽时少于 count 个
+  """
+  bitmap = _get_bitmaps().get(scale)
+  numbers = []
+  number = max(start, 1)
+  while number <= MAX_DECODER_NUMBER and len(numbers) < count:
+    byte = bitmap[number >> 3] if bitmap else 0
+    if byte == 0xFF:
+      # 整个字节已占满，跳到下一字节
+      number = (number | 7) + 1
+      continue
+    if not byte & (1 << (number & 7)):
+      numbers.append(str(number))
+    number += 1
+  return numbers
+
+
+def reset_decoder_numbers():
+  """丢弃占用位图，下次查询时重建"""
+  global _bitmaps, _change_count
+  with _lock:
+    _bitmaps = None
+    _change_count += 1
+
+
+def _after_flush(session, flush_context):
+  for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+    if isinstance(obj, Locomotive):
+      session.info[_CHANGED_KEY] = True
+      return
+
+
+def _do_orm_execute(orm_execute_state):
+  # 批量 UPDATE/DELETE 不经过 flush，单独检查
+  if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if table is not None and table.name == Locomotive.__tablename__:
+      orm_execute_state.session.info[_CHANGED_KEY] = True
+
+
+def _after_commit(session):
+  if session.info.pop(_CHANGED_KEY, False):
+    reset_decoder_numbers()
+
+
+def _after_rollback(session):
+  session.info.pop(_CHANGED_KEY, None)
+
+
+def register_decoder_number_events():
+  """注册机车修改后作废占用位图的事件（重复调用安全）"""
+  for name, listener in [
+    ('after_flush', _after_flush),
+    ('do_orm_execute', _do_orm_execute),
+    ('after_commit', _after_commit),
+    ('after_rollback', _after_rollback)
+  ]:
+    if not event.contains(Session, name, listener):
+      event.listen(Session, name, listener)
@@ -0,0 +1,78 @@
+"""
+列表行片段缓存模块
+
+列表页每一行渲染后的 HTML 按 (模型类型, id, 行指纹, 系统信息版本) 缓存：
+行指纹优先使用行版本（车厢变化时套装版本同样递增），缺少版本时由该行所有列的值（车厢套装另加车厢数）组成，行数据变化后自然失效；
+行内显示的型号、品牌等名称来自系统信息表，其任一修改都会递增系统信息版本，使全部片段失效。
+"""
+from collections import OrderedDict
+from markupsafe import Markup
+from utils.cache import lookup_generation
+import threading
+
+# 片段缓存最大条目数（约等于可缓存的行数）
+MAX_FRAGMENT_ENTRIES = 20000
+
+_lock = threading.Lock()
+_fragments = OrderedDict()
+_fragments_lookup_generation = None
+
+
+def row_fingerprint(obj):
+  """
+  计算行指纹
+
+  Args:
+    obj: 核心模型对象
+
+  Returns:
+    tuple: 行版本；无版本时为所有列的值，有车厢子表的对象附加车厢数
+  """
+  if getattr(obj, 'row_version', None) is not None:
+    return (obj.row_version,)
+  values = tuple(getattr(obj, column.key) for column in obj.__table__.columns)
+  if hasattr(obj, 'items'):
+    values += (len(obj.items),)
+  return values
+
+
+def clear_fragments():
+  """清空片段缓存"""
+  with _lock:
+    _fragments.clear()
+
+
+def render_row(model_type, obj, macro):
+  """
+  渲染列表行，行数据和系统信息均未变化时直接返回缓存的 HTML
+
+  Args:
+    model_type: 核心模型类型键
+    obj: 核心模型对象（关联需已预加载）
+    macro: 渲染单行的模板宏
+
+  Returns:
+    Markup: 行 HTML
+  """
+  global _fragments_lookup_generation
+  generation = lookup_generation()
+  key = (model_type, obj.id, row_fingerprint(obj))
+
+  with _lock:
+    # 系统信息变化后旧片段全部失效，直接清空以释放内存
+    if _fragments_lookup_generation != generation:
+      _fragments.clear()
+      _fragments_lookup_generation = generation
+    html = _fragments.get(key)
+    if html is not None:
+      _fragments.move_to_end(key)
+      return Markup(html)
+
+  html = str(macro(obj))
+
+  with _lock:
+    if _fragments_lookup_generation == generation:
+      _fragments[key] = html
+      while len(_fragments) > MAX_FRAGMENT_ENTRIES:
+        _fragments.popitem(last=False)
+  return Markup(html)
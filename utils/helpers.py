@@ -5,6 +5,7 @@
 from datetime import date, datetime
 from typing import Optional, Any, Callable, List, Dict
 from flask import jsonify
+import unicodedata
 
 
 def parse_purchase_date(date_str: Any) -> date:
@@ -106,6 +107,39 @@ def validate_unique(model_class, field_name: str, value: str, scale: str = None,
   return query.first() is None
 
 
+def normalize_name(value: Any) -> Optional[str]:
+  """
+  生成名称查找键：全角转半角（NFKC）、大小写折叠、去除首尾空白并合并连续空白
+
+  Args:
+    value: 名称
+
+  Returns:
+    Optional[str]: 规范化的名称，空值返回 None
+  """
+  if value is None:
+    return None
+  key = ' '.join(unicodedata.normalize('NFKC', str(value)).casefold().split())
+  return key or None
+
+
+def find_by_name(model_class, name: Any):
+  """
+  按名称查找系统信息记录（大小写、全半角、首尾空白不敏感，走 name_key 索引）
+
+  Args:
+    model_class: 带 name_key 列的系统信息模型类
+    name: 名称
+
+  Returns:
+    object or None: 找到的记录
+  """
+  key = normalize_name(name)
+  if key is None:
+    return None
+  return model_class.query.filter_by(name_key=key).first()
+
+
 def group_by_field(items: List[Any], get_field_func: Callable[[Any], str]) -> Dict[str, int]:
   """
   通用的分组统计函数
@@ -177,6 +211,20 @@ def parse_boolean(value: Any) -> Optional[bool]:
   return str(value).lower() in ('true', '1', '是', '有', 'yes')
 
 
+def pinyin_initials(name: str) -> str:
+  """
+  获取名称中每个汉字的拼音首字母（非汉字部分原样保留）
+
+  Args:
+    name: 名称
+
+  Returns:
+    大写的拼音首字母串，如 百万城 -> BWC
+  """
+  from pypinyin import pinyin, Style
+  return ''.join([py[0].upper() for py in pinyin(name, style=Style.FIRST_LETTER)])
+
+
 def generate_brand_abbreviation(name: str) -> str:
   """
   根据品牌名称生成缩写
@@ -201,9 +249,7 @@ def generate_brand_abbreviation(name: str) -> str:
 
   if has_chinese:
     # 中文品牌：拼音首字母
-    from pypinyin import pinyin, Style
-    result = ''.join([py[0].upper() for py in pinyin(name, style=Style.FIRST_LETTER)])
-    return result
+    return pinyin_initials(name)
 
   # 检查是否是 camelCase 或 PascalCase 多词格式
   import re
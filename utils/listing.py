@@ -0,0 +1,450 @@
+"""
+列表分页查询模块
+
+在数据库端完成排序、筛选和游标（keyset）分页：每页只读取 limit + 1 行，
+翻页条件为 (排序列, id) 大于/小于上一页最后一行，不使用 OFFSET，翻到任意深度耗时不变。
+同时提供列表页内嵌的紧凑行数据（列值数组 + 关联名称表），以及四类模型合并的藏品流水。
+"""
+from sqlalchemy import select, or_, and_, true, false
+from datetime import date
+from models import db, Brand, Merchant
+from utils.aggregation import CORE_MODELS, collection_union
+from utils.query_options import list_query, LIST_RELATIONSHIPS
+import base64
+import json
+
+# 每页默认和最大行数
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# 可排序的列（均有索引，id 作为并列时的次序键）
+SORT_FIELDS = ('id', 'purchase_date', 'total_price', 'item_number')
+
+# 藏品流水可排序的列及默认排序（最近购买在前）
+FEED_SORT_FIELDS = ('purchase_date', 'total_price')
+FEED_DEFAULT_SORT = '-purchase_date'
+
+# 筛选参数 -> 列名（模型没有的列不可用）
+FILTER_FIELDS = {
+  'brand': 'brand_id',
+  'merchant': 'merchant_id',
+  'depot': 'depot_id',
+  'series': 'series_id',
+  'model': 'model_id',
+  'power_type': 'power_type_id',
+  'chip_interface': 'chip_interface_id',
+  'chip_model': 'chip_model_id',
+  'scale': 'scale'
+}
+
+
+def parse_sort(value, fields=SORT_FIELDS, default='id'):
+  """
+  解析排序参数
+
+  Args:
+    value: 列名，前缀 '-' 表示降序；为空时使用 default
+    fields: 可排序的列名
+    default: 默认排序
+
+  Returns:
+    tuple: (列名, 是否降序)
+
+  Raises:
+    ValueError: 列不支持排序
+  """
+  value = (value or default).strip()
+  descending = value.startswith('-')
+  field = value.lstrip('-')
+  if field not in fields:
+    raise ValueError(f"sort 必须是 {', '.join(fields)} 之一（可加 - 前缀表示降序）")
+  return field, descending
+
+
+def parse_limit(value):
+  """
+  解析每页行数参数
+
+  Args:
+    value: 字符串形式的行数，为空使用默认值
+
+  Returns:
+    int: 每页行数
+
+  Raises:
+    ValueError: 不是 1 到 MAX_PAGE_SIZE 之间的整数
+  """
+  if not value:
+    return DEFAULT_PAGE_SIZE
+  try:
+    limit = int(value)
+  except ValueError:
+    limit = 0
+  if not 1 <= limit <= MAX_PAGE_SIZE:
+    raise ValueError(f'limit 必须是 1-{MAX_PAGE_SIZE} 之间的整数')
+  return limit
+
+
+def parse_filters(model_class, args):
+  """
+  从查询参数中提取 filter[字段]=值 形式的筛选条件
+
+  Args:
+    model_class: 核心模型类
+    args: 请求参数（MultiDict 或 dict）
+
+  Returns:
+    dict: {列名: 值列表}，外键列的值已转换为整数
+
+  Raises:
+    ValueError: 未知筛选字段或值格式错误
+  """
+  filters = {}
+  for key, value in args.items():
+    if not (key.startswith('filter[') and key.endswith(']')):
+      continue
+    name = key[len('filter['):-1]
+    column_name = FILTER_FIELDS.get(name)
+    if column_name is None or not hasattr(model_class, column_name):
+      raise ValueError(f'不支持的筛选字段：{name}')
+
+    values = [v.strip() for v in value.split(',') if v.strip()]
+    if column_name != 'scale':
+      try:
+        values = [int(v) for v in values]
+      except ValueError:
+        raise ValueError(f'筛选字段 {name} 的值必须是 ID')
+    if values:
+      filters[column_name] = values
+  return filters
+
+
+def encode_cursor(value, row_id, model_type=None):
+  """
+  将排序列的值和 id 编码为不透明游标
+
+  Args:
+    value: 最后一行排序列的值
+    row_id: 最后一行 id
+    model_type: 最后一行的模型类型（仅藏品流水使用）
+
+  Returns:
+    str: URL 安全的 base64 字符串
+  """
+  if isinstance(value, date):
+    value = value.isoformat()
+  keys = [value, row_id] + ([model_type] if model_type else [])
+  raw = json.dumps(keys, separators=(',', ':'))
+  return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, column, with_type=False):
+  """
+  解码游标
+
+  Args:
+    cursor: encode_cursor 生成的字符串
+    column: 排序列（用于还原值类型）
+    with_type: 游标是否包含模型类型
+
+  Returns:
+    tuple: (排序列的值, id)；with_type 为真时为 (排序列的值, id, 模型类型)
+
+  Raises:
+    ValueError: 游标格式错误
+  """
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    keys = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    if not isinstance(keys, list) or len(keys) != (3 if with_type else 2):
+      raise ValueError
+    value, row_id = keys[:2]
+    if not isinstance(row_id, int):
+      raise ValueError
+    if with_type and keys[2] not in CORE_MODELS:
+      raise ValueError
+    if value is not None:
+      python_type = column.type.python_type
+      value = date.fromisoformat(value) if python_type is date else python_type(value)
+  except (ValueError, TypeError):
+    raise ValueError('after 游标无效')
+  return (value, row_id, keys[2]) if with_type else (value, row_id)
+
+
+def keyset_condition(column, id_column, value, row_id, descending):
+  """
+  构建“位于游标之后”的条件
+
+  排序规则为：非空值按方向排列在前，空值在后，同值按 id 同方向排列。
+
+  Args:
+    column: 排序列
+    id_column: 主键列
+    value: 游标中的排序列值
+    row_id: 游标中的 id
+    descending: 是否降序
+
+  Returns:
+    SQL 条件表达式
+  """
+  after_id = id_column < row_id if descending else id_column > row_id
+  if column is id_column:
+    return after_id
+  return _after_value(column, value, descending, after_id)
+
+
+def _after_value(column, value, descending, tie):
+  """排序列位于 value 之后（空值在最后），或等于 value 且满足并列条件 tie"""
+  if value is None:
+    return and_(column.is_(None), tie)
+  after_value = column < value if descending else column > value
+  return or_(after_value, and_(column == value, tie), column.is_(None))
+
+
+def _column_value(obj, column):
+  """读取列值，日期转换为 ISO 字符串"""
+  value = getattr(obj, column.key)
+  return value.isoformat() if isinstance(value, date) else value
+
+
+def serialize_row(obj, model_class, include_items=False):
+  """
+  将核心模型对象转换为列表 API 的行数据
+
+  Args:
+    obj: 模型对象（关联需已预加载）
+    model_class: 模型类
+    include_items: 车厢套装是否附带车厢明细
+
+  Returns:
+    dict: 所有列的值，以及各关联对象的名称
+  """
+  row = {column.key: _column_value(obj, column) for column in model_class.__table__.columns}
+
+  for path in LIST_RELATIONSHIPS.get(model_class, ()):
+    if isinstance(path, str):
+      related = getattr(obj, path)
+      row[path] = related.name if related else None
+
+  if hasattr(model_class, 'items'):
+    row['item_count'] = len(obj.items)
+    if include_items:
+      row['items'] = [
+        dict(
+          {column.key: _column_value(item, column) for column in item.__table__.columns},
+          model=item.model.name if item.model else None
+        )
+        for item in obj.items
+      ]
+  return row
+
+
+def build_row_payload(model_type, rows):
+  """
+  构建列表页内嵌的紧凑行数据
+
+  每行只保存列值数组，关联对象以 ID 引用，名称在 lookups 中每个 ID 只出现一次。
+
+  Args:
+    model_type: 核心模型类型键
+    rows: 模型对象列表（关联需已预加载）
+
+  Returns:
+    dict: {'columns': 列名列表, 'rows': 行值数组列表, 'lookups': {关联名: {ID: 名称}}}
+  """
+  model_class = CORE_MODELS[model_type][0]
+  columns = list(model_class.__table__.columns)
+  relationships = [path for path in LIST_RELATIONSHIPS.get(model_class, ()) if isinstance(path, str)]
+  has_items = hasattr(model_class, 'items')
+
+  payload_rows = []
+  lookups = {name: {} for name in relationships}
+  for obj in rows:
+    values = [_column_value(obj, column) for column in columns]
+    if has_items:
+      values.append(len(obj.items))
+    payload_rows.append(values)
+
+    for name in relationships:
+      related = getattr(obj, name)
+      if related is not None:
+        lookups[name][related.id] = related.name
+
+  column_names = [column.key for column in columns] + (['item_count'] if has_items else [])
+  return {'columns': column_names, 'rows': payload_rows, 'lookups': lookups}
+
+
+def fetch_list_page(model_type, sort=None, filters=None, after=None, limit=DEFAULT_PAGE_SIZE):
+  """
+  获取一页列表数据
+
+  Args:
+    model_type: 核心模型类型键
+    sort: 排序参数（见 parse_sort）
+    filters: parse_filters 的返回值
+    after: 上一页返回的 next_cursor
+    limit: 每页行数
+
+  Returns:
+    dict: {'items': 行数据列表, 'next_cursor': 下一页游标或 None, 'has_more': 是否还有数据}
+
+  Raises:
+    ValueError: 参数错误
+  """
+  model_class = CORE_MODELS[model_type][0]
+  field, descending = parse_sort(sort)
+  column = getattr(model_class, field)
+  id_column = model_class.id
+
+  query = list_query(model_class)
+  for column_name, values in (filters or {}).items():
+    filter_column = getattr(model_class, column_name)
+    query = query.filter(filter_column == values[0] if len(values) == 1 else filter_column.in_(values))
+
+  if after:
+    value, row_id = decode_cursor(after, column)
+    query = query.filter(keyset_condition(column, id_column, value, row_id, descending))
+
+  if column is id_column:
+    order_by = [id_column.desc() if descending else id_column.asc()]
+  else:
+    order_by = [
+      column.is_(None),
+      column.desc() if descending else column.asc(),
+      id_column.desc() if descending else id_column.asc()
+    ]
+
+  rows = query.order_by(*order_by).limit(limit + 1).all()
+  has_more = len(rows) > limit
+  rows = rows[:limit]
+
+  next_cursor = None
+  if has_more:
+    last = rows[-1]
+    next_cursor = encode_cursor(getattr(last, field), last.id)
+
+  return {
+    'items': [serialize_row(obj, model_class) for obj in rows],
+    'next_cursor': next_cursor,
+    'has_more': has_more
+  }
+
+
+def parse_feed_types(value):
+  """
+  解析藏品流水包含的模型类型
+
+  Args:
+    value: 逗号分隔的类型键，为空表示全部
+
+  Returns:
+    list: 类型键列表
+
+  Raises:
+    ValueError: 未知类型
+  """
+  if not value:
+    return list(CORE_MODELS)
+  model_types = [v.strip() for v in value.split(',') if v.strip()]
+  unknown = [model_type for model_type in model_types if model_type not in CORE_MODELS]
+  if unknown or not model_types:
+    raise ValueError(f"type 必须是 {', '.join(CORE_MODELS)} 中的一个或多个")
+  return model_types
+
+
+def parse_feed_filters(model_types, args):
+  """
+  提取藏品流水的筛选条件，字段需对所有包含的类型都适用
+
+  Args:
+    model_types: 类型键列表
+    args: 请求参数
+
+  Returns:
+    dict: {列名: 值列表}
+
+  Raises:
+    ValueError: 筛选字段不适用或值格式错误
+  """
+  filters = {}
+  for model_type in model_types:
+    # 逐个类型校验字段是否存在，各类型解析结果相同
+    filters = parse_filters(CORE_MODELS[model_type][0], args)
+  return filters
+
+
+def fetch_collection_feed(sort=None, model_types=None, filters=None, after=None, limit=DEFAULT_PAGE_SIZE):
+  """
+  获取一页四类模型合并的藏品流水
+
+  各类型在自己的表内按索引取游标之后的前 limit + 1 行，经 UNION ALL 合并后统一排序截取，
+  排序键为 (排序列, 模型类型, id)，空值排在最后。
+
+  Args:
+    sort: 排序参数，可选 purchase_date、total_price，默认 -purchase_date
+    model_types: 包含的类型键列表，默认全部
+    filters: parse_feed_filters 的返回值
+    after: 上一页返回的 next_cursor
+    limit: 每页行数
+
+  Returns:
+    dict: {'items': 行数据列表, 'next_cursor': 下一页游标或 None, 'has_more': 是否还有数据}
+
+  Raises:
+    ValueError: 参数错误
+  """
+  field, descending = parse_sort(sort, FEED_SORT_FIELDS, FEED_DEFAULT_SORT)
+  model_type_keys = {model_class: model_type for model_type, (model_class, _) in CORE_MODELS.items()}
+  cursor = decode_cursor(after, getattr(CORE_MODELS['locomotive'][0], field), with_type=True) if after else None
+
+  def direction(column):
+    return column.desc() if descending else column.asc()
+
+  def criteria(model_class):
+    conditions = []
+    for column_name, values in (filters or {}).items():
+      column = getattr(model_class, column_name)
+      conditions.append(column == values[0] if len(values) == 1 else column.in_(values))
+    if cursor:
+      value, row_id, cursor_type = cursor
+      model_type = model_type_keys[model_class]
+      # 模型类型在分支内是常量，并列条件可直接在 Python 中比较
+      if model_type == cursor_type:
+        tie = model_class.id < row_id if descending else model_class.id > row_id
+      else:
+        tie = true() if (model_type > cursor_type) != descending else false()
+      conditions.append(_after_value(getattr(model_class, field), value, descending, tie))
+    return conditions
+
+  def branch_order(model_class):
+    column = getattr(model_class, field)
+    return [column.is_(None), direction(column), direction(model_class.id)]
+
+  collection = collection_union(
+    model_types, criteria, detail=True, order_by=branch_order, limit=limit + 1
+  )
+  column = collection.c[field]
+  query = (
+    select(collection, Brand.name.label('brand'), Merchant.name.label('merchant'))
+    .outerjoin(Brand, Brand.id == collection.c.brand_id)
+    .outerjoin(Merchant, Merchant.id == collection.c.merchant_id)
+    .order_by(column.is_(None), direction(column), direction(collection.c.model_type), direction(collection.c.id))
+    .limit(limit + 1)
+  )
+  rows = db.session.execute(query).mappings().all()
+  has_more = len(rows) > limit
+  rows = rows[:limit]
+
+  next_cursor = None
+  if has_more:
+    last = rows[-1]
+    next_cursor = encode_cursor(last[field], last['id'], last['model_type'])
+
+  return {
+    'items': [
+      {key: value.isoformat() if isinstance(value, date) else value for key, value in row.items()}
+      for row in rows
+    ],
+    'next_cursor': next_cursor,
+    'has_more': has_more
+  }
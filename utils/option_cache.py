@@ -0,0 +1,120 @@
+"""
+下拉选项缓存模块
+
+表单页面的下拉框数据来自系统信息表，修改很少。进程内按表缓存只读的普通记录（字典，而非 ORM 对象，
+可跨请求共享且不会触发懒加载），信息维护和导入修改系统信息表后由调用方显式调用 invalidate_options()；
+系统信息版本号（见 utils.cache）变化时同样失效，兜底覆盖其他修改途径。
+
+全部选项另序列化为一个选项包（/api/options/bundle），以内容哈希作为版本，浏览器可长期缓存。
+"""
+from datetime import date
+from models import (
+  PowerType, Brand, Merchant, Depot, ChipInterface, ChipModel,
+  LocomotiveSeries, LocomotiveModel, CarriageSeries, CarriageModel,
+  TrainsetSeries, TrainsetModel
+)
+from utils.cache import lookup_generation
+import hashlib
+import json
+import threading
+
+# 选项键（即模板变量名）-> 模型类
+OPTION_MODELS = {
+  'power_types': PowerType,
+  'brands': Brand,
+  'merchants': Merchant,
+  'depots': Depot,
+  'chip_interfaces': ChipInterface,
+  'chip_models': ChipModel,
+  'locomotive_series': LocomotiveSeries,
+  'locomotive_models': LocomotiveModel,
+  'carriage_series': CarriageSeries,
+  'carriage_models': CarriageModel,
+  'trainset_series': TrainsetSeries,
+  'trainset_models': TrainsetModel
+}
+
+_lock = threading.Lock()
+_options = {}
+_options_lookup_generation = None
+_bundle = None
+
+
+def _load_records(model_class):
+  """读取整张表为按 id 排序的字典列表"""
+  columns = list(model_class.__table__.columns)
+  records = []
+  for obj in model_class.query.order_by(model_class.id).all():
+    record = {}
+    for column in columns:
+      value = getattr(obj, column.key)
+      record[column.key] = value.isoformat() if isinstance(value, date) else value
+    records.append(record)
+  return records
+
+
+def _check_generation(generation):
+  """系统信息版本变化时清空缓存（调用方持有锁）"""
+  global _options_lookup_generation, _bundle
+  if _options_lookup_generation != generation:
+    _options.clear()
+    _bundle = None
+    _options_lookup_generation = generation
+
+
+def get_options(*keys):
+  """
+  获取下拉选项，未缓存的表从数据库读取
+
+  Args:
+    *keys: OPTION_MODELS 中的选项键
+
+  Returns:
+    dict: {选项键: 记录字典列表}，列表为共享的缓存对象，调用方不应修改
+  """
+  generation = lookup_generation()
+  with _lock:
+    _check_generation(generation)
+    result = {key: _options[key] for key in keys if key in _options}
+
+  for key in keys:
+    if key not in result:
+      result[key] = _load_records(OPTION_MODELS[key])
+      with _lock:
+        # 读取期间系统信息可能已被修改，只缓存仍然有效的结果
+        if _options_lookup_generation == generation:
+          _options[key] = result[key]
+  return result
+
+
+def option_bundle():
+  """
+  获取包含全部下拉选项的选项包
+
+  Returns:
+    tuple: (version, body)，version 为内容哈希，body 为 JSON 字符串 {version, options}
+  """
+  global _bundle
+  generation = lookup_generation()
+  with _lock:
+    _check_generation(generation)
+    if _bundle is not None:
+      return _bundle
+
+  options = get_options(*OPTION_MODELS)
+  content = json.dumps(options, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+  version = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+  bundle = (version, f'{{"version":"{version}","options":{content}}}')
+
+  with _lock:
+    if _options_lookup_generation == generation:
+      _bundle = bundle
+  return bundle
+
+
+def invalidate_options():
+  """清空下拉选项缓存（修改系统信息表后调用）"""
+  global _bundle
+  with _lock:
+    _options.clear()
+    _bundle = None
@@ -0,0 +1,139 @@
+"""
+信息维护列表模块
+
+信息维护页面的各标签页打开时才分页加载对应的系统信息表：按 id 游标分页、按名称搜索，
+每行附带被引用次数。引用次数把所有指向该表的外键列合并为一条 UNION ALL 分组查询，
+列表只统计当前页的 id，也可一次统计整张表；删除前的引用检查使用 EXISTS，不加载引用行。
+"""
+from sqlalchemy import select, func, union_all, or_, and_, exists, inspect
+from sqlalchemy.orm import joinedload, RelationshipDirection
+from models import db
+from utils.listing import DEFAULT_PAGE_SIZE, encode_cursor, decode_cursor, keyset_condition
+
+
+def referencing_columns(model_class):
+  """
+  获取指向该表主键的全部外键列（核心表和其他系统信息表）
+
+  Args:
+    model_class: 系统信息模型类
+
+  Returns:
+    list: Column 列表，按表的依赖顺序排列
+  """
+  table = model_class.__table__
+  return [
+    foreign_key.parent
+    for other in db.metadata.sorted_tables
+    for foreign_key in other.foreign_keys
+    if foreign_key.column.table is table
+  ]
+
+
+def usage_counts(model_class, ids=None):
+  """
+  统计每行被引用的次数（所有外键列合并为一条 UNION ALL 分组查询）
+
+  Args:
+    model_class: 系统信息模型类
+    ids: 要统计的 id 列表，默认整张表
+
+  Returns:
+    dict: {id: 引用次数}，未被引用的 id 不出现
+  """
+  columns = referencing_columns(model_class)
+  if not columns or ids is not None and not ids:
+    return {}
+
+  references = union_all(*[
+    select(column.label('ref_id')).where(column.in_(ids) if ids is not None else column.is_not(None))
+    for column in columns
+  ]).subquery()
+  rows = db.session.execute(
+    select(references.c.ref_id, func.count()).group_by(references.c.ref_id)
+  )
+  return dict(rows.all())
+
+
+def is_in_use(item, relations):
+  """
+  检查记录是否被指定的关联引用（EXISTS 查询，不加载引用行）
+
+  Args:
+    item: 系统信息模型对象
+    relations: 一对多关联名列表，如 ['locomotives', 'models']
+
+  Returns:
+    bool: 任一关联存在引用行
+  """
+  mapper = inspect(type(item))
+  conditions = []
+  for relation in relations:
+    prop = mapper.relationships[relation]
+    conditions.append(exists().where(and_(*[
+      remote == getattr(item, mapper.get_property_by_column(local).key)
+      for local, remote in prop.local_remote_pairs
+    ])))
+  if not conditions:
+    return False
+  return bool(db.session.scalar(select(or_(*conditions))))
+
+
+def _search_columns(model_class):
+  """可搜索的列：名称，以及品牌缩写"""
+  return [model_class.name] + ([model_class.abbreviation] if hasattr(model_class, 'abbreviation') else [])
+
+
+def _parent_relationships(model_class):
+  """多对一关联（如车型的系列、动力），行数据附带其名称"""
+  return [rel.key for rel in inspect(model_class).relationships if rel.direction is RelationshipDirection.MANYTOONE]
+
+
+def fetch_option_page(model_class, query=None, after=None, limit=DEFAULT_PAGE_SIZE):
+  """
+  获取一页系统信息数据
+
+  Args:
+    model_class: 系统信息模型类
+    query: 搜索串，匹配名称（品牌同时匹配缩写）中任意位置，不区分大小写
+    after: 上一页返回的 next_cursor
+    limit: 每页行数
+
+  Returns:
+    dict: {'items': 行数据列表（含 usage_count）, 'next_cursor': 下一页游标或 None, 'has_more': 是否还有数据}
+
+  Raises:
+    ValueError: 游标无效
+  """
+  relationships = _parent_relationships(model_class)
+  statement = model_class.query.options(*[joinedload(getattr(model_class, key)) for key in relationships])
+
+  query = (query or '').strip()
+  if query:
+    statement = statement.filter(or_(*[
+      column.icontains(query, autoescape=True) for column in _search_columns(model_class)
+    ]))
+
+  if after:
+    _, row_id = decode_cursor(after, model_class.id)
+    statement = statement.filter(keyset_condition(model_class.id, model_class.id, row_id, row_id, False))
+
+  rows = statement.order_by(model_class.id).limit(limit + 1).all()
+  has_more = len(rows) > limit
+  rows = rows[:limit]
+
+  counts = usage_counts(model_class, [obj.id for obj in rows])
+  items = []
+  for obj in rows:
+    row = {column.key: getattr(obj, column.key) for column in model_class.__table__.columns}
+    for key in relationships:
+      related = getattr(obj, key)
+      row[key] = related.name if related else None
+    row['usage_count'] = counts.get(obj.id, 0)
+    items.append(row)
+
+  return {
+    'items': items,
+    'next_cursor': encode_cursor(rows[-1].id, rows[-1].id) if has_more else None,
+    'has_more': has_more
+  }
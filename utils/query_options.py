@@ -0,0 +1,101 @@
+"""
+列表查询加载选项模块
+
+列表页模板会逐行访问多个关联对象（系列、品牌、商家等），默认的懒加载会为每一行单独发出查询。
+此处集中声明每种模型列表需要预加载的关联，使用 selectinload 按关联批量加载，
+页面查询次数只与关联数量有关，与行数无关。
+流式渲染时按 id 分批读取，每批一次主查询加预加载，内存占用与批大小有关而与总行数无关。
+"""
+from sqlalchemy.orm import selectinload
+from models import Locomotive, CarriageSet, Trainset, LocomotiveHead
+
+# 流式渲染每批读取的行数
+LIST_BATCH_SIZE = 500
+
+# 各模型列表页使用的关联；元组表示多级关联路径
+LIST_RELATIONSHIPS = {
+  Locomotive: (
+    'series', 'power_type', 'model', 'brand', 'depot', 'chip_interface', 'chip_model', 'merchant'
+  ),
+  Trainset: (
+    'series', 'power_type', 'model', 'brand', 'depot', 'chip_interface', 'chip_model', 'merchant'
+  ),
+  CarriageSet: (
+    'series', 'brand', 'depot', 'merchant', ('items', 'model')
+  ),
+  LocomotiveHead: (
+    'model', 'brand', 'merchant'
+  )
+}
+
+
+def _selectin_path(model_class, path):
+  """
+  为一条关联路径构建 selectinload 选项
+
+  Args:
+    model_class: 路径起点的模型类
+    path: 关联名或关联名元组
+
+  Returns:
+    Load: SQLAlchemy 加载选项
+  """
+  names = (path,) if isinstance(path, str) else path
+  attribute = getattr(model_class, names[0])
+  option = selectinload(attribute)
+  for name in names[1:]:
+    attribute = getattr(attribute.property.mapper.class_, name)
+    option = option.selectinload(attribute)
+  return option
+
+
+def list_loader_options(model_class):
+  """
+  获取模型列表页的预加载选项
+
+  Args:
+    model_class: 核心模型类
+
+  Returns:
+    list: selectinload 选项列表（未声明的模型返回空列表）
+  """
+  return [_selectin_path(model_class, path) for path in LIST_RELATIONSHIPS.get(model_class, ())]
+
+
+def list_query(model_class):
+  """
+  构建预加载了列表页所需关联的查询
+
+  Args:
+    model_class: 核心模型类
+
+  Returns:
+    Query: 可继续链式调用的查询对象
+  """
+  return model_class.query.options(*list_loader_options(model_class))
+
+
+def iter_list_batches(model_class, batch_size=None):
+  """
+  按 id 顺序分批读取列表行，供流式模板逐批渲染
+
+  每批是独立的完整查询（id > 上一批最大 id），不占用未读完的游标，
+  因此预加载查询可以在批与批之间正常执行。
+
+  Args:
+    model_class: 核心模型类
+    batch_size: 每批行数，默认 LIST_BATCH_SIZE
+
+  Yields:
+    list: 一批已预加载关联的模型对象
+  """
+  batch_size = batch_size or LIST_BATCH_SIZE
+  last_id = 0
+  while True:
+    batch = list_query(model_class).filter(model_class.id > last_id).order_by(model_class.id).limit(batch_size).all()
+    if not batch:
+      return
+    yield batch
+    if len(batch) < batch_size:
+      return
+    last_id = batch[-1].id
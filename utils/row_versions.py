@@ -0,0 +1,236 @@
+"""
+行版本与删除记录维护模块
+
+核心表每行带有单调递增的 row_version：通过 Session before_flush 事件，
+在同一事务内从 row_version_counter 计数器分配版本号并写入新增/修改的行，删除的行写入 row_tombstone。
+车厢增删改时同时递增所属套装的版本，增量同步以套装为单位返回车厢。
+
+计数器行在事务提交前一直被更新锁定，分配版本的事务按版本顺序串行提交，
+客户端记录的同步位置之前不会再出现新提交的版本。
+批量 SQL 操作（Query.update/delete）不经过事件，核心表上应使用 ORM 逐行修改。
+"""
+from sqlalchemy import event, select, update, func
+from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from models import db, Locomotive, CarriageSet, CarriageItem, Trainset, LocomotiveHead
+from models import RowVersionCounter, RowTombstone
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 带行版本的模型类 -> 删除记录中的类型键（车厢不单独记录删除，由套装版本体现）
+VERSIONED_MODELS = {
+  Locomotive: 'locomotive',
+  CarriageSet: 'carriage',
+  CarriageItem: None,
+  Trainset: 'trainset',
+  LocomotiveHead: 'locomotive_head'
+}
+
+# 计数器行的固定主键
+COUNTER_ID = 1
+
+
+def allocate_versions(session, count):
+  """
+  分配 count 个连续的行版本号
+
+  先以 UPDATE 自增计数器（持有行锁直到事务结束），再读取新值。
+
+  Args:
+    session: 数据库会话
+    count: 需要的版本号个数
+
+  Returns:
+    int: 分配到的第一个版本号
+  """
+  table = RowVersionCounter.__table__
+  result = session.execute(
+    table.update().where(table.c.id == COUNTER_ID).values(value=table.c.value + count)
+  )
+  if result.rowcount == 0:
+    session.execute(table.insert().values(id=COUNTER_ID, value=count, epoch=uuid.uuid4().hex))
+  value = session.execute(select(table.c.value).where(table.c.id == COUNTER_ID)).scalar_one()
+  return value - count + 1
+
+
+def current_version():
+  """
+  获取当前已提交的最大行版本和计数器纪元
+
+  Returns:
+    tuple: (version, epoch)，计数器不存在时为 (0, None)
+  """
+  table = RowVersionCounter.__table__
+  row = db.session.execute(select(table.c.value, table.c.epoch).where(table.c.id == COUNTER_ID)).first()
+  return (row[0], row[1]) if row else (0, None)
+
+
+def _parent_sets(session, item):
+  """获取车厢当前和原先所属的套装对象"""
+  parent = item.set
+  if parent is None and item.set_id is not None:
+    # 只设置了 set_id 的新车厢不会自动加载关系
+    parent = session.get(CarriageSet, item.set_id)
+  parents = [parent]
+  history = sa_inspect(item).attrs.set_id.history
+  if history.deleted and history.deleted[0] is not None:
+    parents.append(session.get(CarriageSet, history.deleted[0]))
+  return [parent for parent in parents if parent is not None]
+
+
+def _before_flush(session, flush_context, instances):
+  """before_flush 事件：为新增和修改的行分配版本，为删除的行写入删除记录"""
+  with session.no_autoflush:
+    changed = []
+    deleted = []
+    items = []
+
+    for obj in session.new:
+      if type(obj) in VERSIONED_MODELS:
+        changed.append(obj)
+
+    for obj in session.dirty:
+      if type(obj) in VERSIONED_MODELS and session.is_modified(obj):
+        changed.append(obj)
+
+    for obj in session.deleted:
+      if isinstance(obj, CarriageItem):
+        items.append(obj)
+      elif type(obj) in VERSIONED_MODELS:
+        deleted.append(obj)
+
+    # 车厢变化时同时递增所属套装（已删除的套装除外）
+    items.extend(obj for obj in changed if isinstance(obj, CarriageItem))
+    seen = {id(obj) for obj in changed + deleted}
+    for item in items:
+      for carriage_set in _parent_sets(session, item):
+        if id(carriage_set) not in seen:
+          changed.append(carriage_set)
+          seen.add(id(carriage_set))
+
+    if not changed and not deleted:
+      return
+
+    version = allocate_versions(session, len(changed) + len(deleted))
+    for obj in changed:
+      obj.row_version = version
+      version += 1
+    for obj in deleted:
+      session.add(RowTombstone(model_type=VERSIONED_MODELS[type(obj)], row_id=obj.id, row_version=version))
+      version += 1
+
+
+def register_row_version_events():
+  """注册行版本维护事件（重复调用安全）"""
+  if not event.contains(Session, 'before_flush', _before_flush):
+    event.listen(Session, 'before_flush', _before_flush)
+
+
+def backfill_row_versions():
+  """
+  为缺少行版本的已有数据补充版本号（升级数据库结构后调用）
+
+  每张表按 id 占用一段互不重叠的版本区间，随后提交。
+
+  Returns:
+    int: 补充版本号的行数
+  """
+  total = 0
+  for model_class in VERSIONED_MODELS:
+    missing = db.session.execute(
+      select(func.count(), func.max(model_class.id)).where(model_class.row_version.is_(None))
+    ).first()
+    count, max_id = missing
+    if not count:
+      continue
+    base = allocate_versions(db.session, max_id) - 1
+    db.session.execute(
+      update(model_class)
+      .where(model_class.row_version.is_(None))
+      .values(row_version=model_class.id + base)
+      .execution_options(synchronize_session=False)
+    )
+    total += count
+  db.session.commit()
+  if total:
+    logger.info(f"Row versions backfilled: {total} rows")
+  return total
+
+
+def parse_since(value):
+  """
+  解析增量同步的起始版本参数
+
+  Args:
+    value: 字符串形式的版本号，为空表示从头同步
+
+  Returns:
+    int: 起始版本
+
+  Raises:
+    ValueError: 不是非负整数
+  """
+  if not value:
+    return 0
+  try:
+    since = int(value)
+  except ValueError:
+    since = -1
+  if since < 0:
+    raise ValueError('since 必须是非负整数')
+  return since
+
+
+def fetch_changes(model_type, since, limit):
+  """
+  获取某类型在指定版本之后新增、修改和删除的行
+
+  行与删除记录按版本合并排序后截取 limit 条；has_more 为真时以返回的 version 继续请求。
+
+  Args:
+    model_type: 核心模型类型键
+    since: 客户端已同步到的版本
+    limit: 最多返回的变更条数
+
+  Returns:
+    dict: {'version': 新的同步位置, 'changed': 行数据列表, 'deleted': 已删除 ID 列表, 'has_more': 是否还有变更}
+  """
+  from utils.aggregation import CORE_MODELS
+  from utils.listing import serialize_row
+  from utils.query_options import list_query
+
+  model_class = CORE_MODELS[model_type][0]
+  # 先读取同步位置：之后提交的变更版本都更大，下次请求不会遗漏
+  version, _ = current_version()
+
+  rows = list_query(model_class).filter(
+    model_class.row_version > since, model_class.row_version <= version
+  ).order_by(model_class.row_version).limit(limit + 1).all()
+  tombstones = db.session.execute(
+    select(RowTombstone.row_version, RowTombstone.row_id)
+    .where(
+      RowTombstone.model_type == model_type,
+      RowTombstone.row_version > since,
+      RowTombstone.row_version <= version
+    )
+    .order_by(RowTombstone.row_version)
+    .limit(limit + 1)
+  ).all()
+
+  events = sorted(
+    [(obj.row_version, obj, None) for obj in rows] + [(row_version, None, row_id) for row_version, row_id in tombstones],
+    key=lambda event_row: event_row[0]
+  )
+  has_more = len(events) > limit
+  events = events[:limit]
+  if has_more:
+    version = events[-1][0]
+
+  return {
+    'version': version,
+    'changed': [serialize_row(obj, model_class, include_items=True) for _, obj, _ in events if obj is not None],
+    'deleted': [row_id for _, obj, row_id in events if obj is None],
+    'has_more': has_more
+  }
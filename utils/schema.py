@@ -0,0 +1,187 @@
+"""
+数据库结构升级模块
+启动时为已有数据库补建新增的表、列和索引，并初始化依赖历史数据的读模型
+"""
+from sqlalchemy import inspect as sa_inspect, text, select, update, UniqueConstraint
+from sqlalchemy.schema import CreateColumn
+from models import db
+from utils.helpers import normalize_name
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 可从核心表完整重建的读模型表：缺少新增的唯一约束时直接删表重建（其余表只记录警告）
+REBUILDABLE_TABLES = {'collection_summary'}
+
+
+def upgrade_schema():
+  """
+  为已有数据库补建缺失的表、列和索引（空数据库由 init_db.py 负责初始化）
+
+  Returns:
+    list: 新建的表名列表
+  """
+  inspector = sa_inspect(db.engine)
+  existing_tables = set(inspector.get_table_names())
+  if not existing_tables:
+    return []
+
+  created = []
+  added_columns = []
+  for table in db.metadata.sorted_tables:
+    if table.name not in existing_tables:
+      table.create(db.engine)
+      created.append(table.name)
+      logger.info(f"Created missing table: {table.name}")
+      continue
+
+    missing_constraints = missing_unique_constraints(table, inspector)
+    if missing_constraints and table.name in REBUILDABLE_TABLES:
+      table.drop(db.engine)
+      table.create(db.engine)
+      created.append(table.name)
+      logger.info(f"Recreated table for unique constraints {missing_constraints}: {table.name}")
+      continue
+    for name in missing_constraints:
+      logger.warning(f"Missing unique constraint (manual migration required): {table.name}.{name}")
+
+    added_columns.extend(f'{table.name}.{name}' for name in add_missing_columns(table, inspector))
+    create_missing_indexes(table, inspector)
+
+  if 'collection_summary' in created:
+    from utils.collection_summary import rebuild_collection_summary
+    rebuild_collection_summary()
+
+  if any(column.endswith('.row_version') for column in added_columns):
+    from utils.row_versions import backfill_row_versions
+    backfill_row_versions()
+
+  backfill_name_keys()
+
+  return created
+
+
+def add_missing_columns(table, inspector):
+  """
+  为已存在的表补建模型中声明但数据库中缺失的列（仅支持可为空的列）
+
+  Args:
+    table: SQLAlchemy Table 对象
+    inspector: 数据库检查器
+
+  Returns:
+    list: 新建的列名列表
+  """
+  existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+  preparer = db.engine.dialect.identifier_preparer
+  added = []
+  for column in table.columns:
+    if column.name in existing_columns:
+      continue
+    if not column.nullable and column.server_default is None:
+      logger.warning(f"Cannot add non-nullable column without default: {table.name}.{column.name}")
+      continue
+
+    column_ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+    with db.engine.begin() as connection:
+      connection.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}'))
+    added.append(column.name)
+    logger.info(f"Added missing column: {table.name}.{column.name}")
+  return added
+
+
+def missing_unique_constraints(table, inspector):
+  """
+  查找模型中声明但数据库中缺失的具名唯一约束（SQLite 不支持为已有表添加约束，由调用方决定如何处理）
+
+  Args:
+    table: SQLAlchemy Table 对象
+    inspector: 数据库检查器
+
+  Returns:
+    list: 缺失的约束名列表
+  """
+  declared = [
+    constraint.name for constraint in table.constraints
+    if isinstance(constraint, UniqueConstraint) and constraint.name
+  ]
+  if not declared:
+    return []
+  existing = {constraint['name'] for constraint in inspector.get_unique_constraints(table.name)}
+  return [name for name in declared if name not in existing]
+
+
+def create_missing_indexes(table, inspector):
+  """
+  为已存在的表补建模型中声明但数据库中缺失的索引
+
+  Args:
+    table: SQLAlchemy Table 对象
+    inspector: 数据库检查器
+
+  Returns:
+    list: 新建的索引名列表
+  """
+  existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+  created = []
+  for index in table.indexes:
+    if index.name not in existing_indexes:
+      index.create(db.engine)
+      created.append(index.name)
+      logger.info(f"Created missing index: {index.name}")
+  return created
+
+
+def duplicate_name_key(row_id):
+  """
+  规范化后重名的旧数据行使用的占位查找键
+
+  以制表符开头（normalize_name 会合并空白，正常名称的查找键不含制表符），
+  不会与任何名称匹配，也不与同表其他行冲突；改名后由 NameKeyMixin 重新写入正常的查找键。
+  """
+  return f'\t{row_id}'
+
+
+def backfill_name_keys():
+  """
+  为 name_key 为空的系统信息行补写名称查找键（新增 name_key 列后的已有数据）
+
+  唯一键的表中规范化后重名的行（如 "ABC" 和 "ＡＢＣ"）由 id 最小的一行保留查找键，
+  其余行写入占位键（见 duplicate_name_key）并记录一次警告，需在信息维护中手动合并或改名；
+  占位键非空，之后启动不会重复处理。
+
+  Returns:
+    int: 补写的行数（含占位键）
+  """
+  filled = 0
+  for table in db.metadata.sorted_tables:
+    if 'name_key' not in table.c:
+      continue
+    column = table.c.name_key
+    with db.engine.begin() as connection:
+      rows = connection.execute(
+        select(table.c.id, table.c.name).where(column.is_(None)).order_by(table.c.id)
+      ).all()
+      if not rows:
+        continue
+      # 已有查找键 -> 持有该键的行 id
+      owners = {}
+      if column.unique:
+        owners = {key: key_id for key, key_id in connection.execute(select(column, table.c.id).where(column.is_not(None)))}
+      for row_id, name in rows:
+        key = normalize_name(name)
+        if key is None:
+          continue
+        if column.unique and key in owners:
+          logger.warning(
+            f"Duplicate normalized name in {table.name}: id={row_id}, name={name!r} "
+            f"(kept id={owners[key]}), merge or rename it in options"
+          )
+          key = duplicate_name_key(row_id)
+        else:
+          owners[key] = row_id
+        connection.execute(update(table).where(table.c.id == row_id).values(name_key=key))
+        filled += 1
+  if filled:
+    logger.info(f"Backfilled name keys: {filled} rows")
+  return filled
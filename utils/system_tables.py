@@ -159,7 +159,7 @@ SYSTEM_TABLES = {
       {'name': 'color', 'display': '颜色', 'required': False},
       {'name': 'formation', 'display': '编组', 'required': False},
       {'name': 'trainset_number', 'display': '动车号', 'required': False, 'unique_in_scale': True},
-      {'name': 'decoder_number', 'display': '编号', 'required': False},
+      {'name': 'decoder_number', 'display': '编号', 'required': False, 'unique_in_scale': True},
       {'name': 'head_light', 'display': '头车灯', 'required': False},
       {'name': 'interior_light', 'display': '室内灯', 'required': False},
       {'name': 'chip_interface_id', 'display': '芯片接口', 'required': False, 'ref': 'chip_interface'},
@@ -0,0 +1,262 @@
+"""
+记录校验引擎
+
+按 VALIDATION_RULES（格式）和 SYSTEM_TABLES 字段标记（unique 全表唯一、unique_in_scale 比例内唯一）
+声明式校验一条记录。正则在模块加载时预编译；一条记录的全部唯一性检查合并为一条 OR 查询，
+每条记录只访问一次数据库。添加/编辑路由、Excel 导入和自定义导入共用。
+
+批量校验（validate_batch）用哈希集合检测批内重复，与已有数据的冲突按（唯一字段, 比例）分组，
+每组一条 IN 查询，查询数与批量大小无关。
+"""
+from functools import lru_cache
+from sqlalchemy import select, or_, and_
+from models import (
+  db, Brand, Depot, Merchant, PowerType, ChipInterface, ChipModel,
+  LocomotiveSeries, CarriageSeries, TrainsetSeries,
+  LocomotiveModel, CarriageModel, TrainsetModel,
+  Locomotive, CarriageSet, Trainset, LocomotiveHead
+)
+from utils.system_tables import SYSTEM_TABLES
+from utils.validators import VALIDATION_RULES
+from utils.helpers import normalize_name
+import re
+
+# SYSTEM_TABLES 表名 -> 模型类
+MODEL_CLASS_MAP = {
+  'brand': Brand,
+  'depot': Depot,
+  'merchant': Merchant,
+  'power_type': PowerType,
+  'chip_interface': ChipInterface,
+  'chip_model': ChipModel,
+  'locomotive_series': LocomotiveSeries,
+  'carriage_series': CarriageSeries,
+  'trainset_series': TrainsetSeries,
+  'locomotive': Locomotive,
+  'carriage': CarriageSet,
+  'trainset': Trainset,
+  'locomotive_head': LocomotiveHead,
+  'carriage_model': CarriageModel,
+  'locomotive_model': LocomotiveModel,
+  'trainset_model': TrainsetModel
+}
+
+# 批量校验单次最多行数
+MAX_BATCH_SIZE = 1000
+
+# 预编译的格式规则：字段名 -> (正则, 错误消息)
+COMPILED_RULES = {
+  field_name: (re.compile(rule['pattern']), rule['message'])
+  for field_name, rule in VALIDATION_RULES.items()
+}
+
+
+@lru_cache(maxsize=None)
+def unique_fields(table_name):
+  """
+  获取表的唯一性规则
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+
+  Returns:
+    tuple: ((字段名, 显示名, 是否比例内唯一), ...)，按 SYSTEM_TABLES 中的字段顺序
+  """
+  return tuple(
+    (field['name'], field.get('display', field['name']), bool(field.get('unique_in_scale')))
+    for field in SYSTEM_TABLES.get(table_name, {}).get('fields', [])
+    if field.get('unique') or field.get('unique_in_scale')
+  )
+
+
+def _text(value):
+  """空值统一为 None，其余转换为字符串（导入时单元格可能是数字）"""
+  if value is None or value == '':
+    return None
+  return str(value)
+
+
+def _compare(model_class, field_name, value):
+  """唯一性比较的列和值：系统信息表的名称比较规范化的 name_key（与唯一索引一致）"""
+  if field_name == 'name' and hasattr(model_class, 'name_key'):
+    return model_class.name_key, normalize_name(value)
+  return getattr(model_class, field_name), value
+
+
+def check_formats(table_name, data):
+  """
+  检查记录中有格式规则的字段（空值不检查）
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+    data: 字段字典
+
+  Returns:
+    list: 错误列表 [{'field', 'message'}]
+  """
+  errors = []
+  for field in SYSTEM_TABLES.get(table_name, {}).get('fields', []):
+    rule = COMPILED_RULES.get(field['name'])
+    value = _text(data.get(field['name']))
+    if rule and value is not None and not rule[0].fullmatch(value):
+      errors.append({'field': field['name'], 'message': rule[1]})
+  return errors
+
+
+def find_conflicts(table_name, data, exclude_id=None):
+  """
+  查找与记录冲突的已有行（全部唯一性规则合并为一条 OR 查询）
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+    data: 字段字典；未填比例时不检查比例内唯一规则
+    exclude_id: 排除的记录 ID（编辑时排除自身）
+
+  Returns:
+    list: [(字段名, 显示名, 是否比例内唯一, 值, 冲突的已有记录)]，按规则顺序，每条规则最多一项
+  """
+  model_class = MODEL_CLASS_MAP[table_name]
+  scale = data.get('scale')
+  checks = []
+  for field_name, display, in_scale in unique_fields(table_name):
+    value = _text(data.get(field_name))
+    if value is None or in_scale and not scale:
+      continue
+    column, key = _compare(model_class, field_name, value)
+    checks.append((field_name, display, in_scale, value, column, key))
+  if not checks:
+    return []
+
+  conditions = [
+    and_(model_class.scale == scale, column == key) if in_scale else column == key
+    for _, _, in_scale, _, column, key in checks
+  ]
+  query = model_class.query.filter(or_(*conditions))
+  if exclude_id:
+    query = query.filter(model_class.id != exclude_id)
+  rows = query.all()
+
+  conflicts = []
+  for field_name, display, in_scale, value, column, key in checks:
+    for row in rows:
+      if _text(getattr(row, column.key)) == key and (not in_scale or row.scale == scale):
+        conflicts.append((field_name, display, in_scale, value, row))
+        break
+  return conflicts
+
+
+def find_existing(table_name, data):
+  """
+  导入时查找与记录冲突的已有行（按规则顺序取第一个）
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+    data: 字段字典
+
+  Returns:
+    object or None: 冲突的已有记录
+  """
+  conflicts = find_conflicts(table_name, data)
+  return conflicts[0][-1] if conflicts else None
+
+
+def conflict_message(field_name, display, in_scale, value, scale):
+  """唯一性冲突的错误消息"""
+  if in_scale:
+    return f'{display} {value} 在 {scale} 比例下已存在'
+  return f'{display} {value} 已存在'
+
+
+def validate_record(table_name, data, exclude_id=None):
+  """
+  校验一条记录的格式和唯一性
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+    data: 字段字典
+    exclude_id: 排除的记录 ID（编辑时排除自身）
+
+  Returns:
+    list: 错误列表 [{'field', 'message'}]，格式错误在前
+  """
+  errors = check_formats(table_name, data)
+  for field_name, display, in_scale, value, _ in find_conflicts(table_name, data, exclude_id):
+    errors.append({'field': field_name, 'message': conflict_message(field_name, display, in_scale, value, data.get('scale'))})
+  return errors
+
+
+def _existing_values(model_class, field_name, scale, values):
+  """
+  查询已存在的值（一条 IN 查询）
+
+  Returns:
+    dict: {比较值: [已有记录 id]}
+  """
+  column = _compare(model_class, field_name, None)[0]
+  statement = select(model_class.id, column).where(column.in_(values))
+  if scale is not None:
+    statement = statement.where(model_class.scale == scale)
+  existing = {}
+  for row_id, value in db.session.execute(statement):
+    existing.setdefault(_text(value), []).append(row_id)
+  return existing
+
+
+def validate_batch(table_name, records):
+  """
+  批量校验记录的格式和唯一性（批内重复 + 与已有数据冲突）
+
+  Args:
+    table_name: SYSTEM_TABLES 中的表名
+    records: 字段字典列表；带 id 的记录视为编辑，与自身不算冲突
+
+  Returns:
+    list: 错误列表 [{'index', 'field', 'message'}]，index 为记录在列表中的序号，按 index 排序
+  """
+  model_class = MODEL_CLASS_MAP[table_name]
+  rules = unique_fields(table_name)
+  errors = []
+  # 批内首次出现位置：(字段, 比例, 比较值) -> index
+  first_seen = {}
+  # 待查询的比较值：(字段, 比例) -> {比较值}
+  pending = {}
+  # 需要与已有数据比较的检查：(index, 字段, 显示名, 是否比例内唯一, 比例, 值, 比较值, 记录 id)
+  checks = []
+
+  for index, data in enumerate(records):
+    for error in check_formats(table_name, data):
+      errors.append({'index': index, **error})
+
+    scale = data.get('scale')
+    for field_name, display, in_scale in rules:
+      value = _text(data.get(field_name))
+      if value is None or in_scale and not scale:
+        continue
+      group_scale = scale if in_scale else None
+      compared = _compare(model_class, field_name, value)[1]
+      seen_key = (field_name, group_scale, compared)
+      if seen_key in first_seen:
+        errors.append({
+          'index': index, 'field': field_name,
+          'message': f'{display} {value} 与第 {first_seen[seen_key] + 1} 条重复'
+        })
+      else:
+        first_seen[seen_key] = index
+      pending.setdefault((field_name, group_scale), set()).add(compared)
+      checks.append((index, field_name, display, in_scale, group_scale, value, compared, data.get('id')))
+
+  if checks:
+    existing = {
+      group: _existing_values(model_class, group[0], group[1], sorted(values))
+      for group, values in pending.items()
+    }
+    for index, field_name, display, in_scale, scale, value, compared, record_id in checks:
+      ids = existing[(field_name, scale)].get(compared, [])
+      if any(str(row_id) != str(record_id) for row_id in ids):
+        errors.append({
+          'index': index, 'field': field_name,
+          'message': conflict_message(field_name, display, in_scale, value, scale)
+        })
+
+  errors.sort(key=lambda error: error['index'])
+  return errors